@@ -0,0 +1,36 @@
+"""Authentication backends for the accounts app."""
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+def user_cache_key(user_id):
+    """Cache key for a user looked up by primary key."""
+    return f'auth:user:{user_id}'
+
+def process_local_caching():
+    """Auth state that is cached, but in a cache private to each process."""
+    if settings.CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache':
+        return []
+    uses = []
+    if settings.SESSION_ENGINE.rsplit('.', 1)[-1] in ('cache', 'cached_db'):
+        uses.append(f'SESSION_ENGINE={settings.SESSION_ENGINE}')
+    if 'accounts.backends.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS:
+        uses.append('CachedModelBackend')
+    return uses
+
+def invalidate_cached_user(user_id):
+    """Drop a cached user so the next request reloads it."""
+    cache.delete(user_cache_key(user_id))
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that serves per-request user lookups from the cache."""
+    
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,14 @@
+"""Django signals for accounts app."""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from code_editor.request_profiler import track
+from .backends import invalidate_cached_user
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@track('signals')
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Invalidate the cached user whenever the row changes."""
+    invalidate_cached_user(instance.pk)
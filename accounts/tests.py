@@ -0,0 +1,52 @@
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from .backends import process_local_caching, user_cache_key
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/1'}}
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['accounts.backends.CachedModelBackend'],
+)
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_authenticated_request_skips_session_and_user_queries(self):
+        self.client.get('/api/execution/history/')
+        # Only the history query itself should hit the database once warm
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/execution/history/')
+        self.assertEqual(response.status_code, 200)
+    
+    def test_user_save_invalidates_cache(self):
+        self.client.get('/api/execution/history/')
+        self.assertIsNotNone(cache.get(user_cache_key(self.user.pk)))
+        self.user.first_name = 'Changed'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+    
+    def test_password_change_logs_out_cached_session(self):
+        self.client.get('/api/execution/history/')
+        self.user.set_password('newpass456')
+        self.user.save()
+        response = self.client.get('/api/execution/history/')
+        self.assertEqual(response.status_code, 403)
+    
+    def test_process_local_caching(self):
+        with self.settings(CACHES=LOCMEM):
+            self.assertEqual(process_local_caching(), [
+                'SESSION_ENGINE=django.contrib.sessions.backends.cached_db', 'CachedModelBackend',
+            ])
+        with self.settings(CACHES=REDIS):
+            self.assertEqual(process_local_caching(), [])
+        with self.settings(
+            CACHES=LOCMEM, SESSION_ENGINE='django.contrib.sessions.backends.db',
+            AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'],
+        ):
+            self.assertEqual(process_local_caching(), [])
@@ -1,5 +1,11 @@
-from rest_framework import serializers
-from editor.models import CodeSnippet, ExecutionHistory
+import posixpath
+from django.conf import settings
+from django.db import transaction
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from editor.models import CodeSnippet, ExecutionHistory, Project, ProjectFile, SnippetRevision, compute_code_hash
+from executor.languages import get_language
+from editor.exports import EXPORT_COLUMNS, EXPORT_FORMATS
 
 class CodeSnippetSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,15 +13,229 @@ class CodeSnippetSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'code', 'language', 'created_at', 'updated_at', 'is_public']
         read_only_fields = ['created_at', 'updated_at']
 
+class PublicSnippetSerializer(CodeSnippetSerializer):
+    author = serializers.CharField(source='user.username', read_only=True)
+    
+    class Meta(CodeSnippetSerializer.Meta):
+        fields = CodeSnippetSerializer.Meta.fields + ['author']
+
+class SnippetRevisionSerializer(serializers.ModelSerializer):
+    # Annotated by the query, so the data itself is never loaded
+    stored_size = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = SnippetRevision
+        fields = ['number', 'is_keyframe', 'size', 'stored_size', 'checksum', 'created_at']
+
 class ExecutionHistorySerializer(serializers.ModelSerializer):
     class Meta:
         model = ExecutionHistory
         fields = ['id', 'code', 'language', 'stdin', 'stdout', 'stderr', 'returncode', 'status', 'execution_time', 'created_at']
         read_only_fields = ['stdout', 'stderr', 'returncode', 'status', 'execution_time', 'created_at']
 
+class BenchmarkOptionsSerializer(serializers.Serializer):
+    """Repeat-run options for benchmark mode."""
+    runs = serializers.IntegerField(min_value=1, default=5)
+    warmup = serializers.IntegerField(min_value=0, default=1)
+    pin_cpu = serializers.BooleanField(default=False)
+    
+    def validate(self, data):
+        if data['runs'] + data['warmup'] > settings.BENCHMARK_MAX_RUNS:
+            raise serializers.ValidationError(
+                f"runs + warmup may not exceed {settings.BENCHMARK_MAX_RUNS}"
+            )
+        return data
+
 class ExecutionRequestSerializer(serializers.Serializer):
     """Serializer for code execution requests."""
     code = serializers.CharField()
     language = serializers.ChoiceField(choices=['python', 'java', 'javascript'])
     stdin = serializers.CharField(required=False, allow_blank=True)
     snippet_id = serializers.IntegerField(required=False, allow_null=True)
+    profile = serializers.BooleanField(required=False, default=False)
+    priority = serializers.ChoiceField(choices=['interactive', 'batch'], default='interactive')
+    benchmark = BenchmarkOptionsSerializer(required=False)
+    
+    def validate(self, data):
+        if data.get('profile') and data.get('benchmark') is not None:
+            raise serializers.ValidationError("profile and benchmark cannot be combined")
+        return data
+
+class ProjectFileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProjectFile
+        fields = ['path', 'content', 'content_hash', 'updated_at']
+        read_only_fields = ['content_hash', 'updated_at']
+        extra_kwargs = {'content': {'trim_whitespace': False}}
+    
+    def validate_path(self, value):
+        path = posixpath.normpath(value.strip())
+        # Rejects absolute paths, '..' and hidden files alike
+        if '\\' in value or path.startswith('/') or any(part.startswith('.') for part in path.split('/')):
+            raise serializers.ValidationError(f"Invalid file path: {value}")
+        return path
+
+class ProjectSerializer(serializers.ModelSerializer):
+    """Project with its files. Saving with 'files' replaces the whole file tree."""
+    files = ProjectFileSerializer(many=True, required=False)
+    
+    class Meta:
+        model = Project
+        fields = ['id', 'name', 'language', 'entry_point', 'files', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+    
+    def validate(self, data):
+        files = data.get('files')
+        if files is None:
+            if self.instance is None:
+                raise serializers.ValidationError({'files': 'A project needs at least one file.'})
+            paths = set(self.instance.files.values_list('path', flat=True))
+        else:
+            paths = [f['path'] for f in files]
+            if not paths:
+                raise serializers.ValidationError({'files': 'A project needs at least one file.'})
+            if len(paths) > settings.PROJECT_MAX_FILES:
+                raise serializers.ValidationError({'files': f'A project may have at most {settings.PROJECT_MAX_FILES} files.'})
+            if len(set(paths)) != len(paths):
+                raise serializers.ValidationError({'files': 'File paths must be unique.'})
+            if sum(len(f['content'].encode('utf-8')) for f in files) > settings.PROJECT_MAX_BYTES:
+                raise serializers.ValidationError({'files': f'Project files may total at most {settings.PROJECT_MAX_BYTES} bytes.'})
+        
+        language = data.get('language', self.instance.language if self.instance else 'python')
+        entry_point = data.get('entry_point', self.instance.entry_point if self.instance else None)
+        if entry_point not in paths:
+            raise serializers.ValidationError({'entry_point': 'The entry point must be one of the project files.'})
+        if not entry_point.endswith(get_language(language)['extension']):
+            raise serializers.ValidationError({'entry_point': f'The entry point must be a {language} source file.'})
+        return data
+    
+    @transaction.atomic
+    def create(self, validated_data):
+        files = validated_data.pop('files')
+        project = Project.objects.create(**validated_data)
+        ProjectFile.objects.bulk_create([
+            ProjectFile(project=project, content_hash=compute_code_hash(f['content']), **f)
+            for f in files
+        ])
+        return project
+    
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        files = validated_data.pop('files', None)
+        instance = super().update(instance, validated_data)
+        if files is not None:
+            # Only touch rows whose content changed, so their timestamps stay meaningful
+            existing = {f.path: f for f in instance.files.all()}
+            incoming = {f['path']: f['content'] for f in files}
+            instance.files.filter(path__in=set(existing) - set(incoming)).delete()
+            for path, content in incoming.items():
+                project_file = existing.get(path)
+                if project_file is None:
+                    ProjectFile.objects.create(project=instance, path=path, content=content)
+                elif project_file.content != content:
+                    project_file.content = content
+                    project_file.save()
+        return instance
+
+class ProjectRunSerializer(serializers.Serializer):
+    """Serializer for project run requests."""
+    stdin = serializers.CharField(required=False, allow_blank=True)
+    priority = serializers.ChoiceField(choices=['interactive', 'batch'], default='interactive')
+
+class SearchRequestSerializer(serializers.Serializer):
+    """Serializer for full-text search requests."""
+    q = serializers.CharField()
+    type = serializers.ChoiceField(choices=['snippets', 'executions'], default='snippets')
+    page = serializers.IntegerField(min_value=1, default=1)
+    page_size = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+class ExportRequestSerializer(serializers.Serializer):
+    """Serializer for execution history export requests."""
+    output = serializers.ChoiceField(choices=EXPORT_FORMATS, default='jsonl')
+    gzip = serializers.BooleanField(default=False)
+    language = serializers.ChoiceField(choices=['python', 'java', 'javascript'], required=False, allow_blank=True)
+    since = serializers.DateTimeField(required=False, input_formats=['iso-8601', '%Y-%m-%d'])
+    until = serializers.DateTimeField(required=False, input_formats=['iso-8601', '%Y-%m-%d'])
+    columns = serializers.CharField(required=False, allow_blank=True)
+    
+    def validate_columns(self, value):
+        columns = [column.strip() for column in value.split(',') if column.strip()]
+        unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown columns: {', '.join(unknown)}")
+        return columns
+
+class GalleryRequestSerializer(serializers.Serializer):
+    """Serializer for public gallery listing requests."""
+    language = serializers.ChoiceField(choices=['python', 'java', 'javascript'], required=False, allow_blank=True)
+    ordering = serializers.ChoiceField(choices=['popular', 'recent'], default='popular')
+    page = serializers.IntegerField(min_value=1, default=1)
+    page_size = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+class SnippetEditSerializer(serializers.Serializer):
+    """One replacement of code[start:end] in a snippet delta."""
+    start = serializers.IntegerField(min_value=0)
+    end = serializers.IntegerField(min_value=0)
+    text = serializers.CharField(allow_blank=True, default='', trim_whitespace=False)
+
+class SnippetDeltaSerializer(serializers.Serializer):
+    """Serializer for delta-based snippet code updates."""
+    base = serializers.CharField(required=False)
+    edits = SnippetEditSerializer(many=True, allow_empty=True)
+
+class FastRows:
+    """
+    Read-only fast path producing the same list as serializer_class(many=True).data.
+    
+    Rows are fetched with values_list() and only the fields whose database
+    value differs from their representation (dates, decimals, UUIDs) are
+    converted, so no model instances or per-field calls are made for the
+    rest. Every field must read a plain column, optionally across a
+    foreign key ('user.username').
+    """
+    PLAIN_FIELDS = (
+        serializers.BooleanField, serializers.CharField, serializers.ChoiceField,
+        serializers.FloatField, serializers.IntegerField,
+    )
+    
+    def __init__(self, serializer_class):
+        self.names = []
+        self.columns = []
+        self.converted = []
+        for name, field in serializer_class().fields.items():
+            if isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+                raise TypeError(f"{serializer_class.__name__}.{name} is not a plain column")
+            if not isinstance(field, self.PLAIN_FIELDS):
+                self.converted.append((len(self.names), field))
+            self.names.append(name)
+            self.columns.append(field.source.replace('.', '__'))
+    
+    @staticmethod
+    def _converter(field):
+        output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+        if not isinstance(field, serializers.DateTimeField) or str(output_format).lower() != ISO_8601:
+            return field.to_representation
+        # DRF looks up the current time zone for every value; look it up once per list
+        tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+        if tz is None:
+            return field.to_representation
+        
+        def convert(value):
+            if value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert
+    
+    def serialize(self, queryset):
+        names = self.names
+        converters = [(i, self._converter(field)) for i, field in self.converted]
+        data = []
+        for row in queryset.values_list(*self.columns):
+            if converters:
+                row = list(row)
+                for i, convert in converters:
+                    if row[i] is not None:
+                        row[i] = convert(row[i])
+            data.append(dict(zip(names, row)))
+        return data
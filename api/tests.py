@@ -0,0 +1,559 @@
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+import msgpack
+from unittest.mock import patch
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from editor import archives
+from editor.gallery import GALLERY_CACHE_KEY, get_gallery_ranking, refresh_gallery_ranking
+from editor.history import HistoryRecorder
+from editor.models import CodeSnippet, ExecutionHistory, Project
+from .serializers import CodeSnippetSerializer, ExecutionHistorySerializer, FastRows, PublicSnippetSerializer
+from .views import conditional_response
+
+class SearchAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.other = User.objects.create_user('other', 'other@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.title_match = CodeSnippet.objects.create(
+            user=self.user, title='fibonacci numbers', code='x = 1', language='python'
+        )
+        self.code_match = CodeSnippet.objects.create(
+            user=self.user, title='loops', code='def fibonacci(n): pass', language='python'
+        )
+        CodeSnippet.objects.create(
+            user=self.other, title='fibonacci', code='', language='python'
+        )
+    
+    def test_search_ranks_title_above_code(self):
+        response = self.client.get('/api/search/', {'q': 'fibonacci'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        ids = [row['id'] for row in response.data['results']]
+        self.assertEqual(ids, [self.title_match.id, self.code_match.id])
+    
+    def test_search_is_paginated_and_prefix_matched(self):
+        response = self.client.get('/api/search/', {'q': 'fibon', 'page': 2, 'page_size': 1})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.code_match.id])
+    
+    def test_index_follows_updates_and_deletes(self):
+        self.code_match.code = 'def factorial(n): pass'
+        self.code_match.save()
+        self.title_match.delete()
+        response = self.client.get('/api/search/', {'q': 'fibonacci'})
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_search_execution_output(self):
+        ExecutionHistory.objects.create(
+            user=self.user, code='print(42)', language='python',
+            stdout='the answer', status='success'
+        )
+        response = self.client.get('/api/search/', {'q': 'answer', 'type': 'executions'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['stdout'], 'the answer')
+    
+    def test_query_syntax_is_not_interpreted(self):
+        response = self.client.get('/api/search/', {'q': '"fib* OR NEAR('})
+        self.assertEqual(response.status_code, 200)
+
+# Cached sessions and users, so that cached pages need no queries at all
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['accounts.backends.CachedModelBackend'],
+)
+class GalleryAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.quiet = CodeSnippet.objects.create(
+            user=self.user, title='quiet', code='x = 1', language='python', is_public=True
+        )
+        self.popular = CodeSnippet.objects.create(
+            user=self.user, title='popular', code='console.log(1)', language='javascript', is_public=True
+        )
+        CodeSnippet.objects.create(user=self.user, title='private', code='x = 2', language='python')
+        for _ in range(3):
+            ExecutionHistory.objects.create(
+                user=self.user, snippet=self.popular, code='console.log(1)',
+                language='javascript', status='success'
+            )
+    
+    def test_lists_public_snippets_by_popularity(self):
+        response = self.client.get('/api/gallery/')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual([row['id'] for row in results], [self.popular.id, self.quiet.id])
+        self.assertEqual(results[0]['execution_count'], 3)
+    
+    def test_language_filter(self):
+        response = self.client.get('/api/gallery/', {'language': 'python'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.quiet.id])
+    
+    def test_listing_revalidates_without_database(self):
+        response = self.client.get('/api/gallery/')
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/gallery/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    @override_settings(GALLERY_MAX_SNIPPETS=1)
+    def test_cap_applies_per_language_and_ordering(self):
+        fresh = CodeSnippet.objects.create(user=self.user, title='fresh', code='x', language='java', is_public=True)
+        popular = self.client.get('/api/gallery/').data['results']
+        self.assertEqual([row['id'] for row in popular], [self.popular.id])
+        recent = self.client.get('/api/gallery/', {'ordering': 'recent'}).data['results']
+        self.assertEqual([row['id'] for row in recent], [fresh.id])
+        python = self.client.get('/api/gallery/', {'language': 'python'}).data['results']
+        self.assertEqual([row['id'] for row in python], [self.quiet.id])
+    
+    def test_last_modified_follows_ranking_changes(self):
+        first = refresh_gallery_ranking()
+        self.assertEqual(refresh_gallery_ranking()['last_modified'], first['last_modified'])
+        ExecutionHistory.objects.create(user=self.user, snippet=self.quiet, code='x = 1', language='python', status='success')
+        self.assertGreater(refresh_gallery_ranking()['last_modified'], first['last_modified'])
+    
+    def test_last_modified_survives_ranking_expiry(self):
+        first = get_gallery_ranking()
+        cache.delete(GALLERY_CACHE_KEY)
+        rebuilt = get_gallery_ranking()
+        self.assertGreater(rebuilt['generated_at'], first['generated_at'])
+        self.assertEqual(rebuilt['last_modified'], first['last_modified'])
+    
+    def test_listing_is_served_from_ranking_until_refresh(self):
+        self.client.get('/api/gallery/')
+        CodeSnippet.objects.create(user=self.user, title='new', code='x', language='python', is_public=True)
+        response = self.client.get('/api/gallery/')
+        self.assertEqual(response.data['count'], 2)
+    
+    def test_detail_conditional_get(self):
+        response = self.client.get(f'/api/gallery/{self.quiet.id}/')
+        self.assertEqual(response.data['author'], 'testuser')
+        response = self.client.get(f'/api/gallery/{self.quiet.id}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.quiet.code = 'x = 3'
+        self.quiet.save()
+        response = self.client.get(f'/api/gallery/{self.quiet.id}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+    
+    def test_private_snippet_not_exposed(self):
+        private = CodeSnippet.objects.get(title='private')
+        response = self.client.get(f'/api/gallery/{private.id}/')
+        self.assertEqual(response.status_code, 404)
+
+class SnippetConditionalRequestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.snippet = CodeSnippet.objects.create(
+            user=self.user, title='Hello', code='print("hello")\n', language='python'
+        )
+        self.url = f'/api/snippets/{self.snippet.id}/'
+    
+    def test_get_returns_304_when_unchanged(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+    
+    def test_list_returns_304_when_unchanged(self):
+        etag = self.client.get('/api/snippets/')['ETag']
+        self.assertEqual(self.client.get('/api/snippets/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        CodeSnippet.objects.create(user=self.user, title='New', code='x', language='python')
+        self.assertEqual(self.client.get('/api/snippets/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_stale_if_match_rejects_update(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.patch(self.url, {'title': 'First'}, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        response = self.client.patch(self.url, {'title': 'Second'}, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.snippet.refresh_from_db()
+        self.assertEqual(self.snippet.title, 'First')
+    
+    def test_delta_update(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.post(self.url + 'delta/', {
+            'edits': [{'start': 7, 'end': 12, 'text': 'world'}, {'start': 15, 'end': 15, 'text': 'x = 1\n'}],
+        }, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.snippet.refresh_from_db()
+        self.assertEqual(self.snippet.code, 'print("world")\nx = 1\n')
+        
+        # Replaying against the old base must not apply twice
+        response = self.client.post(self.url + 'delta/', {
+            'base': etag.strip('"'), 'edits': [{'start': 0, 'end': 0, 'text': '#'}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 412)
+    
+    def test_delta_requires_base_and_valid_ranges(self):
+        response = self.client.post(self.url + 'delta/', {'edits': []}, content_type='application/json')
+        self.assertEqual(response.status_code, 428)
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.post(self.url + 'delta/', {
+            'edits': [{'start': 5, 'end': 500, 'text': ''}],
+        }, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 400)
+
+class FastSerializationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.snippet = CodeSnippet.objects.create(
+            user=self.user, title='Big', code='print("x")\n' * 500, language='python', is_public=True,
+        )
+        ExecutionHistory.objects.create(user=self.user, code='print(1)', language='python', status='success', stdout='1\n')
+        ExecutionHistory.objects.create(user=self.user, code='x', language='python', status='error', returncode=None)
+    
+    def test_fast_rows_match_model_serializers(self):
+        for serializer_class, queryset in (
+            (CodeSnippetSerializer, CodeSnippet.objects.all()),
+            (ExecutionHistorySerializer, ExecutionHistory.objects.all()),
+            (PublicSnippetSerializer, CodeSnippet.objects.select_related('user')),
+        ):
+            self.assertEqual(
+                FastRows(serializer_class).serialize(queryset),
+                serializer_class(queryset, many=True).data,
+            )
+        with override_settings(TIME_ZONE='Asia/Kolkata'):
+            queryset = ExecutionHistory.objects.all()
+            self.assertEqual(
+                FastRows(ExecutionHistorySerializer).serialize(queryset),
+                ExecutionHistorySerializer(queryset, many=True).data,
+            )
+    
+    def test_messagepack_negotiated(self):
+        response = self.client.get('/api/execution/history/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), self.client.get('/api/execution/history/').json())
+        response = self.client.get('/api/snippets/?format=msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)[0]['code'], self.snippet.code)
+    
+    def test_large_responses_gzipped(self):
+        plain = self.client.get('/api/snippets/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        
+        response = self.client.get('/api/snippets/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        
+        small = self.client.get('/api/execution/history/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+    
+    def test_weak_etag_accepted_for_if_match(self):
+        url = f'/api/snippets/{self.snippet.id}/'
+        etag = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')['ETag']
+        self.assertTrue(etag.startswith('W/'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.patch(url, {'title': 'Renamed'}, content_type='application/json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_weak_if_match_leaves_request_header(self):
+        request = RequestFactory().put('/', HTTP_IF_MATCH='W/"1-2.0"')
+        self.assertIsNone(conditional_response(request, '1-2.0', None))
+        self.assertEqual(request.META['HTTP_IF_MATCH'], 'W/"1-2.0"')
+
+class SnippetRevisionAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.snippet = CodeSnippet.objects.create(user=self.user, title='T', code='x = 1\n')
+        self.url = f'/api/snippets/{self.snippet.id}/'
+        self.client.patch(self.url, {'code': 'x = 2\n'}, content_type='application/json')
+    
+    def test_list_and_fetch_revisions(self):
+        response = self.client.get(self.url + 'revisions/')
+        self.assertEqual([row['number'] for row in response.data], [2, 1])
+        first = self.snippet.revisions.get(number=1)
+        self.assertEqual(response.data[1]['stored_size'], len(first.data))
+        response = self.client.get(self.url + 'revisions/1/')
+        self.assertEqual(response.data['code'], 'x = 1\n')
+        self.assertEqual(self.client.get(self.url + 'revisions/9/').status_code, 404)
+    
+    def test_diff_revisions(self):
+        response = self.client.get(self.url + 'diff/', {'from': 1})
+        self.assertIn('-x = 1', response.data['diff'])
+        self.assertIn('+x = 2', response.data['diff'])
+
+class ExecuteProfileTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_profile_flag_returns_profile(self):
+        response = self.client.post('/api/execution/execute/', {
+            'code': 'print(sum(range(10)))', 'language': 'python', 'profile': True,
+        }, content_type='application/json')
+        self.assertEqual(response.data['stdout'], '45\n')
+        self.assertIn('functions', response.data['profile'])
+    
+    def test_profile_omitted_by_default(self):
+        response = self.client.post('/api/execution/execute/', {
+            'code': 'print(1)', 'language': 'python',
+        }, content_type='application/json')
+        self.assertNotIn('profile', response.data)
+
+    @override_settings(SANDBOX_CPUS=[], SCHEDULER_CONCURRENCY=0)
+    def test_no_runtime_prediction_without_slots(self):
+        with patch('api.views.predict_runtime') as predict:
+            response = self.client.post('/api/execution/execute/', {
+                'code': 'print(1)', 'language': 'python',
+            }, content_type='application/json')
+        self.assertEqual(response.data['stdout'], '1\n')
+        predict.assert_not_called()
+
+
+class ExecuteBenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_benchmark_records_one_history_row(self):
+        response = self.client.post('/api/execution/execute/', {
+            'code': 'print(1)', 'language': 'python', 'benchmark': {'runs': 3, 'warmup': 1},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['benchmark']['runs'], 3)
+        self.assertEqual(ExecutionHistory.objects.filter(user=self.user).count(), 1)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.total_executions, 4)
+    
+    @override_settings(BENCHMARK_MAX_RUNS=5)
+    def test_run_budget_enforced(self):
+        response = self.client.post('/api/execution/execute/', {
+            'code': 'print(1)', 'language': 'python', 'benchmark': {'runs': 5, 'warmup': 1},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_benchmark_and_profile_exclusive(self):
+        response = self.client.post('/api/execution/execute/', {
+            'code': 'print(1)', 'language': 'python', 'profile': True, 'benchmark': {},
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+class WriteBehindHistoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir, ignore_errors=True)
+    
+    def test_history_includes_rows_not_yet_flushed(self):
+        with override_settings(HISTORY_WRITE_BEHIND=True, HISTORY_SPOOL_DIR=self.spool_dir):
+            recorder = HistoryRecorder(background=False)
+            with patch('editor.history.get_recorder', return_value=recorder):
+                response = self.client.post('/api/execution/execute/', {
+                    'code': 'print(1)', 'language': 'python',
+                }, content_type='application/json')
+            self.assertEqual(response.data['stdout'], '1\n')
+            self.assertIsNone(response.data['id'])
+            self.assertFalse(ExecutionHistory.objects.exists())
+            
+            history = self.client.get('/api/execution/history/').data
+            self.assertEqual(len(history), 1)
+            self.assertIsNone(history[0]['id'])
+            
+            recorder.flush()
+            history = self.client.get('/api/execution/history/').data
+            self.assertEqual(len(history), 1)
+            self.assertIsNotNone(history[0]['id'])
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.total_executions, 1)
+
+class ExecutionExportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        other = User.objects.create_user('other', 'other@example.com', 'testpass123')
+        for i in range(3):
+            ExecutionHistory.objects.create(
+                user=self.user, code=f'print({i})', language='python', stdout=f'{i}\n', status='success'
+            )
+        ExecutionHistory.objects.create(user=self.user, code='console.log(1)', language='javascript', status='success')
+        ExecutionHistory.objects.create(user=other, code='print("other")', language='python', status='success')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_jsonl_export(self):
+        response = self.client.get('/api/execution/export/?language=python')
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['code'] for row in rows], ['print(0)', 'print(1)', 'print(2)'])
+        self.assertEqual(rows[0]['user'], 'testuser')
+    
+    def test_gzip_csv_with_columns(self):
+        response = self.client.get('/api/execution/export/?output=csv&gzip=true&columns=language,stdout')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="executions.csv.gz"')
+        data = gzip.decompress(b''.join(response.streaming_content)).decode()
+        rows = list(csv.reader(io.StringIO(data)))
+        self.assertEqual(rows[0], ['language', 'stdout'])
+        self.assertEqual(rows[1], ['python', '0\n'])
+        self.assertEqual(len(rows), 5)
+    
+    def test_date_range_and_bad_columns(self):
+        response = self.client.get('/api/execution/export/?since=2000-01-01&until=2000-01-02')
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        response = self.client.get('/api/execution/export/?columns=code,password')
+        self.assertEqual(response.status_code, 400)
+
+class SnippetBulkArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def upload(self, data, name='snippets.jsonl'):
+        return self.client.post('/api/snippets/import/', {'file': SimpleUploadedFile(name, data)})
+    
+    def test_jsonl_import(self):
+        lines = [
+            json.dumps({'title': f'Exercise {i}', 'language': 'python', 'code': f'print("answer {i}")'})
+            for i in range(5)
+        ]
+        with override_settings(SNIPPET_IMPORT_BATCH_SIZE=2):
+            response = self.upload('\n'.join(lines).encode())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 5)
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.total_snippets, 5)
+        snippet = CodeSnippet.objects.get(title='Exercise 3')
+        self.assertEqual(snippet.revisions.get().number, 1)
+        results = self.client.get('/api/search/', {'q': 'answer'}).data
+        self.assertEqual(results['count'], 5)
+    
+    def test_invalid_row_rejects_whole_archive(self):
+        lines = [
+            json.dumps({'title': 'Good', 'language': 'python', 'code': 'print(1)'}),
+            json.dumps({'title': 'Bad', 'language': 'cobol', 'code': 'DISPLAY 1'}),
+        ]
+        response = self.upload('\n'.join(lines).encode())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['snippets'][0]['index'], 1)
+        self.assertFalse(CodeSnippet.objects.exists())
+    
+    def test_zip_round_trip(self):
+        CodeSnippet.objects.create(user=self.user, title='Hello', language='javascript', code='console.log(1)', is_public=True)
+        response = self.client.get('/api/snippets/export/?archive=zip')
+        archive = b''.join(response.streaming_content)
+        CodeSnippet.objects.all().delete()
+        
+        response = self.upload(archive, 'snippets.zip')
+        self.assertEqual(response.status_code, 201)
+        snippet = CodeSnippet.objects.get()
+        self.assertEqual((snippet.title, snippet.language, snippet.code, snippet.is_public),
+                         ('Hello', 'javascript', 'console.log(1)', True))
+    
+    def test_zip_of_source_files(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('week1/fizzbuzz.py', 'print("fizz")')
+            archive.writestr('week1/README.md', 'notes')
+        response = self.upload(buffer.getvalue(), 'week1.zip')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(CodeSnippet.objects.get().title, 'fizzbuzz')
+    
+    def manifest_zip(self, files, entries):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+            archive.writestr('snippets.jsonl', '\n'.join(json.dumps(entry) for entry in entries))
+        return buffer.getvalue()
+    
+    def test_zip_rejects_repeated_file(self):
+        entry = {'title': 'Loop', 'language': 'python', 'file': 'loop.py'}
+        response = self.upload(self.manifest_zip({'loop.py': 'pass'}, [entry, entry]), 'loop.zip')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already used', response.data['file'][0])
+    
+    @override_settings(SNIPPET_IMPORT_MAX_BYTES=1000)
+    def test_zip_members_share_one_size_budget(self):
+        files = {f'{i}.py': '#' * 400 for i in range(3)}
+        with zipfile.ZipFile(io.BytesIO(self.manifest_zip(files, []))) as archive:
+            reader = archives._MemberReader(archive)
+            reader.read(archive.getinfo('0.py'))
+            reader.read(archive.getinfo('1.py'))
+            with self.assertRaisesMessage(archives.ArchiveError, 'Archive is too large'):
+                reader.read(archive.getinfo('2.py'))
+
+class ProjectAPITests(TestCase):
+    def setUp(self):
+        cache.clear()
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        settings_override = override_settings(TEMP_DIR=temp_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def create_project(self, **overrides):
+        data = {
+            'name': 'Greeter',
+            'language': 'python',
+            'entry_point': 'main.py',
+            'files': [
+                {'path': 'main.py', 'content': 'from lib import greet\nprint(greet())\n'},
+                {'path': 'lib.py', 'content': 'def greet():\n    return "hi"\n'},
+            ],
+            **overrides,
+        }
+        return self.client.post('/api/projects/', data, content_type='application/json')
+    
+    def test_create_and_run(self):
+        response = self.create_project()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['files']), 2)
+        
+        response = self.client.post(f"/api/projects/{response.data['id']}/run/", {}, content_type='application/json')
+        self.assertEqual(response.data['stdout'], 'hi\n')
+        self.assertEqual(response.data['build']['changed'], ['lib.py', 'main.py'])
+        self.assertEqual(ExecutionHistory.objects.get(pk=response.data['id']).status, 'success')
+    
+    def test_update_touches_only_changed_files(self):
+        project_id = self.create_project().data['id']
+        main = Project.objects.get(pk=project_id).files.get(path='main.py')
+        response = self.client.patch(f'/api/projects/{project_id}/', {'files': [
+            {'path': 'main.py', 'content': main.content},
+            {'path': 'lib.py', 'content': 'def greet():\n    return "hello"\n'},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Project.objects.get(pk=project_id).files.get(path='main.py').updated_at, main.updated_at)
+        
+        response = self.client.post(f'/api/projects/{project_id}/run/', {}, content_type='application/json')
+        self.assertEqual(response.data['stdout'], 'hello\n')
+    
+    def test_invalid_projects_rejected(self):
+        self.assertEqual(self.create_project(entry_point='missing.py').status_code, 400)
+        bad_path = [{'path': '../escape.py', 'content': ''}, {'path': 'main.py', 'content': ''}]
+        self.assertEqual(self.create_project(files=bad_path).status_code, 400)
+        with override_settings(PROJECT_MAX_FILES=1):
+            self.assertEqual(self.create_project().status_code, 400)
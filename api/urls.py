@@ -1,10 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CodeSnippetViewSet, ExecutionViewSet
+from .views import CodeSnippetViewSet, ExecutionViewSet, ProjectViewSet, SearchViewSet, GalleryViewSet
 
 router = DefaultRouter()
 router.register(r'snippets', CodeSnippetViewSet, basename='snippet')
 router.register(r'execution', ExecutionViewSet, basename='execution')
+router.register(r'projects', ProjectViewSet, basename='project')
+router.register(r'search', SearchViewSet, basename='search')
+router.register(r'gallery', GalleryViewSet, basename='gallery')
 
 urlpatterns = [
     path('', include(router.urls)),
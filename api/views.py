@@ -1,12 +1,78 @@
+import copy
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser, FormParser
+from django.conf import settings
 from django.utils import timezone
-from editor.models import CodeSnippet, ExecutionHistory
-from .serializers import CodeSnippetSerializer, ExecutionHistorySerializer, ExecutionRequestSerializer
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.shortcuts import get_object_or_404
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Length
+from editor.models import CodeSnippet, ExecutionHistory, Project, SnippetRevision
+from editor import archives
+from editor import revisions
+from editor import search
+from editor.history import pending_executions, record_execution
+from editor.exports import CONTENT_TYPES, export_filename, export_queryset, stream_export
+from editor.scheduling import predict_runtime
+from editor.gallery import get_gallery_ranking, list_gallery, gallery_etag
+from editor.utils import apply_text_edits
+from .serializers import (
+    CodeSnippetSerializer, ExecutionHistorySerializer, ExecutionRequestSerializer,
+    ExportRequestSerializer, FastRows, SearchRequestSerializer, GalleryRequestSerializer, ProjectRunSerializer,
+    ProjectSerializer, PublicSnippetSerializer, SnippetDeltaSerializer, SnippetRevisionSerializer,
+)
+from executor.cpus import get_allocator
 from executor.runner import CodeRunner
 
+# Read-only list endpoints serialize straight from values_list()
+snippet_rows = FastRows(CodeSnippetSerializer)
+execution_rows = FastRows(ExecutionHistorySerializer)
+
+def snippet_etag(pk, updated_at):
+    """ETag identifying one revision of a snippet."""
+    return f'{pk}-{updated_at.timestamp()}'
+
+def set_validators(response, etag, last_modified):
+    """Attach ETag and Last-Modified headers to a response."""
+    response['ETag'] = quote_etag(etag)
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+def conditional_response(request, etag, last_modified):
+    """Return a 304/412 response if the request's validators match, else None."""
+    # Compressed responses carry a weak ETag. The tag names a revision, not
+    # an encoding, so a weak tag still identifies the base revision in If-Match.
+    # The comparison sees a copy, so later readers get the header as sent.
+    if_match = request.META.get('HTTP_IF_MATCH')
+    if if_match:
+        request = copy.copy(getattr(request, '_request', request))
+        request.META = {**request.META, 'HTTP_IF_MATCH': if_match.replace('W/', '')}
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+def execution_status(result):
+    """History status of a runner result."""
+    if result['error']:
+        return 'error'
+    if result['timeout']:
+        return 'timeout'
+    if result['memory_exceeded']:
+        return 'memory_exceeded'
+    return 'success'
+
 class CodeSnippetViewSet(viewsets.ModelViewSet):
     """API for managing code snippets."""
     serializer_class = CodeSnippetSerializer
@@ -17,6 +83,224 @@ class CodeSnippetViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+    
+    def _current_revision(self, lock=False):
+        """Fetch only the updated_at of the requested snippet, or 404. lock=True holds the row until commit."""
+        queryset = self.get_queryset().select_for_update() if lock else self.get_queryset()
+        updated_at = queryset.filter(pk=self.kwargs['pk']).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            raise Http404
+        return snippet_etag(self.kwargs['pk'], updated_at), updated_at
+    
+    def perform_update(self, serializer):
+        self.saved_snippet = serializer.save()
+    
+    def list(self, request, *args, **kwargs):
+        summary = self.get_queryset().aggregate(count=Count('id'), latest=Max('updated_at'), last_id=Max('id'))
+        latest = summary['latest']
+        etag = f"list-{summary['count']}-{summary['last_id']}-{latest.timestamp() if latest else 0}"
+        not_modified = conditional_response(request, etag, latest)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(Response(snippet_rows.serialize(self.get_queryset())), etag, latest)
+    
+    def retrieve(self, request, *args, **kwargs):
+        etag, updated_at = self._current_revision()
+        not_modified = conditional_response(request, etag, updated_at)
+        if not_modified is not None:
+            return not_modified
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, updated_at)
+    
+    def update(self, request, *args, **kwargs):
+        # If-Match guards against overwriting someone else's save. The row
+        # stays locked from the check until the save commits, so two writers
+        # holding the same ETag cannot both pass.
+        with transaction.atomic():
+            etag, updated_at = self._current_revision(lock=True)
+            precondition_failed = conditional_response(request, etag, updated_at)
+            if precondition_failed is not None:
+                return precondition_failed
+            response = super().update(request, *args, **kwargs)
+        snippet = self.saved_snippet
+        return set_validators(response, snippet_etag(snippet.pk, snippet.updated_at), snippet.updated_at)
+    
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            etag, updated_at = self._current_revision(lock=True)
+            precondition_failed = conditional_response(request, etag, updated_at)
+            if precondition_failed is not None:
+                return precondition_failed
+            return super().destroy(request, *args, **kwargs)
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """Create snippets from an uploaded zip or JSONL archive, all or nothing."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'file': ['No archive was uploaded.']}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            records = archives.read_archive(upload)
+        except archives.ArchiveError as e:
+            return Response({'file': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = CodeSnippetSerializer(data=records, many=True)
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, list):
+                errors = dict(enumerate(errors))
+            errors = [{'index': i, **error} for i, error in errors.items() if error]
+            return Response({'snippets': errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        snippets = archives.import_snippets(request.user, serializer.validated_data)
+        return Response(
+            {'created': len(snippets), 'ids': [snippet.pk for snippet in snippets]},
+            status=status.HTTP_201_CREATED,
+        )
+    
+    @action(detail=False, methods=['get'], url_path='export')
+    def bulk_export(self, request):
+        """Download all snippets as ?archive=jsonl (default) or ?archive=zip."""
+        queryset = self.get_queryset().order_by('id')
+        if request.query_params.get('archive') == 'zip':
+            return FileResponse(
+                archives.write_zip(queryset),
+                as_attachment=True,
+                filename='snippets.zip',
+                content_type='application/zip',
+            )
+        response = StreamingHttpResponse(archives.iter_jsonl(queryset), content_type='application/x-ndjson; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="snippets.jsonl"'
+        return response
+    
+    @action(detail=True, methods=['post'])
+    def delta(self, request, pk=None):
+        """
+        Apply a text delta to the snippet's code.
+        
+        Body: {"base": "<etag>", "edits": [{"start": 0, "end": 5, "text": "..."}]}
+        Offsets refer to the base revision, which may also be given via If-Match.
+        """
+        serializer = SnippetDeltaSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        base = serializer.validated_data.get('base') or request.headers.get('If-Match', '')
+        base = base.strip().removeprefix('W/').strip('"')
+        if not base:
+            return Response(
+                {'detail': 'A base revision is required, as "base" or an If-Match header.'},
+                status=status.HTTP_428_PRECONDITION_REQUIRED,
+            )
+        
+        with transaction.atomic():
+            snippet = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            current = snippet_etag(snippet.pk, snippet.updated_at)
+            if base != current:
+                response = Response(
+                    {'detail': 'Snippet has changed since the base revision.'},
+                    status=status.HTTP_412_PRECONDITION_FAILED,
+                )
+                return set_validators(response, current, snippet.updated_at)
+            
+            try:
+                snippet.code = apply_text_edits(snippet.code, serializer.validated_data['edits'])
+            except ValueError as e:
+                return Response({'edits': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+            snippet.save(update_fields=['code', 'updated_at'])
+        
+        etag = snippet_etag(snippet.pk, snippet.updated_at)
+        response = Response({'id': snippet.pk, 'etag': etag, 'updated_at': snippet.updated_at, 'length': len(snippet.code)})
+        return set_validators(response, etag, snippet.updated_at)
+
+    @action(detail=True, methods=['get'], url_path='revisions')
+    def revisions(self, request, pk=None):
+        """List stored revisions of a snippet, newest first."""
+        snippet = self.get_object()
+        queryset = snippet.revisions.defer('data').annotate(stored_size=Length('data'))
+        serializer = SnippetRevisionSerializer(queryset, many=True)
+        return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'], url_path=r'revisions/(?P<number>\d+)')
+    def revision(self, request, pk=None, number=None):
+        """Get the code of one revision."""
+        snippet = self.get_object()
+        try:
+            code = revisions.get_revision_code(snippet, int(number))
+        except SnippetRevision.DoesNotExist:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'number': int(number), 'code': code})
+    
+    @action(detail=True, methods=['get'])
+    def diff(self, request, pk=None):
+        """Unified diff between two revisions: ?from=1&to=5 (to defaults to the latest)."""
+        snippet = self.get_object()
+        latest = revisions.latest_revision(snippet)
+        try:
+            from_number = int(request.query_params['from'])
+            to_number = int(request.query_params.get('to', latest.number if latest else 0))
+            diff = revisions.diff_revisions(snippet, from_number, to_number)
+        except (KeyError, ValueError):
+            return Response({'detail': 'Integer "from" and "to" revisions are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except SnippetRevision.DoesNotExist:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'from': from_number, 'to': to_number, 'diff': diff})
+
+class ProjectViewSet(viewsets.ModelViewSet):
+    """API for multi-file projects."""
+    serializer_class = ProjectSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        return Project.objects.filter(user=self.request.user).prefetch_related('files')
+    
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+    
+    @action(detail=True, methods=['post'])
+    def run(self, request, pk=None):
+        """Run the project's entry point, rebuilding only what changed since the last run."""
+        project = self.get_object()
+        serializer = ProjectRunSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        stdin = serializer.validated_data.get('stdin', '')
+        
+        files = {f.path: f.content for f in project.files.all()}
+        entry_code = files.get(project.entry_point, '')
+        expected = None
+        if settings.EXECUTOR_BACKEND != 'remote' and get_allocator() is not None:
+            expected = predict_runtime(entry_code, project.language)
+        
+        result = CodeRunner.run_project(
+            project.pk, files, project.entry_point, project.language, stdin,
+            expected_runtime=expected,
+            priority=serializer.validated_data['priority'],
+        )
+        exec_status = execution_status(result)
+        
+        # History records the entry point's code
+        execution = record_execution(
+            request.user,
+            code=entry_code,
+            language=project.language,
+            stdin=stdin,
+            stdout=result['stdout'],
+            stderr=result['stderr'],
+            returncode=result['returncode'],
+            status=exec_status,
+            execution_time=result.get('execution_time', 0),
+        )
+        return Response({
+            'id': execution.id,
+            'stdout': result['stdout'],
+            'stderr': result['stderr'],
+            'returncode': result['returncode'],
+            'status': exec_status,
+            'timeout': result['timeout'],
+            'error': result['error'],
+            'execution_time': result.get('execution_time', 0),
+            'build': result.get('build'),
+        }, status=status.HTTP_200_OK)
 
 class ExecutionViewSet(viewsets.ViewSet):
     """API for code execution."""
@@ -33,19 +317,26 @@ class ExecutionViewSet(viewsets.ViewSet):
         language = serializer.validated_data['language']
         stdin = serializer.validated_data.get('stdin', '')
         snippet_id = serializer.validated_data.get('snippet_id')
+        profile = serializer.validated_data['profile']
+        benchmark = serializer.validated_data.get('benchmark')
+        
+        # Predict the runtime only when runs may have to queue for a slot
+        expected = None
+        if settings.EXECUTOR_BACKEND != 'remote' and get_allocator() is not None:
+            expected = predict_runtime(code, language, snippet_id)
         
         # Run the code
-        result = CodeRunner.run(code, language, stdin)
-        
-        # Determine status
-        if result['error']:
-            exec_status = 'error'
-        elif result['timeout']:
-            exec_status = 'timeout'
-        elif result['memory_exceeded']:
-            exec_status = 'memory_exceeded'
+        if benchmark:
+            result = CodeRunner.benchmark(code, language, stdin, expected_runtime=expected, **benchmark)
         else:
-            exec_status = 'success'
+            result = CodeRunner.run(
+                code, language, stdin,
+                profile=profile,
+                expected_runtime=expected,
+                priority=serializer.validated_data['priority'],
+            )
+        
+        exec_status = execution_status(result)
         
         # Save to history
         snippet = None
@@ -55,8 +346,13 @@ class ExecutionViewSet(viewsets.ViewSet):
             except CodeSnippet.DoesNotExist:
                 pass
         
-        execution = ExecutionHistory.objects.create(
-            user=request.user,
+        # A benchmark is one history row, but every run counts as an execution
+        runs = 1
+        if benchmark and result.get('benchmark'):
+            runs = max(1, result['benchmark']['executed_runs'])
+        execution = record_execution(
+            request.user,
+            runs=runs,
             snippet=snippet,
             code=code,
             language=language,
@@ -68,7 +364,7 @@ class ExecutionViewSet(viewsets.ViewSet):
             execution_time=result.get('execution_time', 0),
         )
         
-        return Response({
+        data = {
             'id': execution.id,
             'stdout': result['stdout'],
             'stderr': result['stderr'],
@@ -77,7 +373,12 @@ class ExecutionViewSet(viewsets.ViewSet):
             'timeout': result['timeout'],
             'error': result['error'],
             'execution_time': result.get('execution_time', 0),
-        }, status=status.HTTP_200_OK)
+        }
+        if profile:
+            data['profile'] = result.get('profile')
+        if benchmark:
+            data['benchmark'] = result.get('benchmark')
+        return Response(data, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
     def history(self, request):
@@ -88,5 +389,112 @@ class ExecutionViewSet(viewsets.ViewSet):
         if language:
             executions = executions.filter(language=language)
         
-        serializer = ExecutionHistorySerializer(executions, many=True)
-        return Response(serializer.data)
+        # Rows still waiting in the write-behind queue come first, without an id
+        pending = [
+            execution for execution in pending_executions(request.user.pk)
+            if not language or execution.language == language
+        ]
+        return Response([*ExecutionHistorySerializer(pending, many=True).data, *execution_rows.serialize(executions)])
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the full execution history as JSON Lines or CSV."""
+        serializer = ExportRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        options = serializer.validated_data
+        queryset = export_queryset(
+            user=request.user,
+            language=options.get('language'),
+            since=options.get('since'),
+            until=options.get('until'),
+        )
+        export_format = options['output']
+        compress = options['gzip']
+        response = StreamingHttpResponse(
+            stream_export(queryset, options.get('columns'), export_format, compress),
+            content_type='application/gzip' if compress else f'{CONTENT_TYPES[export_format]}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(export_format, compress)}"'
+        return response
+
+class SearchViewSet(viewsets.ViewSet):
+    """Ranked full-text search over the user's snippets and execution history."""
+    permission_classes = [IsAuthenticated]
+    
+    SEARCH_TYPES = {
+        'snippets': (CodeSnippet, snippet_rows),
+        'executions': (ExecutionHistory, execution_rows),
+    }
+    
+    def list(self, request):
+        """Search with ?q=...&type=snippets|executions&page=&page_size=."""
+        serializer = SearchRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        kind = serializer.validated_data['type']
+        page = serializer.validated_data['page']
+        page_size = serializer.validated_data['page_size']
+        total, matches = search.search(
+            kind,
+            serializer.validated_data['q'],
+            user_id=request.user.id,
+            offset=(page - 1) * page_size,
+            limit=page_size,
+        )
+        
+        model, rows = self.SEARCH_TYPES[kind]
+        objects = {row['id']: row for row in rows.serialize(model.objects.filter(pk__in=[pk for pk, rank in matches]))}
+        results = [{**objects[pk], 'rank': rank} for pk, rank in matches if pk in objects]
+        
+        return Response({
+            'count': total,
+            'page': page,
+            'page_size': page_size,
+            'results': results,
+        })
+
+class GalleryViewSet(viewsets.ViewSet):
+    """Public snippet gallery served from the precomputed popularity ranking."""
+    permission_classes = [IsAuthenticated]
+    
+    def list(self, request):
+        """List public snippets with ?language=&ordering=popular|recent&page=&page_size=."""
+        serializer = GalleryRequestSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        params = serializer.validated_data
+        ranking = get_gallery_ranking()
+        etag = gallery_etag(ranking, *sorted(params.items()))
+        not_modified = conditional_response(request, etag, ranking['last_modified'])
+        if not_modified is not None:
+            return not_modified
+        
+        entries = list_gallery(ranking, params.get('language'), params['ordering'])
+        offset = (params['page'] - 1) * params['page_size']
+        response = Response({
+            'count': len(entries),
+            'page': params['page'],
+            'page_size': params['page_size'],
+            'generated_at': ranking['generated_at'],
+            'results': entries[offset:offset + params['page_size']],
+        })
+        return set_validators(response, etag, ranking['last_modified'])
+    
+    def retrieve(self, request, pk=None):
+        """Get a public snippet, answering 304 from updated_at alone when unchanged."""
+        updated_at = CodeSnippet.objects.filter(pk=pk, is_public=True).values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        etag = snippet_etag(pk, updated_at)
+        not_modified = conditional_response(request, etag, updated_at)
+        if not_modified is not None:
+            return not_modified
+        
+        snippet = get_object_or_404(CodeSnippet.objects.select_related('user'), pk=pk, is_public=True)
+        response = Response(PublicSnippetSerializer(snippet).data)
+        return set_validators(response, etag, updated_at)
@@ -0,0 +1,67 @@
+"""Compression of API responses.
+
+``CompressionMiddleware`` compresses JSON and MessagePack responses of at
+least ``RESPONSE_COMPRESSION_MIN_BYTES`` bytes. It uses brotli when the
+client accepts it and the ``brotli`` package is installed, and gzip
+otherwise. HTML pages are left alone, since compressing pages that carry a
+CSRF token opens them to BREACH. Static files are compressed ahead of time
+by WhiteNoise. Streaming responses, such as exports, are not compressed
+here: they compress themselves with ``?gzip=true``.
+
+Like Django's GZipMiddleware, a compressed response's strong ETag becomes
+weak, because the bytes differ from the uncompressed representation.
+"""
+
+import gzip
+import re
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/msgpack')
+
+def _accepts(request, coding):
+    return re.search(rf'\b{coding}\b', request.META.get('HTTP_ACCEPT_ENCODING', '')) is not None
+
+def _compress(content, coding):
+    if coding == 'br':
+        return brotli.compress(content, quality=settings.RESPONSE_BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical content
+    return gzip.compress(content, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0)
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if response.get('Content-Type', '').split(';')[0].strip() not in COMPRESSIBLE_TYPES:
+            return response
+
+        # The body depends on Accept-Encoding even when it is sent uncompressed
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.RESPONSE_COMPRESSION_MIN_BYTES:
+            return response
+        if brotli is not None and _accepts(request, 'br'):
+            coding = 'br'
+        elif _accepts(request, 'gzip'):
+            coding = 'gzip'
+        else:
+            return response
+
+        compressed = _compress(response.content, coding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = coding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
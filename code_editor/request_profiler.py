@@ -0,0 +1,165 @@
+"""Per-request timing breakdown for slow or sampled requests.
+
+``RequestProfilerMiddleware`` times every request and keeps a record of
+those slower than ``REQUEST_PROFILE_THRESHOLD_MS`` plus a random
+``REQUEST_PROFILE_SAMPLE_RATE`` fraction of the rest. Each record splits
+the request into view, template/response rendering, database queries,
+sandbox execution and signal handlers. Code outside the middleware marks
+its sections with ``track``:
+
+    with track('sandbox'):
+        ...
+
+Sections overlap: queries issued by a signal handler count towards both
+``db`` and ``signals``, and all of them fall inside ``view``.
+
+Records are kept in a ring buffer of ``REQUEST_PROFILE_BUFFER_SIZE``
+slots in the default cache and shown at ``/admin/request-profiles/``. With
+a shared cache (file or redis) the buffer collects every worker's requests;
+on locmem each worker only sees its own.
+"""
+
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+MAX_SQL_LENGTH = 1000
+SEQUENCE_KEY = 'request-profiles:sequence'
+
+_state = threading.local()
+
+def _slot_key(slot):
+    return f'request-profiles:{slot}'
+
+def _current():
+    return getattr(_state, 'profile', None)
+
+@contextmanager
+def track(section):
+    """Add the time spent in the block to a section of the current request's profile."""
+    profile = _current()
+    # Nested blocks of the same section (a signal fired from a signal) count once
+    if profile is None or section in profile.active:
+        yield
+        return
+    profile.active.add(section)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.sections[section] = profile.sections.get(section, 0.0) + time.perf_counter() - start
+        profile.active.discard(section)
+
+class RequestProfile:
+    """Timings collected while one request is handled."""
+
+    def __init__(self):
+        self.sections = {}
+        self.active = set()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.slowest_sql = ''
+        self.slowest_query_time = 0.0
+        self.view_name = ''
+        self.view_start = None
+        self.view_end = None
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.query_count += 1
+            self.query_time += elapsed
+            if elapsed >= self.slowest_query_time:
+                self.slowest_query_time = elapsed
+                self.slowest_sql = sql[:MAX_SQL_LENGTH]
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+def store_record(record):
+    """Write a record over the oldest slot of the ring buffer."""
+    cache.add(SEQUENCE_KEY, 0, None)
+    sequence = cache.incr(SEQUENCE_KEY)
+    cache.set(_slot_key(sequence % settings.REQUEST_PROFILE_BUFFER_SIZE), record, None)
+
+def get_records():
+    """Captured request profiles, newest first."""
+    keys = [_slot_key(slot) for slot in range(settings.REQUEST_PROFILE_BUFFER_SIZE)]
+    return sorted(cache.get_many(keys).values(), key=lambda record: record['timestamp'], reverse=True)
+
+def clear_records():
+    """Empty the ring buffer."""
+    cache.delete_many([SEQUENCE_KEY] + [_slot_key(slot) for slot in range(settings.REQUEST_PROFILE_BUFFER_SIZE)])
+
+class RequestProfilerMiddleware:
+    """Capture timing breakdowns of slow and sampled requests."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_PROFILING:
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        _state.profile = profile
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.record_query))
+                response = self.get_response(request)
+        finally:
+            _state.profile = None
+        end = time.perf_counter()
+
+        if _ms(end - start) >= settings.REQUEST_PROFILE_THRESHOLD_MS:
+            self.save(request, response, profile, start, end, 'slow')
+        elif random.random() < settings.REQUEST_PROFILE_SAMPLE_RATE:
+            self.save(request, response, profile, start, end, 'sampled')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current()
+        if profile is not None:
+            profile.view_name = request.resolver_match.view_name if request.resolver_match else ''
+            profile.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called once the view has returned and before the response is rendered
+        profile = _current()
+        if profile is not None:
+            profile.view_end = time.perf_counter()
+        return response
+
+    def save(self, request, response, profile, start, end, reason):
+        view_end = profile.view_end or end
+        view_time = view_end - profile.view_start if profile.view_start else 0.0
+        user = getattr(request, 'user', None)
+        record = {
+            'timestamp': timezone.now(),
+            'method': request.method,
+            'path': request.path,
+            'view': profile.view_name,
+            'status': response.status_code,
+            'user': user.get_username() if user is not None and user.is_authenticated else '',
+            'reason': reason,
+            'total_ms': _ms(end - start),
+            'view_ms': _ms(view_time),
+            'render_ms': _ms(end - profile.view_end) if profile.view_end else 0.0,
+            'db_queries': profile.query_count,
+            'db_ms': _ms(profile.query_time),
+            'slowest_sql': profile.slowest_sql,
+            'slowest_sql_ms': _ms(profile.slowest_query_time),
+            'sandbox_ms': _ms(profile.sections.get('sandbox', 0.0)),
+            'signals_ms': _ms(profile.sections.get('signals', 0.0)),
+        }
+        store_record(record)
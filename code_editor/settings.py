@@ -11,7 +11,6 @@ DEBUG = os.getenv('DEBUG', 'True') == 'True'
 ALLOWED_HOSTS = ['*']
 
 INSTALLED_APPS = [
-    'daphne',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -25,9 +24,17 @@ INSTALLED_APPS = [
     'api',
 ]
 
+# daphne only provides the ASGI runserver, and importing it pulls in Twisted,
+# so it is only installed on request
+if os.getenv('ASGI_RUNSERVER', 'False') == 'True':
+    INSTALLED_APPS.insert(0, 'daphne')
+
 MIDDLEWARE = [
+    # First, so request totals include every other middleware
+    'code_editor.request_profiler.RequestProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'code_editor.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -65,6 +72,84 @@ DATABASES = {
     }
 }
 
+# Cache settings
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', '300'))
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'codestudio',
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', str(BASE_DIR / 'cache')),
+    },
+    # Requires the optional ``redis`` package
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+CACHES = {
+    'default': {
+        **CACHE_BACKENDS[CACHE_BACKEND],
+        'TIMEOUT': CACHE_TIMEOUT,
+        'KEY_PREFIX': 'codestudio',
+    }
+}
+
+# Per-user profile/history fragments, invalidated by editor signals
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', '600'))
+
+# Public gallery ranking is rebuilt at most once per interval, and lists at
+# most GALLERY_MAX_SNIPPETS snippets per language filter and ordering
+GALLERY_REFRESH_INTERVAL = int(os.getenv('GALLERY_REFRESH_INTERVAL', '300'))
+GALLERY_MAX_SNIPPETS = int(os.getenv('GALLERY_MAX_SNIPPETS', '500'))
+
+# Snippet revisions store a full copy every N revisions and deltas in between
+SNIPPET_KEYFRAME_INTERVAL = int(os.getenv('SNIPPET_KEYFRAME_INTERVAL', '20'))
+
+# Bulk snippet import: snippets and uncompressed bytes per archive, rows per insert
+SNIPPET_IMPORT_MAX_SNIPPETS = int(os.getenv('SNIPPET_IMPORT_MAX_SNIPPETS', '1000'))
+SNIPPET_IMPORT_MAX_BYTES = int(os.getenv('SNIPPET_IMPORT_MAX_BYTES', str(20 * 1024 * 1024)))
+SNIPPET_IMPORT_BATCH_SIZE = int(os.getenv('SNIPPET_IMPORT_BATCH_SIZE', '200'))
+
+# Admin changelists on large tables count at most this many rows, and show an
+# estimate for unfiltered tables larger than this
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+
+# Rows fetched per database round trip when streaming execution exports
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
+# Write-behind execution history: rows are spooled to HISTORY_SPOOL_DIR and
+# bulk-inserted every HISTORY_FLUSH_INTERVAL seconds or HISTORY_BATCH_SIZE
+# rows. Past HISTORY_QUEUE_MAX waiting rows, writes are synchronous again.
+# HISTORY_SPOOL_FSYNC makes spooled rows survive power loss, not just crashes.
+HISTORY_WRITE_BEHIND = os.getenv('HISTORY_WRITE_BEHIND', 'False') == 'True'
+HISTORY_SPOOL_DIR = Path(os.getenv('HISTORY_SPOOL_DIR', str(BASE_DIR / 'history_spool')))
+HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', '500'))
+HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', '1'))
+HISTORY_QUEUE_MAX = int(os.getenv('HISTORY_QUEUE_MAX', '5000'))
+HISTORY_SPOOL_FSYNC = os.getenv('HISTORY_SPOOL_FSYNC', 'False') == 'True'
+
+# Sessions: db, cache, cached_db or signed_cookies. Cached sessions and the
+# user cache need a cache shared by all workers, or a logout or password
+# change in one worker does not reach the others, so they are off by default
+# on locmem (and gunicorn.conf.py refuses to start several workers with them)
+SHARED_CACHE = CACHE_BACKEND != 'locmem'
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.getenv(
+    'SESSION_BACKEND', 'cached_db' if SHARED_CACHE else 'db'
+)
+
+# Cache authenticated user lookups so each request skips the auth_user query
+USER_CACHE = os.getenv('USER_CACHE', str(SHARED_CACHE)) == 'True'
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend' if USER_CACHE else 'django.contrib.auth.backends.ModelBackend'
+]
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', '3600'))
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -93,8 +178,26 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.OrJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'api.renderers.MessagePackRenderer',
+    ],
 }
 
+# Web and executor processes warm up before accepting traffic (code_editor/warmup.py):
+# URL resolvers, templates, a few anonymous requests, connections and, with
+# WARMUP_TOOLCHAINS, one run of each installed language
+WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'True') == 'True'
+WARMUP_TOOLCHAINS = os.getenv('WARMUP_TOOLCHAINS', 'True') == 'True'
+WARMUP_PATHS = [path for path in os.getenv('WARMUP_PATHS', '/accounts/login/,/api/snippets/').split(',') if path]
+
+# JSON and MessagePack responses of at least RESPONSE_COMPRESSION_MIN_BYTES
+# are compressed, with brotli if the brotli package is installed
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.getenv('RESPONSE_COMPRESSION_MIN_BYTES', '1024'))
+RESPONSE_GZIP_LEVEL = int(os.getenv('RESPONSE_GZIP_LEVEL', '6'))
+RESPONSE_BROTLI_QUALITY = int(os.getenv('RESPONSE_BROTLI_QUALITY', '5'))
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:8000',
     'http://127.0.0.1:8000',
@@ -105,6 +208,66 @@ EXECUTION_TIMEOUT = int(os.getenv('EXECUTION_TIMEOUT', '10'))
 MAX_MEMORY_MB = int(os.getenv('MAX_MEMORY_MB', '256'))
 MAX_OUTPUT_SIZE = int(os.getenv('MAX_OUTPUT_SIZE', '10000'))
 TEMP_DIR = BASE_DIR / 'temp_executions'
+# Run Python and JavaScript from an in-memory file instead of a file in TEMP_DIR (Linux)
+EXECUTION_IN_MEMORY = os.getenv('EXECUTION_IN_MEMORY', 'True') == 'True'
+# Reject syntax errors before starting a sandbox; the node checker gets this many seconds per check
+SYNTAX_PRECHECK = os.getenv('SYNTAX_PRECHECK', 'True') == 'True'
+SYNTAX_PRECHECK_TIMEOUT = float(os.getenv('SYNTAX_PRECHECK_TIMEOUT', '2'))
+# Limits on multi-file projects; their build workspaces are kept under TEMP_DIR/projects
+PROJECT_MAX_FILES = int(os.getenv('PROJECT_MAX_FILES', '50'))
+PROJECT_MAX_BYTES = int(os.getenv('PROJECT_MAX_BYTES', str(1024 * 1024)))
+
+# Execution backend: 'local' runs code on the web host, 'remote' sends it to
+# executor daemons (python manage.py run_executor) listed in EXECUTOR_NODES,
+# e.g. "tcp://10.0.0.5:9001,unix:///run/executor.sock"
+EXECUTOR_BACKEND = os.getenv('EXECUTOR_BACKEND', 'local')
+EXECUTOR_NODES = [node.strip() for node in os.getenv('EXECUTOR_NODES', '').split(',') if node.strip()]
+EXECUTOR_NODE_CAPACITY = int(os.getenv('EXECUTOR_NODE_CAPACITY', '4'))
+EXECUTOR_CONNECT_TIMEOUT = float(os.getenv('EXECUTOR_CONNECT_TIMEOUT', '2'))
+EXECUTOR_RETRY_INTERVAL = float(os.getenv('EXECUTOR_RETRY_INTERVAL', '5'))
+EXECUTOR_QUEUE_TIMEOUT = float(os.getenv('EXECUTOR_QUEUE_TIMEOUT', '5'))
+# Shared by the web tier and the daemons, which run nothing without it
+EXECUTOR_SECRET = os.getenv('EXECUTOR_SECRET', '')
+
+# Cores reserved for user code, e.g. '2,3,4,5'. Each local run is pinned to
+# SANDBOX_CPUS_PER_RUN of them, web processes stay off them, and runs wait up
+# to SANDBOX_CPU_WAIT_TIMEOUT seconds for a free core. Empty disables pinning.
+# The wait happens inside the web request, so the wait plus EXECUTION_TIMEOUT
+# (or BENCHMARK_TIME_LIMIT) must stay under the gunicorn worker timeout,
+# which gunicorn.conf.py derives from these settings
+SANDBOX_CPUS = [int(cpu) for cpu in os.getenv('SANDBOX_CPUS', '').split(',') if cpu.strip()]
+SANDBOX_CPUS_PER_RUN = int(os.getenv('SANDBOX_CPUS_PER_RUN', '1'))
+SANDBOX_CPU_WAIT_TIMEOUT = float(os.getenv('SANDBOX_CPU_WAIT_TIMEOUT', '5'))
+
+# Sandbox scheduling, shared by every process on the host: at most one run
+# per reserved core set, or SCHEDULER_CONCURRENCY runs when no cores are
+# reserved (0 turns the limit and the queue off). Runs that find no free slot
+# queue shortest-expected-job-first; waiting lowers a run's key by
+# SCHEDULER_AGING seconds per second, and batch runs start
+# SCHEDULER_BATCH_OFFSET seconds behind interactive ones.
+SCHEDULER_CONCURRENCY = int(os.getenv('SCHEDULER_CONCURRENCY', str(os.cpu_count() or 1)))
+SCHEDULER_AGING = float(os.getenv('SCHEDULER_AGING', '1'))
+SCHEDULER_BATCH_OFFSET = float(os.getenv('SCHEDULER_BATCH_OFFSET', '30'))
+SCHEDULER_HISTORY_WINDOW = int(os.getenv('SCHEDULER_HISTORY_WINDOW', '10'))
+SCHEDULER_DEFAULT_RUNTIME = float(os.getenv('SCHEDULER_DEFAULT_RUNTIME', '1'))
+SCHEDULER_DEFAULTS_TTL = int(os.getenv('SCHEDULER_DEFAULTS_TTL', '300'))
+
+# Benchmark mode: cap on warm-up + measured runs, wall-clock limit for the
+# whole benchmark, and optional isolated CPUs to pin runs to (e.g. "3" or "2,3").
+# A run is only started if it would end within the limit at EXECUTION_TIMEOUT.
+# Benchmarks run inside the web request, so the limit plus
+# SANDBOX_CPU_WAIT_TIMEOUT must fit in the gunicorn worker timeout
+BENCHMARK_MAX_RUNS = int(os.getenv('BENCHMARK_MAX_RUNS', '50'))
+BENCHMARK_TIME_LIMIT = float(os.getenv('BENCHMARK_TIME_LIMIT', '20'))
+BENCHMARK_CPUS = [int(cpu) for cpu in os.getenv('BENCHMARK_CPUS', '').split(',') if cpu.strip()]
+
+# Request profiling: keep a timing breakdown of every request slower than the
+# threshold plus a random sample of the rest, in a ring buffer in the default
+# cache (per process on locmem)
+REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', 'True') == 'True'
+REQUEST_PROFILE_THRESHOLD_MS = float(os.getenv('REQUEST_PROFILE_THRESHOLD_MS', '1000'))
+REQUEST_PROFILE_SAMPLE_RATE = float(os.getenv('REQUEST_PROFILE_SAMPLE_RATE', '0'))
+REQUEST_PROFILE_BUFFER_SIZE = int(os.getenv('REQUEST_PROFILE_BUFFER_SIZE', '200'))
 
 # Ensure temp directory exists
 TEMP_DIR.mkdir(exist_ok=True)
@@ -113,5 +276,9 @@ LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'login'
 
-# WhiteNoise configuration
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# WhiteNoise configuration: collectstatic writes content-hashed, precompressed
+# copies, which WhiteNoise serves with immutable cache headers
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
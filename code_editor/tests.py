@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from . import warmup
+from .request_profiler import clear_records, get_records
+
+# The test runner turns DEBUG off and nothing has been collected, so pages
+# that render {% static %} use the source files instead of the manifest
+SOURCE_STATICFILES = {
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+@override_settings(STORAGES=SOURCE_STATICFILES)
+class RequestProfilerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_records()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+
+    @override_settings(REQUEST_PROFILE_SAMPLE_RATE=0, REQUEST_PROFILE_THRESHOLD_MS=0)
+    def test_slow_request_breakdown(self):
+        self.client.post('/api/execution/execute/', {
+            'code': 'print(1)', 'language': 'python',
+        }, content_type='application/json')
+        record = get_records()[0]
+        self.assertEqual(record['path'], '/api/execution/execute/')
+        self.assertEqual(record['reason'], 'slow')
+        self.assertGreater(record['sandbox_ms'], 0)
+        self.assertGreater(record['signals_ms'], 0)
+        self.assertGreater(record['db_queries'], 0)
+        self.assertTrue(record['slowest_sql'])
+        self.assertGreaterEqual(record['total_ms'], record['view_ms'])
+
+    @override_settings(REQUEST_PROFILE_SAMPLE_RATE=0, REQUEST_PROFILE_THRESHOLD_MS=60000)
+    def test_fast_request_not_captured(self):
+        self.client.get('/api/snippets/')
+        self.assertEqual(get_records(), [])
+
+    @override_settings(REQUEST_PROFILE_SAMPLE_RATE=1, REQUEST_PROFILE_THRESHOLD_MS=60000)
+    def test_sampled_request_captured(self):
+        self.client.get('/api/snippets/')
+        self.assertEqual(get_records()[0]['reason'], 'sampled')
+
+    def test_admin_page_is_staff_only(self):
+        response = self.client.get('/admin/request-profiles/')
+        self.assertEqual(response.status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/admin/request-profiles/')
+        self.assertContains(response, 'Request profiles')
+        self.assertContains(response, 'worker that served this page only')
+
+    @override_settings(REQUEST_PROFILE_BUFFER_SIZE=2, REQUEST_PROFILE_SAMPLE_RATE=1, REQUEST_PROFILE_THRESHOLD_MS=60000)
+    def test_ring_buffer_keeps_newest(self):
+        for path in ['/api/snippets/', '/api/projects/', '/api/execution/history/']:
+            self.client.get(path)
+        self.assertEqual([record['path'] for record in get_records()], ['/api/execution/history/', '/api/projects/'])
+
+@override_settings(STORAGES=SOURCE_STATICFILES)
+class WarmupTests(TestCase):
+    @override_settings(WARMUP_TOOLCHAINS=False)
+    def test_warm_up_steps_succeed(self):
+        with self.assertNoLogs('code_editor.warmup', level='ERROR'):
+            timings = warmup.warm_up_process()
+            timings.update(warmup.warm_up_worker())
+        self.assertEqual(list(timings)[:3], ['urls', 'templates', 'requests'])
+        self.assertIn('database', timings)
+        self.assertIn('warm-up took', warmup.describe(timings))
+
+    def test_templates_compiled(self):
+        self.assertGreater(warmup.load_templates(), 0)
+
+    def test_daphne_is_opt_in(self):
+        self.assertNotIn('daphne', settings.INSTALLED_APPS)
@@ -4,10 +4,12 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView, RedirectView
 from django.contrib.auth.decorators import login_required
+from .views import request_profiles
 
 urlpatterns = [
     path('', RedirectView.as_view(url='home/', permanent=False), name='index'),
     path('home/', login_required(TemplateView.as_view(template_name='home.html')), name='home'),
+    path('admin/request-profiles/', admin.site.admin_view(request_profiles), name='request_profiles'),
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('editor/', include('editor.urls')),
@@ -0,0 +1,31 @@
+"""Project-level views."""
+
+from django.conf import settings
+from django.contrib import admin
+from django.shortcuts import redirect, render
+from executor.cpus import get_cpu_stats
+from executor.precheck import get_precheck_stats
+from .request_profiler import clear_records, get_records
+
+def request_profiles(request):
+    """Staff page listing captured request profiles, newest first."""
+    if request.method == 'POST':
+        clear_records()
+        return redirect('request_profiles')
+    
+    records = get_records()
+    path = request.GET.get('path', '')
+    if path:
+        records = [record for record in records if record['path'].startswith(path)]
+    
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'records': records,
+        'path': path,
+        'precheck_stats': get_precheck_stats(),
+        'cpu_stats': get_cpu_stats(),
+        # On locmem, stats and records only cover the worker serving this page
+        'shared_cache': settings.SHARED_CACHE,
+    }
+    return render(request, 'admin/request_profiles.html', context)
@@ -0,0 +1,128 @@
+"""Warm-up of web and executor processes before they accept traffic.
+
+A new process pays on its first requests for work that does not depend on
+the request: lazily imported modules, URL resolver and template compilation,
+database and cache connections, starting the JavaScript syntax checker and
+the first launch of each interpreter. These steps are split into two parts:
+
+- ``warm_up_process`` can be shared. Under gunicorn with ``preload_app``
+  it runs once in the master, and the forked workers share the result
+  copy-on-write.
+- ``warm_up_worker`` must run in every process after the fork. Connections
+  and the checker's pipes cannot be shared between processes.
+
+``gunicorn.conf.py`` and ``run_executor`` call them when ``WARMUP_ON_START``
+is on.
+"""
+
+import logging
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template import engines
+from django.test import Client
+from django.urls import get_resolver
+from executor.languages import LANGUAGES
+from executor.precheck import check_javascript, check_python
+from executor.sandbox import Sandbox
+
+logger = logging.getLogger(__name__)
+
+# Smallest valid program per language, run once to load each toolchain
+WARMUP_PROGRAMS = {
+    'python': 'pass\n',
+    'javascript': '\n',
+    'java': 'public class Main {\n    public static void main(String[] args) {}\n}\n',
+}
+
+@contextmanager
+def _step(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        # A failed step only leaves that work to the first request
+        logger.exception('Warm-up step %s failed', name)
+    finally:
+        timings[name] = time.perf_counter() - start
+
+def load_templates():
+    """Compile the project's templates into the cached template loader."""
+    count = 0
+    base_dir = Path(settings.BASE_DIR).resolve()
+    for backend in engines.all():
+        for directory in backend.template_dirs:
+            directory = Path(directory).resolve()
+            # Admin and other third-party templates are left to their first use
+            if base_dir not in directory.parents or 'site-packages' in directory.parts:
+                continue
+            for path in directory.rglob('*.html'):
+                backend.get_template(path.relative_to(directory).as_posix())
+                count += 1
+    return count
+
+def send_requests():
+    """Send anonymous requests through the full middleware and DRF stack."""
+    host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost')
+    client = Client(HTTP_HOST=host)
+    # Anonymous API requests are refused, which is expected here
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    try:
+        for path in settings.WARMUP_PATHS:
+            client.get(path)
+    finally:
+        request_logger.setLevel(level)
+
+def prime_toolchains():
+    """Run the smallest program of each installed language once."""
+    # Caches whether the sandbox python matches this one
+    check_python('pass\n')
+    for language, code in WARMUP_PROGRAMS.items():
+        if shutil.which(LANGUAGES[language]['command']):
+            Sandbox().execute(code, language)
+
+def warm_up_process():
+    """Do the warm-up that forked workers can share. Returns seconds per step."""
+    timings = {}
+    with _step(timings, 'urls'):
+        resolver = get_resolver()
+        resolver.reverse_dict
+    with _step(timings, 'templates'):
+        load_templates()
+    with _step(timings, 'requests'):
+        send_requests()
+    if settings.WARMUP_TOOLCHAINS:
+        with _step(timings, 'toolchains'):
+            prime_toolchains()
+    return timings
+
+def warm_up_worker():
+    """Do the warm-up each process needs for itself. Returns seconds per step."""
+    timings = {}
+    with _step(timings, 'database'):
+        for connection in connections.all():
+            connection.ensure_connection()
+    with _step(timings, 'cache'):
+        for cache in caches.all():
+            cache.get('warmup')
+    if settings.SYNTAX_PRECHECK:
+        with _step(timings, 'precheck'):
+            # Starts the long-lived node checker
+            check_javascript('\n')
+    return timings
+
+def close_connections():
+    """Close what warm_up_process opened, so no connection is inherited across fork."""
+    connections.close_all()
+    caches.close_all()
+
+def describe(timings):
+    """One-line summary of warm-up timings, for startup logs."""
+    steps = ', '.join(f'{name} {seconds * 1000:.0f}ms' for name, seconds in timings.items())
+    return f'warm-up took {sum(timings.values()) * 1000:.0f}ms ({steps})'
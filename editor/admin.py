@@ -1,11 +1,29 @@
+import copy
+from datetime import date, datetime
 from django.contrib import admin
-from .models import CodeSnippet, ExecutionHistory, UserProfile
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.utils import timezone
+from .models import CodeSnippet, ExecutionHistory, Project, ProjectFile, UserProfile
+from . import search
+from .pagination import AFTER_VAR, BEFORE_VAR, LargeTablePaginator
+
+class FullTextSearchMixin:
+    """Route admin search on large text fields through the full-text index."""
+    search_index = None
+    
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        matches = search.matching_ids(self.search_index, search_term)
+        if matches is not None:
+            results |= queryset.filter(pk__in=matches)
+        return results, may_have_duplicates
 
 @admin.register(CodeSnippet)
-class CodeSnippetAdmin(admin.ModelAdmin):
+class CodeSnippetAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('title', 'user', 'language', 'created_at', 'is_public')
     list_filter = ('language', 'is_public', 'created_at')
-    search_fields = ('title', 'user__username', 'code')
+    search_fields = ('title', 'user__username')
+    search_index = 'snippets'
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
         ('Basic Info', {'fields': ('user', 'title', 'description', 'language')}),
@@ -14,11 +32,126 @@ class CodeSnippetAdmin(admin.ModelAdmin):
         ('Timestamps', {'fields': ('created_at', 'updated_at')}),
     )
 
+class LanguageListFilter(admin.SimpleListFilter):
+    """Language filter with fixed choices, instead of a DISTINCT over the whole table."""
+    title = 'language'
+    parameter_name = 'language'
+    
+    def lookups(self, request, model_admin):
+        return CodeSnippet.LANGUAGE_CHOICES
+    
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(language=self.value())
+        return queryset
+
+class CreatedAtListFilter(admin.SimpleListFilter):
+    """
+    Year and month drill-down on created_at.
+    
+    Unlike date_hierarchy, which lists the years with a DISTINCT over every
+    row, the choices come from the first and last timestamps and each choice
+    filters on a range, so both use the created_at index.
+    """
+    title = 'created'
+    parameter_name = 'created'
+    
+    def lookups(self, request, model_admin):
+        queryset = model_admin.get_queryset(request).values_list('created_at', flat=True)
+        first = queryset.order_by('created_at').first()
+        last = queryset.order_by('-created_at').first()
+        if first is None:
+            return []
+        first, last = timezone.localtime(first), timezone.localtime(last)
+        choices = []
+        selected = self.period()
+        for year in range(last.year, first.year - 1, -1):
+            choices.append((str(year), str(year)))
+            if selected and selected[0].year == year:
+                # Expand the selected year into its months
+                for month in range(12, 0, -1):
+                    if (first.year, first.month) <= (year, month) <= (last.year, last.month):
+                        choices.append((f'{year}-{month:02d}', date(year, month, 1).strftime('%B %Y')))
+        return choices
+    
+    def period(self):
+        """(start, end) of the selected 'YYYY' or 'YYYY-MM', or None."""
+        value = self.value() or ''
+        try:
+            if len(value) == 4:
+                start = datetime(int(value), 1, 1)
+                end = datetime(start.year + 1, 1, 1)
+            elif len(value) == 7:
+                start = datetime(int(value[:4]), int(value[5:]), 1)
+                end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+            else:
+                return None
+        except ValueError:
+            return None
+        return timezone.make_aware(start), timezone.make_aware(end)
+    
+    def queryset(self, request, queryset):
+        period = self.period()
+        if period:
+            return queryset.filter(created_at__gte=period[0], created_at__lt=period[1])
+        return queryset
+
+def _cursor(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class ExecutionHistoryChangeList(ChangeList):
+    """Changelist paged by ``after``/``before`` id cursors instead of page numbers."""
+    # Code and output can be large; the list only shows short columns
+    deferred_fields = ('code', 'stdin', 'stdout', 'stderr')
+    
+    def __init__(self, request, *args, **kwargs):
+        self.after = _cursor(request.GET.get(AFTER_VAR))
+        self.before = _cursor(request.GET.get(BEFORE_VAR))
+        # Cursors are not lookups, and changing the filters or search starts
+        # again from the newest rows
+        query = request.GET.copy()
+        for name in (AFTER_VAR, BEFORE_VAR, PAGE_VAR):
+            query.pop(name, None)
+        request = copy.copy(request)
+        request.GET = query
+        super().__init__(request, *args, **kwargs)
+    
+    def get_queryset(self, request, exclude_parameters=None):
+        return super().get_queryset(request, exclude_parameters).defer(*self.deferred_fields)
+    
+    def get_results(self, request):
+        self.paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+        self.page = self.paginator.page(after=self.after, before=self.before)
+        self.result_list = self.page.object_list
+        self.result_count = self.paginator.count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.full_result_count = self.root_queryset.count() if self.show_full_result_count else None
+        self.show_admin_actions = not self.show_full_result_count or bool(self.full_result_count)
+        self.can_show_all = False
+        self.multi_page = self.page.has_next or self.page.has_previous
+    
+    def previous_page_url(self):
+        return self.get_query_string({BEFORE_VAR: self.page.previous_cursor})
+    
+    def next_page_url(self):
+        return self.get_query_string({AFTER_VAR: self.page.next_cursor})
+
 @admin.register(ExecutionHistory)
-class ExecutionHistoryAdmin(admin.ModelAdmin):
+class ExecutionHistoryAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ('user', 'language', 'status', 'execution_time', 'created_at')
-    list_filter = ('language', 'status', 'created_at')
-    search_fields = ('user__username', 'code')
+    list_filter = (LanguageListFilter, 'status', CreatedAtListFilter)
+    list_select_related = ('user',)
+    # The primary key follows creation order and needs no sort
+    ordering = ('-id',)
+    sortable_by = ()
+    paginator = LargeTablePaginator
+    show_full_result_count = False
+    raw_id_fields = ('user', 'snippet')
+    search_fields = ('user__username',)
+    search_index = 'executions'
     readonly_fields = ('created_at', 'code', 'stdin', 'stdout', 'stderr')
     fieldsets = (
         ('Execution Info', {'fields': ('user', 'snippet', 'language', 'status')}),
@@ -26,6 +159,23 @@ class ExecutionHistoryAdmin(admin.ModelAdmin):
         ('Output', {'fields': ('stdout', 'stderr', 'returncode')}),
         ('Performance', {'fields': ('execution_time', 'created_at')}),
     )
+    
+    def get_changelist(self, request, **kwargs):
+        return ExecutionHistoryChangeList
+
+class ProjectFileInline(admin.TabularInline):
+    model = ProjectFile
+    extra = 0
+    fields = ('path', 'content', 'content_hash', 'updated_at')
+    readonly_fields = ('content_hash', 'updated_at')
+
+@admin.register(Project)
+class ProjectAdmin(admin.ModelAdmin):
+    list_display = ('name', 'user', 'language', 'entry_point', 'updated_at')
+    list_filter = ('language', 'updated_at')
+    search_fields = ('name', 'user__username')
+    readonly_fields = ('created_at', 'updated_at')
+    inlines = (ProjectFileInline,)
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
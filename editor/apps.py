@@ -6,3 +6,5 @@ class EditorConfig(AppConfig):
     
     def ready(self):
         import editor.signals
+        from executor.cpus import reserve_for_sandboxes
+        reserve_for_sandboxes()
@@ -0,0 +1,193 @@
+"""Bulk snippet import and export as JSON Lines or zip archives.
+
+A JSONL archive holds one snippet per line::
+
+    {"title": "...", "description": "...", "language": "python", "code": "...", "is_public": false}
+
+A zip archive holds a ``snippets.jsonl`` manifest whose entries name their
+code file with ``"file"`` instead of carrying ``"code"``. A zip without a
+manifest imports every source file it contains, titled by file name, with
+the language taken from the extension.
+
+Imports bypass the per-row ``post_save`` handlers. ``import_snippets``
+does their work once per batch instead.
+"""
+
+import io
+import json
+import os
+import re
+import tempfile
+import zipfile
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from executor.languages import LANGUAGES
+from .models import CodeSnippet, SnippetRevision, UserProfile
+from .revisions import initial_revision
+from .utils import invalidate_user_fragments
+from . import search
+
+MANIFEST_NAME = 'snippets.jsonl'
+ARCHIVE_FIELDS = ('title', 'description', 'language', 'is_public')
+
+class ArchiveError(ValueError):
+    """An uploaded archive cannot be read."""
+
+def _language_for(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    for code, language in LANGUAGES.items():
+        if language['extension'] == extension:
+            return code
+    return None
+
+def _parse_jsonl(text):
+    records = []
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            raise ArchiveError(f'Line {number} is not valid JSON')
+        if not isinstance(record, dict):
+            raise ArchiveError(f'Line {number} is not a JSON object')
+        records.append(record)
+    return records
+
+class _MemberReader:
+    """Reads zip members against one decompressed-size budget for the whole archive."""
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.remaining = settings.SNIPPET_IMPORT_MAX_BYTES
+
+    def read(self, info):
+        # Read one byte past the budget so a lying header cannot inflate past it
+        data = self.archive.open(info).read(self.remaining + 1)
+        if len(data) > self.remaining:
+            raise ArchiveError('Archive is too large')
+        self.remaining -= len(data)
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            raise ArchiveError(f'{info.filename} is not UTF-8 text')
+
+def _read_zip(fileobj):
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ArchiveError('Not a valid zip archive')
+
+    with archive:
+        members = {info.filename: info for info in archive.infolist() if not info.is_dir()}
+        if sum(info.file_size for info in members.values()) > settings.SNIPPET_IMPORT_MAX_BYTES:
+            raise ArchiveError('Archive is too large')
+        reader = _MemberReader(archive)
+
+        if MANIFEST_NAME not in members:
+            return [
+                {
+                    'title': os.path.splitext(os.path.basename(name))[0],
+                    'language': _language_for(name),
+                    'code': reader.read(info),
+                }
+                for name, info in sorted(members.items())
+                if _language_for(name)
+            ]
+
+        records = _parse_jsonl(reader.read(members[MANIFEST_NAME]))
+        if len(records) > settings.SNIPPET_IMPORT_MAX_SNIPPETS:
+            raise ArchiveError(f'Archive holds more than {settings.SNIPPET_IMPORT_MAX_SNIPPETS} snippets')
+        named = set()
+        for number, record in enumerate(records, 1):
+            if 'file' in record:
+                name = record.pop('file')
+                info = members.get(name) if isinstance(name, str) else None
+                if info is None:
+                    raise ArchiveError(f'Entry {number} names a file that is not in the archive')
+                # Each file is decompressed once; a repeated name could multiply one member's size
+                if name in named:
+                    raise ArchiveError(f'Entry {number} names a file already used by another entry')
+                named.add(name)
+                record['code'] = reader.read(info)
+        return records
+
+def read_archive(fileobj):
+    """
+    Read snippet records from an uploaded zip or JSONL file.
+
+    Raises ArchiveError if the archive is malformed, too large, or holds
+    more than SNIPPET_IMPORT_MAX_SNIPPETS snippets.
+    """
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        records = _read_zip(fileobj)
+    else:
+        fileobj.seek(0)
+        data = fileobj.read(settings.SNIPPET_IMPORT_MAX_BYTES + 1)
+        if len(data) > settings.SNIPPET_IMPORT_MAX_BYTES:
+            raise ArchiveError('Archive is too large')
+        try:
+            records = _parse_jsonl(data.decode('utf-8'))
+        except UnicodeDecodeError:
+            raise ArchiveError('Archive is not UTF-8 text')
+
+    if not records:
+        raise ArchiveError('Archive contains no snippets')
+    if len(records) > settings.SNIPPET_IMPORT_MAX_SNIPPETS:
+        raise ArchiveError(f'Archive holds more than {settings.SNIPPET_IMPORT_MAX_SNIPPETS} snippets')
+    return records
+
+def import_snippets(user, records, batch_size=None):
+    """
+    Create snippets for a user from validated records in one transaction.
+
+    Each batch is inserted with bulk_create. Its first revisions, search
+    index entries and the user's snippet counter are then written once for
+    the whole batch.
+
+    Returns the created snippets.
+    """
+    batch_size = batch_size or settings.SNIPPET_IMPORT_BATCH_SIZE
+    created = []
+    with transaction.atomic():
+        for start in range(0, len(records), batch_size):
+            snippets = CodeSnippet.objects.bulk_create([
+                CodeSnippet(user=user, **record) for record in records[start:start + batch_size]
+            ])
+            SnippetRevision.objects.bulk_create([initial_revision(snippet) for snippet in snippets])
+            search.index_objects('snippets', snippets)
+            UserProfile.objects.filter(user=user).update(total_snippets=F('total_snippets') + len(snippets))
+            created.extend(snippets)
+        transaction.on_commit(lambda: invalidate_user_fragments(user.pk))
+    return created
+
+def _record(snippet):
+    return {field: getattr(snippet, field) for field in ARCHIVE_FIELDS}
+
+def iter_jsonl(queryset):
+    """Stream snippets as JSONL lines."""
+    for snippet in queryset.iterator():
+        yield json.dumps({**_record(snippet), 'code': snippet.code}, ensure_ascii=False) + '\n'
+
+def _slug(title):
+    return re.sub(r'[^A-Za-z0-9_-]+', '-', title).strip('-')[:50] or 'snippet'
+
+def write_zip(queryset):
+    """
+    Write snippets to a zip of source files plus a snippets.jsonl manifest.
+
+    Returns a temporary file positioned at the start of the archive.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    manifest = io.StringIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for snippet in queryset.iterator():
+            extension = LANGUAGES.get(snippet.language, {}).get('extension', '.txt')
+            name = f'snippets/{snippet.pk}-{_slug(snippet.title)}{extension}'
+            archive.writestr(name, snippet.code)
+            manifest.write(json.dumps({**_record(snippet), 'file': name}, ensure_ascii=False) + '\n')
+        archive.writestr(MANIFEST_NAME, manifest.getvalue())
+    output.seek(0)
+    return output
@@ -0,0 +1,113 @@
+"""Streaming export of execution history as JSON Lines or CSV.
+
+Rows are read with ``QuerySet.iterator`` and written out as they arrive,
+so memory use does not grow with the number of rows exported.
+"""
+
+import csv
+import json
+import zlib
+from django.conf import settings
+from .models import ExecutionHistory
+
+# Export column -> queryset field
+EXPORT_COLUMNS = {
+    'id': 'id',
+    'created_at': 'created_at',
+    'user': 'user__username',
+    'snippet': 'snippet_id',
+    'language': 'language',
+    'status': 'status',
+    'returncode': 'returncode',
+    'execution_time': 'execution_time',
+    'code': 'code',
+    'stdin': 'stdin',
+    'stdout': 'stdout',
+    'stderr': 'stderr',
+}
+EXPORT_FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+# Rows are joined into pieces of roughly this many characters before being written
+BUFFER_SIZE = 64 * 1024
+
+def export_queryset(user=None, language=None, since=None, until=None):
+    """Executions to export, oldest first. ``since`` is inclusive and ``until`` exclusive."""
+    queryset = ExecutionHistory.objects.all()
+    if user is not None:
+        queryset = queryset.filter(user=user)
+    if language:
+        queryset = queryset.filter(language=language)
+    if since:
+        queryset = queryset.filter(created_at__gte=since)
+    if until:
+        queryset = queryset.filter(created_at__lt=until)
+    return queryset.order_by('created_at', 'id')
+
+def _rows(queryset, columns, chunk_size):
+    fields = [EXPORT_COLUMNS[column] for column in columns]
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+
+def _jsonl_lines(rows, columns):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + '\n'
+
+class _Line:
+    """File-like object that hands back whatever csv.writer writes."""
+    def write(self, value):
+        return value
+
+def _csv_lines(rows, columns):
+    writer = csv.writer(_Line())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+def _buffered(lines):
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= BUFFER_SIZE:
+            yield ''.join(parts)
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts)
+
+def gzip_stream(chunks):
+    """Gzip a stream of text chunks into a stream of bytes."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def stream_export(queryset, columns=None, export_format='jsonl', compress=False, chunk_size=None):
+    """
+    Stream a queryset of executions.
+
+    Args:
+        queryset: Executions to export, usually from export_queryset
+        columns: Names from EXPORT_COLUMNS, in output order (default: all)
+        export_format: 'jsonl' or 'csv'
+        compress: Gzip the output
+        chunk_size: Rows fetched from the database at a time
+
+    Returns:
+        Iterator of str chunks, or bytes chunks when compressed
+    """
+    columns = list(columns or EXPORT_COLUMNS)
+    rows = _rows(queryset, columns, chunk_size)
+    lines = _csv_lines(rows, columns) if export_format == 'csv' else _jsonl_lines(rows, columns)
+    chunks = _buffered(lines)
+    return gzip_stream(chunks) if compress else chunks
+
+def export_filename(export_format, compress=False):
+    """Download filename for an export."""
+    return f"executions.{export_format}{'.gz' if compress else ''}"
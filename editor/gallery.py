@@ -0,0 +1,96 @@
+"""Precomputed popularity ranking for the public snippet gallery."""
+
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+from .models import CodeSnippet, ExecutionHistory
+
+GALLERY_CACHE_KEY = 'editor:gallery:ranking:v2'
+# ETag and change time of the last ranking, kept without expiry so a rebuild
+# after the ranking expires can tell whether anything changed
+GALLERY_VERSION_KEY = 'editor:gallery:version'
+
+GALLERY_ORDERINGS = {
+    'popular': lambda entry: (-entry['execution_count'], -entry['updated_at'].timestamp()),
+    'recent': lambda entry: -entry['updated_at'].timestamp(),
+}
+
+def build_gallery_ranking():
+    """Rank public snippets for every language filter and ordering. Runs the aggregate queries."""
+    counts = dict(
+        ExecutionHistory.objects.filter(snippet__is_public=True)
+        .values('snippet')
+        .annotate(count=Count('id'))
+        .values_list('snippet', 'count')
+    )
+    snippets = CodeSnippet.objects.filter(is_public=True).values(
+        'id', 'title', 'description', 'language', 'created_at', 'updated_at', 'user__username'
+    )
+
+    entries = []
+    for snippet in snippets:
+        entries.append({
+            'id': snippet['id'],
+            'title': snippet['title'],
+            'description': snippet['description'],
+            'language': snippet['language'],
+            'author': snippet['user__username'],
+            'execution_count': counts.get(snippet['id'], 0),
+            'created_at': snippet['created_at'],
+            'updated_at': snippet['updated_at'],
+        })
+
+    # Each filter and ordering keeps its own top GALLERY_MAX_SNIPPETS, so new
+    # snippets still list as recent and small languages are not cut off
+    views = {}
+    for language in [''] + [value for value, label in CodeSnippet.LANGUAGE_CHOICES]:
+        matching = [entry for entry in entries if entry['language'] == language] if language else entries
+        for ordering, key in GALLERY_ORDERINGS.items():
+            views[language, ordering] = [
+                entry['id'] for entry in sorted(matching, key=key)[:settings.GALLERY_MAX_SNIPPETS]
+            ]
+    listed = {pk for ids in views.values() for pk in ids}
+
+    digest = hashlib.md5()
+    for entry in entries:
+        if entry['id'] in listed:
+            digest.update(f"{entry['id']}:{entry['execution_count']}:{entry['updated_at'].isoformat()};".encode())
+
+    generated_at = timezone.now()
+    return {
+        'generated_at': generated_at,
+        # Execution counts change the ranking without touching updated_at
+        'last_modified': generated_at,
+        'etag': digest.hexdigest(),
+        'snippets': {entry['id']: entry for entry in entries if entry['id'] in listed},
+        'views': views,
+    }
+
+def refresh_gallery_ranking():
+    """Rebuild the ranking and store it for the next refresh interval."""
+    ranking = build_gallery_ranking()
+    previous = cache.get(GALLERY_VERSION_KEY)
+    if previous is not None and previous['etag'] == ranking['etag']:
+        ranking['last_modified'] = previous['last_modified']
+    else:
+        cache.set(GALLERY_VERSION_KEY, {'etag': ranking['etag'], 'last_modified': ranking['last_modified']}, None)
+    cache.set(GALLERY_CACHE_KEY, ranking, settings.GALLERY_REFRESH_INTERVAL)
+    return ranking
+
+def get_gallery_ranking():
+    """Get the cached ranking, rebuilding it once the refresh interval has passed."""
+    ranking = cache.get(GALLERY_CACHE_KEY)
+    if ranking is None:
+        ranking = refresh_gallery_ranking()
+    return ranking
+
+def list_gallery(ranking, language=None, ordering='popular'):
+    """Ranked entries for a language filter and ordering, without touching the database."""
+    return [ranking['snippets'][pk] for pk in ranking['views'].get((language or '', ordering), [])]
+
+def gallery_etag(ranking, *params):
+    """ETag for a view of the ranking with the given filter parameters."""
+    key = ':'.join([ranking['etag']] + [str(param) for param in params])
+    return hashlib.md5(key.encode()).hexdigest()
@@ -0,0 +1,302 @@
+"""Write-behind recording of execution history.
+
+With ``HISTORY_WRITE_BEHIND`` on, an execution's history row is appended to
+a spool file in ``HISTORY_SPOOL_DIR`` and the request returns without
+touching the database. A background thread inserts the spooled rows with
+``bulk_create`` every ``HISTORY_FLUSH_INTERVAL`` seconds, or as soon as
+``HISTORY_BATCH_SIZE`` rows are waiting. Each batch bumps every user's
+execution counter once, instead of once per row.
+
+Each process spools to its own segment file and holds an ``flock`` on it
+until the segment's rows are in the database. A segment left unlocked
+belongs to a process that died, and is replayed by the next flusher or by
+``python manage.py flush_history``. Rows carry a ``write_id``, so a segment
+that was inserted but not yet deleted is not inserted twice.
+
+When more than ``HISTORY_QUEUE_MAX`` rows are waiting, rows are written
+synchronously again until the flusher catches up.
+"""
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import CodeSnippet, ExecutionHistory, UserProfile, compute_code_hash
+from .utils import invalidate_user_fragments
+from . import search
+
+logger = logging.getLogger(__name__)
+
+# Flushes between scans for segments left behind by dead processes
+RECOVERY_EVERY = 60
+
+def _to_record(user_id, runs, fields):
+    record = {
+        'write_id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'runs': runs,
+        'created_at': timezone.now().isoformat(),
+    }
+    for name, value in fields.items():
+        if name == 'snippet':
+            record['snippet_id'] = value.pk if value else None
+        else:
+            record[name] = value
+    return record
+
+def _to_instance(record):
+    fields = {name: value for name, value in record.items() if name != 'runs'}
+    fields['created_at'] = datetime.fromisoformat(record['created_at'])
+    fields['write_id'] = uuid.UUID(record['write_id'])
+    fields.setdefault('code_hash', compute_code_hash(fields.get('code', '')))
+    return ExecutionHistory(**fields)
+
+def write_records(records, batch_size=None):
+    """
+    Insert spooled records that are not in the database yet.
+
+    Does in bulk what the post_save signals do per row: counts every run
+    towards the user's total, indexes the rows for search and expires the
+    users' cached fragments. Returns the number of rows inserted.
+    """
+    if not records:
+        return 0
+    written = {
+        str(write_id) for write_id in ExecutionHistory.objects.filter(
+            write_id__in=[record['write_id'] for record in records]
+        ).values_list('write_id', flat=True)
+    }
+    records = [record for record in records if record['write_id'] not in written]
+    # Users and snippets deleted while their rows were waiting
+    users = set(User.objects.filter(pk__in={r['user_id'] for r in records}).values_list('pk', flat=True))
+    snippets = set(CodeSnippet.objects.filter(
+        pk__in={r['snippet_id'] for r in records if r.get('snippet_id')}
+    ).values_list('pk', flat=True))
+
+    rows = []
+    runs = Counter()
+    for record in records:
+        if record['user_id'] not in users:
+            continue
+        if record.get('snippet_id') not in snippets:
+            record = {**record, 'snippet_id': None}
+        rows.append(_to_instance(record))
+        runs[record['user_id']] += record.get('runs', 1)
+
+    with transaction.atomic():
+        rows = ExecutionHistory.objects.bulk_create(rows, batch_size=batch_size or settings.HISTORY_BATCH_SIZE)
+        search.index_objects('executions', rows)
+        for user_id, count in runs.items():
+            UserProfile.objects.filter(user_id=user_id).update(total_executions=F('total_executions') + count)
+        transaction.on_commit(lambda: [invalidate_user_fragments(user_id) for user_id in runs])
+    return len(rows)
+
+def _read_segment(path):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # The last line of a segment whose writer died mid-write
+                continue
+    return records
+
+class HistoryRecorder:
+    """Spools history rows to local segment files and bulk-inserts them in the background."""
+
+    def __init__(self, spool_dir=None, batch_size=None, interval=None, max_pending=None, fsync=None,
+                 background=True):
+        self.spool_dir = Path(spool_dir or settings.HISTORY_SPOOL_DIR)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size or settings.HISTORY_BATCH_SIZE
+        self.interval = interval or settings.HISTORY_FLUSH_INTERVAL
+        self.max_pending = max_pending or settings.HISTORY_QUEUE_MAX
+        self.fsync = settings.HISTORY_SPOOL_FSYNC if fsync is None else fsync
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._segment = None
+        self._pending = []
+        # Segments closed for writing, oldest first, as (file, records)
+        self._sealed = []
+        self._waiting = 0
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name='history-flusher', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def record(self, user_id, runs, fields):
+        """
+        Spool one history row.
+
+        Returns the unsaved ExecutionHistory, or None if the queue is full
+        or closed and the caller should save the row itself.
+        """
+        record = _to_record(user_id, runs, fields)
+        line = json.dumps(record) + '\n'
+        with self._lock:
+            if self._stopped or self._waiting >= self.max_pending:
+                return None
+            if self._segment is None:
+                self._segment = self._open_segment()
+            self._segment.write(line)
+            self._segment.flush()
+            if self.fsync:
+                os.fsync(self._segment.fileno())
+            self._pending.append(record)
+            self._waiting += 1
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+        return _to_instance(record)
+
+    def _open_segment(self):
+        path = self.spool_dir / f'{self.pid}-{time.time_ns()}.jsonl'
+        segment = open(path, 'a', encoding='utf-8')
+        fcntl.flock(segment, fcntl.LOCK_EX)
+        return segment
+
+    def flush(self):
+        """Insert every spooled row of this process. Returns the number of rows inserted."""
+        with self._flush_lock:
+            with self._lock:
+                if self._segment is not None:
+                    self._sealed.append((self._segment, self._pending))
+                    self._segment, self._pending = None, []
+            inserted = 0
+            while self._sealed:
+                segment, records = self._sealed[0]
+                # On failure the segment stays sealed and is retried on the next flush
+                inserted += write_records(records, self.batch_size)
+                os.remove(segment.name)
+                segment.close()
+                self._sealed.pop(0)
+                with self._lock:
+                    self._waiting -= len(records)
+            return inserted
+
+    def recover(self):
+        """Insert the segments of processes that died before flushing them."""
+        inserted = 0
+        for path in sorted(self.spool_dir.glob('*.jsonl')):
+            try:
+                segment = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with segment:
+                try:
+                    fcntl.flock(segment, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    # Still owned by a live writer
+                    continue
+                if not path.exists():
+                    continue
+                inserted += write_records(_read_segment(path), self.batch_size)
+                os.remove(path)
+        return inserted
+
+    def _run(self):
+        flushes = 0
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped:
+                return
+            close_old_connections()
+            try:
+                if flushes % RECOVERY_EVERY == 0:
+                    self.recover()
+                self.flush()
+            except Exception:
+                logger.exception('Flushing execution history failed; retrying')
+            finally:
+                close_old_connections()
+            flushes += 1
+
+    def close(self):
+        """Stop the flusher and insert everything still spooled."""
+        with self._lock:
+            self._stopped = True
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.interval + 5)
+        try:
+            self.flush()
+        except Exception:
+            # The segments stay on disk and are recovered by the next process
+            logger.exception('Flushing execution history at shutdown failed')
+
+def pending_records(user_id, spool_dir=None):
+    """
+    Spooled rows of a user that may not be in the database yet, newest first.
+
+    Reads the segments of every process on this host, so a request sees
+    the rows recorded by any worker.
+    """
+    records = []
+    for path in Path(spool_dir or settings.HISTORY_SPOOL_DIR).glob('*.jsonl'):
+        try:
+            records.extend(record for record in _read_segment(path) if record['user_id'] == user_id)
+        except FileNotFoundError:
+            continue
+    records.sort(key=lambda record: record['created_at'], reverse=True)
+    return records
+
+def pending_executions(user_id):
+    """Spooled rows of a user that are not in the database yet, as unsaved instances, newest first."""
+    if not settings.HISTORY_WRITE_BEHIND:
+        return []
+    records = pending_records(user_id)
+    written = {
+        str(write_id) for write_id in ExecutionHistory.objects.filter(
+            write_id__in=[record['write_id'] for record in records]
+        ).values_list('write_id', flat=True)
+    }
+    return [_to_instance(record) for record in records if record['write_id'] not in written]
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+def get_recorder():
+    """Get this process's recorder, or None when write-behind is off."""
+    global _recorder
+    if not settings.HISTORY_WRITE_BEHIND:
+        return None
+    with _recorder_lock:
+        # A recorder inherited across fork has no flusher thread in the child
+        if _recorder is None or _recorder.pid != os.getpid():
+            _recorder = HistoryRecorder()
+        return _recorder
+
+def record_execution(user, runs=1, **fields):
+    """
+    Record an execution in the history.
+
+    runs is the number of program runs the row stands for, all of which
+    count towards the user's total. With write-behind on, the row is
+    spooled and returned unsaved, without an id.
+    """
+    recorder = get_recorder()
+    if recorder is not None:
+        execution = recorder.record(user.pk, runs, fields)
+        if execution is not None:
+            return execution
+    execution = ExecutionHistory.objects.create(user=user, **fields)
+    if runs > 1:
+        UserProfile.objects.filter(user=user).update(total_executions=F('total_executions') + runs - 1)
+    return execution
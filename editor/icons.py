@@ -0,0 +1,116 @@
+"""Self-hosted subset of the Font Awesome icons used by the templates.
+
+Pages keep Font Awesome's markup (``<i class="fas fa-play"></i>``), but
+``static/vendor/icons.css`` defines only the icons listed in ``ICONS``.
+Each icon is an inline SVG applied as a CSS mask, so the whole set is one
+small fingerprinted stylesheet with no font files and no CDN. The glyphs
+come from the Font Awesome 4.7 SVG font (SIL OFL 1.1). The stylesheet is
+regenerated with ``python manage.py build_icons --font <fontawesome-webfont.svg>``
+after an icon is added here.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from urllib.parse import quote
+from django.conf import settings
+
+# Class used in the templates -> Font Awesome 4.7 code point. Icons new in
+# Font Awesome 5/6 map to the closest 4.7 glyph.
+ICONS = {
+    'arrow-down': 0xf063,
+    'brain': 0xf0eb,
+    'check-circle': 0xf058,
+    'code': 0xf121,
+    'cog': 0xf013,
+    'download': 0xf019,
+    'edit': 0xf044,
+    'envelope': 0xf0e0,
+    'exclamation-circle': 0xf06a,
+    'eye': 0xf06e,
+    'eye-slash': 0xf070,
+    'file-code': 0xf1c9,
+    'globe': 0xf0ac,
+    'history': 0xf1da,
+    'hourglass-end': 0xf253,
+    'inbox': 0xf01c,
+    'lock': 0xf023,
+    'lock-open': 0xf09c,
+    'play': 0xf04b,
+    'play-circle': 0xf144,
+    'plus': 0xf067,
+    'save': 0xf0c7,
+    'shield-alt': 0xf132,
+    'sign-in-alt': 0xf090,
+    'sign-out-alt': 0xf08b,
+    'spinner': 0xf110,
+    'stopwatch': 0xf017,
+    'terminal': 0xf120,
+    'trash': 0xf1f8,
+    'user': 0xf007,
+    'user-circle': 0xf2bd,
+    'user-plus': 0xf234,
+    'user-tag': 0xf02b,
+}
+
+# fa-* classes that modify an icon rather than name one
+MODIFIERS = {'fa-spin'}
+
+ICON_CLASS_RE = re.compile(r'\bfa-[a-z0-9-]+')
+
+BASE_CSS = """\
+.fa,.fas,.far,.fab{display:inline-block;width:1em;height:1em;vertical-align:-.125em}
+.fa::before,.fas::before,.far::before,.fab::before{content:"";display:block;width:100%;height:100%;\
+background-color:currentColor;-webkit-mask:var(--fa-icon) center/contain no-repeat;mask:var(--fa-icon) center/contain no-repeat}
+.fa-spin{animation:fa-spin 1s linear infinite}
+@keyframes fa-spin{to{transform:rotate(360deg)}}
+"""
+
+def icons_css_path():
+    return Path(settings.BASE_DIR) / 'static' / 'vendor' / 'icons.css'
+
+def used_icons(roots=None):
+    """Icon names used by the templates and static scripts, without modifiers."""
+    roots = roots or [Path(settings.BASE_DIR) / 'templates', Path(settings.BASE_DIR) / 'static' / 'js']
+    names = set()
+    for root in roots:
+        for path in Path(root).rglob('*'):
+            if path.suffix in ('.html', '.js'):
+                names.update(ICON_CLASS_RE.findall(path.read_text(encoding='utf-8')))
+    return {name.removeprefix('fa-') for name in names - MODIFIERS}
+
+def read_glyphs(font_path):
+    """Code point -> (advance width, path data) from an SVG font."""
+    root = ET.parse(font_path).getroot()
+    font = next(el for el in root.iter() if el.tag.rsplit('}', 1)[-1] == 'font')
+    default_width = int(font.get('horiz-adv-x'))
+    glyphs = {}
+    for el in font:
+        if el.tag.rsplit('}', 1)[-1] == 'glyph' and el.get('d') and len(el.get('unicode', '')) == 1:
+            glyphs[ord(el.get('unicode'))] = (int(float(el.get('horiz-adv-x', default_width))), el.get('d'))
+    return glyphs
+
+def build_icons_css(font_path, names=None):
+    """Stylesheet defining the given icons (default: all of ICONS)."""
+    root = ET.parse(font_path).getroot()
+    face = next(el for el in root.iter() if el.tag.rsplit('}', 1)[-1] == 'font-face')
+    ascent = int(face.get('ascent'))
+    em = int(face.get('units-per-em'))
+    glyphs = read_glyphs(font_path)
+
+    rules = []
+    for name in sorted(names or ICONS):
+        width, d = glyphs[ICONS[name]]
+        # Font glyphs point y up; flip them into SVG's y-down space
+        svg = (
+            f"<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 {-ascent} {width} {em}'>"
+            f"<path transform='scale(1 -1)' d='{d}'/></svg>"
+        )
+        data = quote(svg, safe=" =/:.,-()'")
+        rules.append(f'.fa-{name}{{--fa-icon:url("data:image/svg+xml,{data}")}}')
+    header = (
+        '/* Icons from Font Awesome 4.7.0 by @davegandy - http://fontawesome.io - '
+        'License: SIL OFL 1.1 (http://scripts.sil.org/OFL).\n'
+        ' * Generated by "python manage.py build_icons"; edit editor/icons.py instead. */\n'
+    )
+    return header + BASE_CSS + '\n'.join(rules) + '\n'
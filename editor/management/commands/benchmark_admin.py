@@ -0,0 +1,107 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from editor.admin import ExecutionHistoryAdmin
+from editor.models import ExecutionHistory, compute_code_hash
+
+SEED_BATCH_SIZE = 5000
+
+class Rollback(Exception):
+    pass
+
+class BaselineAdmin(admin.ModelAdmin):
+    """The changelist as configured before it was tuned for large tables."""
+    list_display = ExecutionHistoryAdmin.list_display
+    list_filter = ('language', 'status', 'created_at')
+    search_fields = ('user__username',)
+
+class Command(BaseCommand):
+    help = ('Time the ExecutionHistory admin changelist against its untuned configuration '
+            'on a seeded table; the seeded rows are rolled back afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000,
+                            help='Synthetic executions to add before measuring (default: 200000)')
+        parser.add_argument('--runs', type=int, default=5, help='Loads per page (default: 5)')
+        parser.add_argument('--output-size', type=int, default=2000,
+                            help='Characters of code and output per synthetic row (default: 2000)')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 0 or options['runs'] < 1:
+            raise CommandError('--rows must not be negative and --runs must be positive')
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'], options['output_size'])
+                self.measure(options['runs'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows, output_size):
+        user = User.objects.create(username=f'admin-benchmark-{random.getrandbits(32):08x}')
+        statuses = [choice for choice, _ in ExecutionHistory.STATUS_CHOICES]
+        start = timezone.now() - timedelta(days=365)
+        step = timedelta(days=365) / max(rows, 1)
+        started = time.perf_counter()
+        for offset in range(0, rows, SEED_BATCH_SIZE):
+            batch = []
+            for i in range(offset, min(offset + SEED_BATCH_SIZE, rows)):
+                code = f'# run {i}\n' + 'x' * output_size
+                batch.append(ExecutionHistory(
+                    user=user, code=code, code_hash=compute_code_hash(code), language='python',
+                    stdout='y' * output_size, status=statuses[i % len(statuses)], execution_time=0.01,
+                ))
+            # created_at is auto_now_add, so spread the rows over a year afterwards
+            created = ExecutionHistory.objects.bulk_create(batch)
+            for i, execution in enumerate(created, offset):
+                execution.created_at = start + step * i
+            ExecutionHistory.objects.bulk_update(created, ['created_at'])
+        total = ExecutionHistory.objects.count()
+        self.stdout.write(f'Seeded {rows} rows in {time.perf_counter() - started:.1f}s; table has {total} rows')
+
+    def measure(self, runs):
+        request_user = User(username='benchmark', is_active=True, is_staff=True, is_superuser=True)
+        factory = RequestFactory()
+        admins = {
+            'baseline': BaselineAdmin(ExecutionHistory, admin.site),
+            'tuned': admin.site._registry[ExecutionHistory],
+        }
+        # The baseline jumps to a numbered page; the tuned list reaches the
+        # same rows through the id cursor its "Older" link carries
+        per_page = admins['tuned'].list_per_page
+        middle = max(1, ExecutionHistory.objects.count() // per_page // 2)
+        cursor = ExecutionHistory.objects.order_by('-id').values_list('id', flat=True)[(middle - 1) * per_page - 1] \
+            if middle > 1 else None
+        pages = {
+            'first page': {'baseline': {}, 'tuned': {}},
+            f'page {middle}': {'baseline': {'p': str(middle)}, 'tuned': {'after': str(cursor)} if cursor else {}},
+            'status filter': {'baseline': {'status__exact': 'timeout'}, 'tuned': {'status__exact': 'timeout'}},
+        }
+
+        self.stdout.write(f"{'page':<16}{'admin':<10}{'median ms':>12}{'queries':>10}")
+        for page, params in pages.items():
+            for name, model_admin in admins.items():
+                times = []
+                for _ in range(runs):
+                    request = factory.get('/admin/editor/executionhistory/', params[name])
+                    request.user = request_user
+                    # Seeding can fill the debug query log, which would hide these
+                    reset_queries()
+                    with CaptureQueriesContext(connection) as queries:
+                        start = time.perf_counter()
+                        response = model_admin.changelist_view(request)
+                        response.render()
+                        times.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f'{name} admin answered {page} with status {response.status_code}')
+                self.stdout.write(
+                    f'{page:<16}{name:<10}{statistics.median(times) * 1000:>12.1f}{len(queries):>10}'
+                )
@@ -0,0 +1,73 @@
+import os
+import statistics
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from executor.languages import get_language, supports_in_memory
+from executor.sandbox import Sandbox
+
+PROGRAMS = {
+    'python': 'print(sum(range(100)))\n',
+    'javascript': 'console.log([...Array(100).keys()].reduce((a, b) => a + b, 0));\n',
+}
+
+class Command(BaseCommand):
+    help = 'Compare running interpreted code from a temp file and from an in-memory file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', choices=sorted(PROGRAMS), default='python')
+        parser.add_argument('--runs', type=int, default=50, help='Runs per mode (default: 50)')
+        parser.add_argument('--temp-dir', help='Directory for the temp-file mode (default: TEMP_DIR)')
+
+    def handle(self, *args, **options):
+        language = options['language']
+        if not hasattr(os, 'memfd_create') or not supports_in_memory(language):
+            raise CommandError('In-memory execution is not available here')
+
+        code = PROGRAMS[language]
+        sandboxes = {'temp file': Sandbox(in_memory=False), 'in memory': Sandbox(in_memory=True)}
+        if options['temp_dir']:
+            for sandbox in sandboxes.values():
+                sandbox.temp_dir = Path(options['temp_dir'])
+
+        # Interleave the modes so drift in machine load affects both equally
+        times = {mode: [] for mode in sandboxes}
+        for _ in range(options['runs']):
+            for mode, sandbox in sandboxes.items():
+                start = time.perf_counter()
+                result = sandbox.execute(code, language)
+                times[mode].append(time.perf_counter() - start)
+                if result.returncode != 0:
+                    raise CommandError(f'{mode} run failed: {result.error or result.stderr}')
+
+        staging = self.measure_staging(sandboxes['temp file'], code, language, options['runs'])
+
+        self.stdout.write(f"{language}, {options['runs']} runs per mode")
+        for mode, samples in times.items():
+            self.stdout.write(
+                f'  {mode:<10} median {statistics.median(samples) * 1000:8.3f} ms'
+                f'   mean {statistics.mean(samples) * 1000:8.3f} ms'
+            )
+        saving = statistics.median(times['temp file']) - statistics.median(times['in memory'])
+        self.stdout.write(
+            f"  source staging: temp file {staging['temp file'] * 1000:.3f} ms, in memory {staging['in memory'] * 1000:.3f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(f'Median saving per run: {saving * 1000:.3f} ms'))
+
+    def measure_staging(self, sandbox, code, language, runs):
+        """Median cost of staging the source alone: write and delete a file vs. fill a memfd."""
+        lang_config = get_language(language)
+        file_times = []
+        memory_times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            path = sandbox._write_source(code, language, lang_config)
+            os.remove(path)
+            file_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            fd = os.memfd_create('main', os.MFD_CLOEXEC)
+            os.write(fd, code.encode('utf-8'))
+            os.close(fd)
+            memory_times.append(time.perf_counter() - start)
+        return {'temp file': statistics.median(file_times), 'in memory': statistics.median(memory_times)}
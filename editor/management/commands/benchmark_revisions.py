@@ -0,0 +1,69 @@
+import random
+import statistics
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from editor.models import CodeSnippet
+from editor.revisions import get_revision_code
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = 'Benchmark snippet revision storage and reconstruction on a synthetic edit history'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--edits', type=int, default=500, help='Number of saved edits (default: 500)')
+        parser.add_argument('--lines', type=int, default=300, help='Initial snippet size in lines (default: 300)')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run_benchmark(options['edits'], options['lines'], random.Random(options['seed']))
+                raise Rollback
+        except Rollback:
+            pass
+    
+    def run_benchmark(self, edits, lines, rng):
+        user = User.objects.create_user('revision-benchmark')
+        code_lines = [f'value_{i} = compute({i}, "{"x" * rng.randint(0, 40)}")\n' for i in range(lines)]
+        snippet = CodeSnippet.objects.create(user=user, title='benchmark', code=''.join(code_lines))
+        
+        full_copy_bytes = len(snippet.code.encode())
+        save_times = []
+        for i in range(edits):
+            # Mostly small in-place edits, with occasional inserts and deletes
+            position = rng.randrange(len(code_lines))
+            roll = rng.random()
+            if roll < 0.7:
+                code_lines[position] = f'value_{position} = compute({i}, "edited")\n'
+            elif roll < 0.9:
+                code_lines.insert(position, f'# note {i}\n')
+            elif len(code_lines) > 1:
+                del code_lines[position]
+            snippet.code = ''.join(code_lines)
+            start = time.perf_counter()
+            snippet.save()
+            save_times.append(time.perf_counter() - start)
+            full_copy_bytes += len(snippet.code.encode())
+        
+        revisions = list(snippet.revisions.values_list('number', 'is_keyframe', 'data'))
+        stored_bytes = sum(len(data) for _, _, data in revisions)
+        keyframes = sum(1 for _, is_keyframe, _ in revisions if is_keyframe)
+        
+        load_times = []
+        for number, _, _ in revisions:
+            start = time.perf_counter()
+            get_revision_code(snippet, number)
+            load_times.append(time.perf_counter() - start)
+        
+        self.stdout.write(f'Revisions:            {len(revisions)} ({keyframes} keyframes)')
+        self.stdout.write(f'Full copies:          {full_copy_bytes / 1024:.1f} KiB')
+        self.stdout.write(f'Stored (compressed):  {stored_bytes / 1024:.1f} KiB ({stored_bytes / full_copy_bytes:.1%} of full copies)')
+        self.stdout.write(f'Save:                 mean {statistics.mean(save_times) * 1000:.2f} ms')
+        self.stdout.write(
+            f'Reconstruction:       mean {statistics.mean(load_times) * 1000:.2f} ms, '
+            f'max {max(load_times) * 1000:.2f} ms'
+        )
@@ -0,0 +1,92 @@
+import gzip
+import random
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from api.renderers import MessagePackRenderer, OrJSONRenderer
+from api.serializers import CodeSnippetSerializer, ExecutionHistorySerializer, FastRows
+from editor.models import CodeSnippet, ExecutionHistory, compute_code_hash
+
+class Rollback(Exception):
+    pass
+
+class Command(BaseCommand):
+    help = ('Time per-row serialization of history and snippet lists with the ModelSerializers '
+            'and the fast path, and compare encoders; the seeded rows are rolled back afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000, help='Rows per list (default: 5000)')
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per case (default: 5)')
+        parser.add_argument('--output-size', type=int, default=200,
+                            help='Characters of code and output per synthetic row (default: 200)')
+
+    def handle(self, *args, **options):
+        if options['rows'] < 1 or options['runs'] < 1:
+            raise CommandError('--rows and --runs must be positive')
+        try:
+            with transaction.atomic():
+                user = self.seed(options['rows'], options['output_size'])
+                self.measure(user, options['rows'], options['runs'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows, output_size):
+        user = User.objects.create(username=f'serialization-benchmark-{random.getrandbits(32):08x}')
+        executions = []
+        snippets = []
+        for i in range(rows):
+            code = f'# run {i}\n' + 'x' * output_size
+            executions.append(ExecutionHistory(
+                user=user, code=code, code_hash=compute_code_hash(code), language='python',
+                stdout='y' * output_size, status='success', returncode=0, execution_time=0.01,
+            ))
+            snippets.append(CodeSnippet(user=user, title=f'Snippet {i}', code=code, language='python'))
+        ExecutionHistory.objects.bulk_create(executions, batch_size=1000)
+        CodeSnippet.objects.bulk_create(snippets, batch_size=1000)
+        return user
+
+    def time(self, runs, func):
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+        return statistics.median(times), result
+
+    def measure(self, user, rows, runs):
+        lists = {
+            'history': (ExecutionHistorySerializer, ExecutionHistory.objects.filter(user=user)),
+            'snippets': (CodeSnippetSerializer, CodeSnippet.objects.filter(user=user)),
+        }
+        self.stdout.write(f"{'list':<10}{'serializer':<18}{'us/row':>10}")
+        data = {}
+        for name, (serializer_class, queryset) in lists.items():
+            fast_rows = FastRows(serializer_class)
+            # Both sides include the query, since the fast path's saving is partly in fetching
+            cases = {
+                'ModelSerializer': lambda: serializer_class(queryset.all(), many=True).data,
+                'FastRows': lambda: fast_rows.serialize(queryset.all()),
+            }
+            for case, func in cases.items():
+                elapsed, data[name] = self.time(runs, func)
+                self.stdout.write(f'{name:<10}{case:<18}{elapsed / rows * 1e6:>10.1f}')
+
+        renderers = {
+            'json (DRF)': JSONRenderer(),
+            'orjson': OrJSONRenderer(),
+            'msgpack': MessagePackRenderer(),
+        }
+        self.stdout.write(f"\n{'list':<10}{'encoder':<18}{'us/row':>10}{'bytes':>12}{'gzip bytes':>12}{'gzip us/row':>13}")
+        for name, rendered_data in data.items():
+            for case, renderer in renderers.items():
+                elapsed, content = self.time(runs, lambda: renderer.render(rendered_data))
+                gzip_elapsed, compressed = self.time(runs, lambda: gzip.compress(content, compresslevel=settings.RESPONSE_GZIP_LEVEL, mtime=0))
+                self.stdout.write(
+                    f'{name:<10}{case:<18}{elapsed / rows * 1e6:>10.1f}{len(content):>12}'
+                    f'{len(compressed):>12}{gzip_elapsed / rows * 1e6:>13.1f}'
+                )
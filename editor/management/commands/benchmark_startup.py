@@ -0,0 +1,73 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, so every import and first call is cold
+PROBE = r"""
+import json, os, sys, time
+start = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_editor.settings')
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+timings = {'import': time.perf_counter() - start}
+
+start = time.perf_counter()
+if sys.argv[1] == 'warm':
+    from code_editor import warmup
+    warmup.warm_up_process()
+    warmup.warm_up_worker()
+timings['warm-up'] = time.perf_counter() - start
+
+from django.test import Client
+from executor.runner import CodeRunner
+client = Client(HTTP_HOST='localhost')
+for name, path in (('login page', '/accounts/login/'), ('API request', '/api/snippets/')):
+    start = time.perf_counter()
+    client.get(path)
+    timings[name] = time.perf_counter() - start
+for language, code in (('python', 'print(1)\n'), ('javascript', 'console.log(1);\n')):
+    start = time.perf_counter()
+    CodeRunner.run(code, language)
+    timings[f'{language} run'] = time.perf_counter() - start
+print(json.dumps(timings))
+"""
+
+class Command(BaseCommand):
+    help = ('Time process startup and the first requests and runs of a fresh process, '
+            'with and without the warm-up')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Fresh processes per mode (default: 5)')
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError('--runs must be positive')
+        env = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+        results = {'cold': [], 'warm': []}
+        # Alternate the modes so drift in machine load affects both equally
+        for _ in range(options['runs']):
+            for mode, timings in results.items():
+                process = subprocess.run(
+                    [sys.executable, '-c', PROBE, mode],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+                )
+                if process.returncode != 0:
+                    raise CommandError(f'Probe failed:\n{process.stderr}')
+                timings.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+        steps = list(results['cold'][0])
+        self.stdout.write(f"{'median ms':<16}{'cold':>10}{'warm':>10}")
+        for step in steps + ['first requests']:
+            row = f'{step:<16}'
+            for timings in results.values():
+                if step == 'first requests':
+                    # What clients wait for on a fresh worker, after startup
+                    values = [sum(t[name] for name in steps if name not in ('import', 'warm-up')) for t in timings]
+                else:
+                    values = [t[step] for t in timings]
+                row += f'{statistics.median(values) * 1000:>10.1f}'
+            self.stdout.write(row)
@@ -0,0 +1,24 @@
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from editor.icons import ICONS, build_icons_css, icons_css_path, used_icons
+
+class Command(BaseCommand):
+    help = 'Build static/vendor/icons.css with the Font Awesome icons the templates use'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--font', required=True, help='Font Awesome 4.x fontawesome-webfont.svg')
+        parser.add_argument('--output', help='Stylesheet to write (default: static/vendor/icons.css)')
+
+    def handle(self, *args, **options):
+        missing = used_icons() - set(ICONS)
+        if missing:
+            raise CommandError(f"Add these icons to editor.icons.ICONS first: {', '.join(sorted(missing))}")
+        try:
+            css = build_icons_css(options['font'])
+        except (OSError, KeyError, StopIteration) as e:
+            raise CommandError(f"Cannot build icons from {options['font']}: {e!r}")
+        output = Path(options['output'] or icons_css_path())
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(css)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {len(ICONS)} icons ({len(css)} bytes) to {output}'))
@@ -0,0 +1,69 @@
+import sys
+from datetime import datetime, time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from editor.exports import EXPORT_COLUMNS, EXPORT_FORMATS, export_queryset, stream_export
+
+def parse_bound(value):
+    """Parse an ISO date or datetime given on the command line."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+class Command(BaseCommand):
+    help = 'Stream execution history to a JSON Lines or CSV file'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='jsonl')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output')
+        parser.add_argument('--user', help='Only export this username')
+        parser.add_argument('--language', help='Only export this language')
+        parser.add_argument('--since', type=parse_bound, help='Executions on or after this date/datetime')
+        parser.add_argument('--until', type=parse_bound, help='Executions before this date/datetime')
+        parser.add_argument(
+            '--columns',
+            help=f"Comma-separated columns (default: all of {', '.join(EXPORT_COLUMNS)})"
+        )
+        parser.add_argument('--chunk-size', type=int, help='Rows fetched per query (default: EXPORT_CHUNK_SIZE)')
+    
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+        
+        columns = None
+        if options['columns']:
+            columns = [column.strip() for column in options['columns'].split(',') if column.strip()]
+            unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+            if unknown:
+                raise CommandError(f"Unknown columns: {', '.join(unknown)}")
+        
+        queryset = export_queryset(user, options['language'], options['since'], options['until'])
+        chunks = stream_export(queryset, columns, options['export_format'], options['gzip'], options['chunk_size'])
+        
+        if options['output']:
+            mode = 'wb' if options['gzip'] else 'w'
+            encoding = None if options['gzip'] else 'utf-8'
+            with open(options['output'], mode, encoding=encoding, newline='' if encoding else None) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            self.stdout.write(self.style.SUCCESS(f"Exported executions to {options['output']}"))
+        elif options['gzip']:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from editor.history import HistoryRecorder
+
+class Command(BaseCommand):
+    help = 'Insert execution history left in the write-behind spool by processes that exited without flushing'
+
+    def handle(self, *args, **options):
+        inserted = HistoryRecorder(background=False).recover()
+        self.stdout.write(self.style.SUCCESS(f'Inserted {inserted} spooled executions'))
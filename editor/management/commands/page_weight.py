@@ -0,0 +1,80 @@
+import gzip
+import re
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+
+ASSET_RE = re.compile(
+    r'<link[^>]+rel="stylesheet"[^>]+href="([^"]+)"|<link[^>]+href="([^"]+)"[^>]+rel="stylesheet"'
+    r'|<script[^>]+src="([^"]+)"|@import url\([\'"]?([^\'")]+)'
+)
+
+class Rollback(Exception):
+    pass
+
+def _find_static(url):
+    """Local file of a static URL, or None."""
+    path = urlsplit(url).path
+    if not path.startswith(settings.STATIC_URL):
+        return None
+    name = path[len(settings.STATIC_URL):]
+    found = finders.find(name)
+    if found:
+        return found
+    candidate = settings.STATIC_ROOT / name
+    return candidate if candidate.exists() else None
+
+class Command(BaseCommand):
+    help = ('Report the bytes each page loads: the document, its self-hosted stylesheets and '
+            'scripts (raw and gzipped), and every request to another origin')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            default=['/editor/studio/', '/accounts/login/', '/home/', '/editor/history/'])
+
+    def handle(self, *args, **options):
+        # Pages that redirect anonymous visitors are fetched again as a
+        # throwaway user, which is rolled back afterwards
+        try:
+            with transaction.atomic():
+                anonymous, user = Client(), Client()
+                user.force_login(User.objects.create(username='page-weight-benchmark'))
+                for path in options['paths']:
+                    response = anonymous.get(path)
+                    if response.status_code == 302:
+                        response = user.get(path)
+                    self.report(path, response)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def report(self, path, response):
+        html = response.content
+        self.stdout.write(f'{path} ({response.status_code})')
+        rows = [('document', len(html), len(gzip.compress(html)))]
+        external = []
+        for match in ASSET_RE.finditer(html.decode('utf-8', 'replace')):
+            url = next(group for group in match.groups() if group)
+            if urlsplit(url).netloc:
+                external.append(url)
+                continue
+            local = _find_static(url)
+            if local is None:
+                self.stdout.write(self.style.WARNING(f'  missing: {url}'))
+                continue
+            with open(local, 'rb') as f:
+                content = f.read()
+            rows.append((url, len(content), len(gzip.compress(content))))
+        for name, raw, compressed in rows:
+            self.stdout.write(f'  {name:<48}{raw:>10} B{compressed:>10} B gzip')
+        self.stdout.write(
+            f"  {'self-hosted total':<48}{sum(r[1] for r in rows):>10} B{sum(r[2] for r in rows):>10} B gzip"
+        )
+        origins = sorted({urlsplit(url).netloc for url in external})
+        self.stdout.write(f"  {len(external)} requests to {len(origins)} other origins{': ' if origins else ''}{', '.join(origins)}")
+        for url in external:
+            self.stdout.write(f'    {url}')
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from editor import search
+from editor.models import CodeSnippet, ExecutionHistory
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for snippets and execution history'
+    
+    def handle(self, *args, **options):
+        if search.get_backend() is None:
+            self.stdout.write(self.style.WARNING('Database backend has no full-text index; nothing to rebuild'))
+            return
+        
+        search.drop_indexes()
+        search.create_indexes()
+        snippets = search.rebuild_index('snippets', CodeSnippet.objects.all())
+        executions = search.rebuild_index('executions', ExecutionHistory.objects.all())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Indexed {snippets} snippets and {executions} executions'
+            )
+        )
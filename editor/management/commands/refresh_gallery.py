@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from editor.gallery import refresh_gallery_ranking
+
+class Command(BaseCommand):
+    help = 'Rebuild the public gallery popularity ranking (run periodically, e.g. from cron)'
+    
+    def handle(self, *args, **options):
+        ranking = refresh_gallery_ranking()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Ranked {len(ranking['snippets'])} public snippets"
+            )
+        )
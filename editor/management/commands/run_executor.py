@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from code_editor import warmup
+from executor.daemon import create_server, server_address
+
+class Command(BaseCommand):
+    help = 'Run an executor daemon that executes code for remote web workers'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bind',
+            default='tcp://127.0.0.1:9001',
+            help='Listen address, tcp://host:port or unix:///path (default: tcp://127.0.0.1:9001)'
+        )
+        parser.add_argument(
+            '--capacity',
+            type=int,
+            default=4,
+            help='Maximum concurrent executions (default: 4)'
+        )
+    
+    def handle(self, *args, **options):
+        if not settings.EXECUTOR_SECRET:
+            raise CommandError('Set EXECUTOR_SECRET, shared with the web tier, before starting an executor')
+        if settings.WARMUP_ON_START:
+            timings = warmup.warm_up_process()
+            timings.update(warmup.warm_up_worker())
+            self.stdout.write(f'Executor {warmup.describe(timings)}')
+        server = create_server(options['bind'], options['capacity'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Executor listening on {server_address(server)} with capacity {options['capacity']}"
+            )
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from editor.models import ExecutionHistory
+from editor.scheduling import RuntimePredictor
+from executor.scheduler import simulate, summarize_simulation
+
+class Command(BaseCommand):
+    help = 'Replay recorded execution history through FIFO and shortest-expected-job-first dispatch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.SCHEDULER_CONCURRENCY or 1,
+                            help='Sandbox slots (default: SCHEDULER_CONCURRENCY)')
+        parser.add_argument('--aging', type=float, default=settings.SCHEDULER_AGING)
+        parser.add_argument('--batch-offset', type=float, default=settings.SCHEDULER_BATCH_OFFSET)
+        parser.add_argument('--speedup', type=float, default=1.0,
+                            help='Compress the gaps between arrivals by this factor to replay under heavier load')
+        parser.add_argument('--batch-above', type=float,
+                            help='Treat runs predicted to take longer than this many seconds as batch jobs')
+        parser.add_argument('--limit', type=int, help='Replay only the most recent N executions')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['speedup'] <= 0:
+            raise CommandError('--concurrency and --speedup must be positive')
+
+        queryset = ExecutionHistory.objects.filter(execution_time__gt=0)
+        if options['limit']:
+            ids = list(queryset.order_by('-id').values_list('id', flat=True)[:options['limit']])
+            if ids:
+                queryset = queryset.filter(id__gte=ids[-1])
+        rows = queryset.order_by('id').values_list('created_at', 'code_hash', 'language', 'snippet_id', 'execution_time')
+
+        # Predict each run only from the runs recorded before it
+        predictor = RuntimePredictor()
+        jobs = []
+        start = None
+        for created_at, code_hash, language, snippet_id, execution_time in rows.iterator(chunk_size=2000):
+            start = start or created_at
+            expected = predictor.predict(code_hash, language, snippet_id)
+            batch = options['batch_above'] is not None and expected > options['batch_above']
+            jobs.append({
+                'arrival': (created_at - start).total_seconds() / options['speedup'],
+                'runtime': execution_time,
+                'expected': expected,
+                'priority': 'batch' if batch else 'interactive',
+            })
+            predictor.observe(code_hash, language, snippet_id, execution_time)
+
+        if not jobs:
+            self.stdout.write(self.style.WARNING('No executions with a recorded runtime to replay'))
+            return
+
+        self.stdout.write(f"Replaying {len(jobs)} executions on {options['concurrency']} slots")
+        self.stdout.write(f"{'policy':<8}{'class':<13}{'jobs':>7}{'mean':>10}{'median':>10}{'p95':>10}{'max':>10}{'wait':>10}")
+        results = {}
+        for policy in ('fifo', 'sejf'):
+            finished = simulate(jobs, options['concurrency'], policy, options['aging'], options['batch_offset'])
+            results[policy] = summarize_simulation(finished)
+            for group, stats in results[policy].items():
+                if stats:
+                    self.stdout.write(
+                        f"{policy:<8}{group:<13}{stats['jobs']:>7}{stats['mean_latency']:>10.3f}"
+                        f"{stats['median_latency']:>10.3f}{stats['p95_latency']:>10.3f}"
+                        f"{stats['max_latency']:>10.3f}{stats['mean_wait']:>10.3f}"
+                    )
+
+        fifo = results['fifo']['all']['mean_latency']
+        sejf = results['sejf']['all']['mean_latency']
+        change = (sejf - fifo) / fifo * 100 if fifo else 0.0
+        self.stdout.write(self.style.SUCCESS(f'Mean latency: FIFO {fifo:.3f}s, SEJF {sejf:.3f}s ({change:+.1f}%)'))
@@ -0,0 +1,153 @@
+import difflib
+import json
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from editor.models import compute_code_hash
+from editor.regressions import OUTCOMES, Toolchain, is_slower, replay_snippet, snippet_corpus
+
+class Command(BaseCommand):
+    help = 'Replay saved snippets on two toolchains and report changed output, new failures and slowdowns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default='local',
+                            help="'local' or comma-separated executor addresses (default: local)")
+        parser.add_argument('--candidate', required=True,
+                            help="'local' or comma-separated executor addresses running the new toolchain")
+        parser.add_argument('--language', choices=['python', 'java', 'javascript'])
+        parser.add_argument('--sample', type=int, help='Replay a random sample of this many snippets')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for --sample (default: 0)')
+        parser.add_argument('--workers', type=int, default=4, help='Snippets replayed at once (default: 4)')
+        parser.add_argument('--runs', type=int, default=3,
+                            help='Runs per snippet and toolchain; the fastest is compared (default: 3)')
+        parser.add_argument('--timeout', type=float, help='Run timeout in seconds (default: EXECUTION_TIMEOUT)')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Report snippets this fraction slower on the candidate (default: 0.25)')
+        parser.add_argument('--min-delta', type=float, default=0.05,
+                            help='...and at least this many seconds slower (default: 0.05)')
+        parser.add_argument('--state', required=True,
+                            help='JSON Lines file of finished snippets; an interrupted run resumes from it')
+        parser.add_argument('--show', type=int, default=20, help='Findings listed per category (default: 20)')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['runs'] < 1:
+            raise CommandError('--workers and --runs must be positive')
+        baseline = Toolchain(options['baseline'])
+        candidate = Toolchain(options['candidate'])
+        timeout = options['timeout'] or settings.EXECUTION_TIMEOUT
+
+        # Records are only comparable with ones replayed on the same toolchains and settings
+        header = {
+            'baseline': options['baseline'], 'candidate': options['candidate'],
+            'runs': options['runs'], 'timeout': timeout,
+        }
+        done = self.load_state(options['state'], header)
+        corpus = snippet_corpus(options['language'], options['sample'], options['seed'])
+        self.stdout.write(f"{len(done)} snippets already replayed in {options['state']}")
+
+        # Results are appended as they finish, so an interrupted run loses at most the in-flight snippets
+        replayed = 0
+        with open(options['state'], 'a', encoding='utf-8') as state, \
+                ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            if state.tell() == 0:
+                state.write(json.dumps({'header': header}) + '\n')
+                state.flush()
+            in_flight = set()
+
+            def collect(futures):
+                nonlocal replayed
+                for future in futures:
+                    record = future.result()
+                    state.write(json.dumps(record) + '\n')
+                    state.flush()
+                    done[record['id']] = record
+                    replayed += 1
+                    if replayed % 100 == 0:
+                        self.stdout.write(f'  {replayed} replayed')
+
+            for snippet in corpus.iterator(chunk_size=500):
+                previous = done.get(snippet['id'])
+                if previous and previous['code_hash'] == compute_code_hash(snippet['code']):
+                    continue
+                # Bound the queue so a large corpus is never held in memory
+                if len(in_flight) >= options['workers'] * 4:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                in_flight.add(pool.submit(replay_snippet, snippet, baseline, candidate, options['runs'], timeout))
+            collect(as_completed(in_flight))
+        self.stdout.write(f'Replayed {replayed} snippets')
+
+        # Leave out snippets deleted since an earlier run, or outside this selection
+        ids = set(corpus.values_list('id', flat=True))
+        records = [record for id_, record in sorted(done.items()) if id_ in ids]
+        self.report(records, options)
+
+    def load_state(self, path, header):
+        """
+        Latest record per snippet id from an earlier run.
+
+        Refuses a state file whose header names other toolchains, runs or
+        timeout, since its results would not be comparable.
+        """
+        done = {}
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return done
+        with open(path, encoding='utf-8') as f:
+            try:
+                saved = json.loads(f.readline()).get('header')
+            except (ValueError, AttributeError):
+                saved = None
+            if saved != header:
+                raise CommandError(
+                    f'{path} was written for {saved or "an unknown configuration"}, not {header}; '
+                    'pass a new --state file'
+                )
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interruption
+                    continue
+                done[record['id']] = record
+        return done
+
+    def report(self, records, options):
+        counts = Counter(record['outcome'] for record in records)
+        slower = [record for record in records if is_slower(record, options['threshold'], options['min_delta'])]
+        self.stdout.write(f'{len(records)} snippets: ' + ', '.join(f'{outcome} {counts[outcome]}' for outcome in OUTCOMES))
+
+        new_failures = [record for record in records if record['outcome'] == 'new_failure']
+        if new_failures:
+            self.stdout.write(self.style.ERROR(f'New failures ({len(new_failures)}):'))
+            for record in new_failures[:options['show']]:
+                candidate = record['candidate']
+                reason = candidate['error'] or ('timeout' if candidate['timeout'] else candidate['stderr'].strip())
+                self.stdout.write(f"  #{record['id']} {record['title']} [{record['language']}]: {reason[-300:]}")
+
+        changed = [record for record in records if record['outcome'] == 'output_changed']
+        if changed:
+            self.stdout.write(self.style.WARNING(f'Output changed ({len(changed)}):'))
+            for record in changed[:options['show']]:
+                self.stdout.write(f"  #{record['id']} {record['title']} [{record['language']}]")
+                diff = difflib.unified_diff(
+                    record['baseline']['stdout'].splitlines(), record['candidate']['stdout'].splitlines(),
+                    'baseline', 'candidate', lineterm='', n=1,
+                )
+                for line in list(diff)[:12]:
+                    self.stdout.write(f'    {line}')
+
+        if slower:
+            slower.sort(key=lambda r: r['candidate']['execution_time'] - r['baseline']['execution_time'], reverse=True)
+            self.stdout.write(self.style.WARNING(f'Slower on the candidate ({len(slower)}):'))
+            for record in slower[:options['show']]:
+                before = record['baseline']['execution_time']
+                after = record['candidate']['execution_time']
+                self.stdout.write(
+                    f"  #{record['id']} {record['title']} [{record['language']}]: "
+                    f"{before:.3f}s -> {after:.3f}s ({(after / before - 1) * 100 if before else 0:+.0f}%)"
+                )
+
+        if not (new_failures or changed or slower):
+            self.stdout.write(self.style.SUCCESS('No regressions'))
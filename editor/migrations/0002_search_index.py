@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from editor import search
+
+
+def create_search_indexes(apps, schema_editor):
+    search.create_indexes(schema_editor.connection)
+    backend = search.get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for kind, index in search.SEARCH_INDEXES.items():
+            model = apps.get_model('editor', index['model'])
+            for instance in model.objects.iterator(chunk_size=500):
+                backend.update(cursor, index, instance)
+
+
+def drop_search_indexes(apps, schema_editor):
+    search.drop_indexes(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0002_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='codesnippet',
+            name='language',
+            field=models.CharField(choices=[('python', 'Python'), ('java', 'Java'), ('javascript', 'JavaScript')], default='python', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='codesnippet',
+            index=models.Index(fields=['is_public', '-updated_at'], name='editor_code_is_publ_a310bf_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0003_gallery_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnippetRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('is_keyframe', models.BooleanField(default=False)),
+                ('data', models.BinaryField()),
+                ('checksum', models.CharField(max_length=40)),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('snippet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='editor.codesnippet')),
+            ],
+            options={
+                'ordering': ['-number'],
+                'constraints': [models.UniqueConstraint(fields=('snippet', 'number'), name='unique_snippet_revision')],
+            },
+        ),
+    ]
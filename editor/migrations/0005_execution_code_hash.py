@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+from editor.models import compute_code_hash
+
+
+def backfill_code_hashes(apps, schema_editor):
+    ExecutionHistory = apps.get_model('editor', 'ExecutionHistory')
+    batch = []
+    for execution in ExecutionHistory.objects.only('id', 'code').iterator(chunk_size=500):
+        execution.code_hash = compute_code_hash(execution.code)
+        batch.append(execution)
+        if len(batch) >= 500:
+            ExecutionHistory.objects.bulk_update(batch, ['code_hash'])
+            batch = []
+    ExecutionHistory.objects.bulk_update(batch, ['code_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0004_snippet_revisions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='executionhistory',
+            name='code_hash',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='executionhistory',
+            index=models.Index(fields=['code_hash'], name='editor_exec_code_ha_3b588f_idx'),
+        ),
+        migrations.RunPython(backfill_code_hashes, migrations.RunPython.noop),
+    ]
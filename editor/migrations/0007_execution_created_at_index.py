@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0006_projects'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='executionhistory',
+            index=models.Index(fields=['created_at'], name='editor_exec_created_09aad0_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:04
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('editor', '0007_execution_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='executionhistory',
+            name='write_id',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='executionhistory',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -1,7 +1,12 @@
+import hashlib
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+def compute_code_hash(code):
+    """Hash identifying identical submissions of the same code."""
+    return hashlib.sha1(code.encode('utf-8')).hexdigest()
+
 class CodeSnippet(models.Model):
     """Store user code snippets."""
     LANGUAGE_CHOICES = [
@@ -23,11 +28,31 @@ class CodeSnippet(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['is_public', '-updated_at']),
         ]
     
     def __str__(self):
         return f"{self.title} ({self.language})"
 
+class SnippetRevision(models.Model):
+    """Stored version of a snippet's code: a full keyframe or a compressed delta."""
+    snippet = models.ForeignKey(CodeSnippet, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    is_keyframe = models.BooleanField(default=False)
+    data = models.BinaryField()
+    checksum = models.CharField(max_length=40)
+    size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-number']
+        constraints = [
+            models.UniqueConstraint(fields=['snippet', 'number'], name='unique_snippet_revision'),
+        ]
+    
+    def __str__(self):
+        return f"{self.snippet_id} r{self.number}"
+
 class ExecutionHistory(models.Model):
     """Store code execution history."""
     STATUS_CHOICES = [
@@ -40,6 +65,7 @@ class ExecutionHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='executions')
     snippet = models.ForeignKey(CodeSnippet, on_delete=models.SET_NULL, null=True, blank=True)
     code = models.TextField()
+    code_hash = models.CharField(max_length=40, blank=True)
     language = models.CharField(max_length=20)
     stdin = models.TextField(blank=True)
     stdout = models.TextField(blank=True)
@@ -47,17 +73,66 @@ class ExecutionHistory(models.Model):
     returncode = models.IntegerField(null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES)
     execution_time = models.FloatField(default=0)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so rows written behind keep the time of the run
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Set on rows recorded through the write-behind queue, so a replayed batch is not inserted twice
+    write_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
     
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['code_hash']),
+            models.Index(fields=['created_at']),
         ]
     
+    def save(self, *args, **kwargs):
+        if not self.code_hash:
+            self.code_hash = compute_code_hash(self.code)
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.user.username} - {self.language} - {self.created_at}"
 
+class Project(models.Model):
+    """Multi-file program: a tree of files run from an entry point."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='projects')
+    name = models.CharField(max_length=255)
+    language = models.CharField(max_length=20, choices=CodeSnippet.LANGUAGE_CHOICES, default='python')
+    entry_point = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+        indexes = [
+            models.Index(fields=['user', '-updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.language})"
+
+class ProjectFile(models.Model):
+    """One file of a project, by path relative to the project root."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='files')
+    path = models.CharField(max_length=255)
+    content = models.TextField(blank=True)
+    content_hash = models.CharField(max_length=40, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['path']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'path'], name='unique_project_file_path'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.content_hash = compute_code_hash(self.content)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.project_id}:{self.path}"
+
 class UserProfile(models.Model):
     """Extended user profile."""
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
@@ -0,0 +1,109 @@
+"""Pagination for admin changelists over very large tables."""
+
+from django.conf import settings
+from django.db import connections, models
+from django.utils.functional import cached_property
+
+# Query parameters holding the keyset cursors
+AFTER_VAR = 'after'
+BEFORE_VAR = 'before'
+
+def estimated_count(queryset):
+    """
+    Cheap row count estimate for an unfiltered table.
+
+    PostgreSQL and MySQL keep one in their statistics. Elsewhere the largest
+    auto-increment key is used, which overcounts by the number of deleted rows.
+    Returns None when no estimate is available.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+            row = cursor.fetchone()
+            # reltuples is -1 (or 0 on old servers) before the first ANALYZE
+            if row and row[0] > 0:
+                return int(row[0])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+            row = cursor.fetchone()
+            if row and row[0]:
+                return int(row[0])
+    if isinstance(model._meta.pk, models.AutoField):
+        return queryset.aggregate(last=models.Max('pk'))['last'] or 0
+    return None
+
+class KeysetPage:
+    """One page of a keyset-paginated list, with cursors for its neighbours."""
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def next_cursor(self):
+        """Key to pass as ``after`` for the following (older) page."""
+        return self.object_list[-1].pk
+
+    @property
+    def previous_cursor(self):
+        """Key to pass as ``before`` for the preceding (newer) page."""
+        return self.object_list[0].pk
+
+class LargeTablePaginator:
+    """
+    Keyset paginator that never counts a whole large table.
+
+    The list must be ordered newest first by primary key. A page is the
+    ``per_page`` rows just below the ``after`` key, or just above the
+    ``before`` key when walking back, so every page is an index range scan
+    however deep it is; there are no numbered pages.
+
+    An unfiltered table bigger than ADMIN_EXACT_COUNT_LIMIT rows reports its
+    estimated size. A filtered one is counted only up to that limit.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimated_count(queryset)
+            if estimate is not None and estimate > limit:
+                return estimate
+        return queryset.order_by()[:limit].count()
+
+    def page(self, after=None, before=None):
+        queryset = self.object_list
+        if before is not None:
+            # Walk up from the cursor and flip the rows back to newest first
+            rows = list(queryset.filter(pk__gt=before).order_by('pk')[:self.per_page + 1])
+            if len(rows) > self.per_page:
+                has_next = queryset.filter(pk__lte=before).exists()
+                return KeysetPage(rows[self.per_page - 1::-1], has_next, has_previous=True)
+            # Fewer rows than a page are left above the cursor: that is the first page
+            after = None
+        if after is not None:
+            queryset = queryset.filter(pk__lt=after)
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = after is not None and self.object_list.filter(pk__gte=after).exists()
+        return KeysetPage(rows[:self.per_page], len(rows) > self.per_page, has_previous)
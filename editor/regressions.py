@@ -0,0 +1,118 @@
+"""Compare how stored snippets run on two toolchains.
+
+A toolchain is either ``local`` (the interpreters and compilers on this
+host) or the addresses of executor daemons running another image, e.g.
+``tcp://candidate:9000``. Each snippet runs with the stdin of its latest
+recorded execution, without the syntax pre-check, so the toolchain itself
+reports every error.
+"""
+
+import random
+from django.db.models import OuterRef, Subquery
+from executor.remote import ExecutorTimeout, NoExecutorAvailable, RemoteExecutorPool
+from executor.runner import CodeRunner
+from .models import CodeSnippet, ExecutionHistory, compute_code_hash
+
+OUTCOMES = ('same', 'output_changed', 'new_failure', 'fixed', 'still_failing')
+
+class Toolchain:
+    """Runs code on this host or on a pool of executor daemons."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.pool = None
+        if spec != 'local':
+            self.pool = RemoteExecutorPool([address.strip() for address in spec.split(',') if address.strip()])
+
+    def run(self, code, language, stdin=None, timeout=None):
+        if self.pool is None:
+            return CodeRunner.run_local(code, language, stdin, timeout=timeout)
+        try:
+            return self.pool.execute(code, language, stdin, timeout)
+        except ExecutorTimeout:
+            return CodeRunner._timeout_dict(timeout)
+        except NoExecutorAvailable as e:
+            return CodeRunner._error_dict(str(e))
+
+def snippet_corpus(language=None, sample=None, seed=0):
+    """
+    Snippets to replay, each with the stdin of its latest execution.
+
+    A sample is drawn from the sorted ids with a fixed seed, so a resumed
+    run sees the same sample.
+    """
+    queryset = CodeSnippet.objects.all()
+    if language:
+        queryset = queryset.filter(language=language)
+    if sample:
+        ids = list(queryset.order_by('id').values_list('id', flat=True))
+        if sample < len(ids):
+            queryset = queryset.filter(id__in=random.Random(seed).sample(ids, sample))
+    latest_stdin = ExecutionHistory.objects.filter(snippet=OuterRef('pk')).order_by('-id').values('stdin')[:1]
+    return (
+        queryset.order_by('id')
+        .annotate(latest_stdin=Subquery(latest_stdin))
+        .values('id', 'title', 'language', 'code', 'latest_stdin')
+    )
+
+def _failed(result):
+    return bool(result['error'] or result['timeout'] or result['returncode'] != 0)
+
+def _summary(result):
+    return {
+        'stdout': result['stdout'],
+        'stderr': result['stderr'],
+        'returncode': result['returncode'],
+        'timeout': result['timeout'],
+        'error': result['error'],
+        'execution_time': result['execution_time'],
+    }
+
+def replay_snippet(snippet, baseline, candidate, runs=1, timeout=None):
+    """
+    Run one snippet on both toolchains and classify the difference.
+
+    Each side keeps its fastest of ``runs`` runs, which filters out most
+    scheduling noise from the runtime comparison. A run that fails or times
+    out ends the side and is kept instead.
+    """
+    stdin = snippet['latest_stdin'] or None
+    results = {}
+    for side, toolchain in (('baseline', baseline), ('candidate', candidate)):
+        best = None
+        for _ in range(runs):
+            result = toolchain.run(snippet['code'], snippet['language'], stdin, timeout)
+            if _failed(result):
+                # A failed or timed-out run is reported as such, never as a runtime
+                best = result
+                break
+            if best is None or result['execution_time'] < best['execution_time']:
+                best = result
+        results[side] = best
+
+    before, after = results['baseline'], results['candidate']
+    if _failed(before):
+        outcome = 'still_failing' if _failed(after) else 'fixed'
+    elif _failed(after):
+        outcome = 'new_failure'
+    elif before['stdout'] != after['stdout']:
+        outcome = 'output_changed'
+    else:
+        outcome = 'same'
+    return {
+        'id': snippet['id'],
+        'title': snippet['title'],
+        'language': snippet['language'],
+        'code_hash': compute_code_hash(snippet['code']),
+        'outcome': outcome,
+        'baseline': _summary(before),
+        'candidate': _summary(after),
+    }
+
+def is_slower(record, threshold, min_delta):
+    """Whether the candidate ran more than threshold (a fraction) and min_delta seconds slower."""
+    if record['outcome'] not in ('same', 'output_changed'):
+        return False
+    before = record['baseline']['execution_time']
+    after = record['candidate']['execution_time']
+    return after - before > min_delta and after > before * (1 + threshold)
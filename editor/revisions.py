@@ -0,0 +1,134 @@
+"""Snippet revision history stored as keyframes plus compressed deltas.
+
+Every ``SNIPPET_KEYFRAME_INTERVAL`` revisions a full copy of the code is
+stored; revisions in between hold a zlib-compressed line delta against the
+previous revision. Reconstructing any revision therefore applies at most
+``SNIPPET_KEYFRAME_INTERVAL - 1`` deltas.
+"""
+
+import difflib
+import hashlib
+import json
+import zlib
+from django.conf import settings
+from django.db import transaction
+from .models import CodeSnippet, SnippetRevision
+
+def _checksum(code):
+    return hashlib.sha1(code.encode('utf-8')).hexdigest()
+
+def compute_delta(old, new):
+    """Line-level delta turning old into new, as [[start, end, text], ...]."""
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [
+        [i1, i2, ''.join(new_lines[j1:j2])]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != 'equal'
+    ]
+
+def apply_delta(old, delta):
+    """Apply a delta produced by compute_delta."""
+    old_lines = old.splitlines(keepends=True)
+    parts = []
+    position = 0
+    for start, end, text in delta:
+        parts.extend(old_lines[position:start])
+        parts.append(text)
+        position = end
+    parts.extend(old_lines[position:])
+    return ''.join(parts)
+
+def _encode(payload):
+    return zlib.compress(payload.encode('utf-8'))
+
+def _decode(data):
+    return zlib.decompress(bytes(data)).decode('utf-8')
+
+def latest_revision(snippet):
+    """Get the newest stored revision of a snippet, or None."""
+    return snippet.revisions.order_by('-number').first()
+
+def get_revision_code(snippet, number):
+    """
+    Reconstruct the code of one revision.
+
+    Raises SnippetRevision.DoesNotExist for unknown revision numbers.
+    """
+    keyframe = snippet.revisions.filter(number__lte=number, is_keyframe=True).order_by('-number').first()
+    if keyframe is None:
+        raise SnippetRevision.DoesNotExist(f"Revision {number} does not exist")
+
+    deltas = list(
+        snippet.revisions.filter(number__gt=keyframe.number, number__lte=number)
+        .order_by('number')
+        .values_list('data', flat=True)
+    )
+    if keyframe.number + len(deltas) != number:
+        raise SnippetRevision.DoesNotExist(f"Revision {number} does not exist")
+
+    code = _decode(keyframe.data)
+    for data in deltas:
+        code = apply_delta(code, json.loads(_decode(data)))
+    return code
+
+def initial_revision(snippet):
+    """Unsaved first revision of a new snippet, for bulk_create."""
+    return SnippetRevision(
+        snippet=snippet,
+        number=1,
+        checksum=_checksum(snippet.code),
+        size=len(snippet.code),
+        is_keyframe=True,
+        data=_encode(snippet.code),
+    )
+
+def record_revision(snippet):
+    """
+    Store the snippet's current code as a new revision if it changed.
+
+    Returns the new SnippetRevision, or None if the code is unchanged.
+    """
+    code = snippet.code
+    checksum = _checksum(code)
+
+    with transaction.atomic():
+        # Concurrent saves of one snippet would otherwise both take the next number
+        CodeSnippet.objects.select_for_update().filter(pk=snippet.pk).values_list('pk').first()
+        previous = latest_revision(snippet)
+        if previous is not None and previous.checksum == checksum:
+            return None
+
+        number = previous.number + 1 if previous else 1
+        full = _encode(code)
+        revision = SnippetRevision(
+            snippet=snippet,
+            number=number,
+            checksum=checksum,
+            size=len(code),
+            is_keyframe=True,
+            data=full,
+        )
+
+        if previous is not None and (number - 1) % settings.SNIPPET_KEYFRAME_INTERVAL != 0:
+            old_code = get_revision_code(snippet, previous.number)
+            delta = _encode(json.dumps(compute_delta(old_code, code), separators=(',', ':')))
+            # A rewrite can make the delta larger than the code itself
+            if len(delta) < len(full):
+                revision.is_keyframe = False
+                revision.data = delta
+
+        revision.save()
+    return revision
+
+def diff_revisions(snippet, from_number, to_number):
+    """Unified diff between two revisions."""
+    old = get_revision_code(snippet, from_number)
+    new = get_revision_code(snippet, to_number)
+    return ''.join(difflib.unified_diff(
+        old.splitlines(keepends=True),
+        new.splitlines(keepends=True),
+        fromfile=f'r{from_number}',
+        tofile=f'r{to_number}',
+    ))
@@ -0,0 +1,76 @@
+"""Runtime predictions for the execution scheduler, from execution history.
+
+A submission's expected runtime is the mean of the last
+``SCHEDULER_HISTORY_WINDOW`` recorded runs of the same code (by code hash
+and language). If there are none, the snippet's runs are used. Failing
+that, the language's recent mean is used, cached for
+``SCHEDULER_DEFAULTS_TTL`` seconds. With no history at all the estimate is
+``SCHEDULER_DEFAULT_RUNTIME``.
+"""
+
+import statistics
+from collections import defaultdict, deque
+from django.conf import settings
+from django.core.cache import cache
+from .models import ExecutionHistory, compute_code_hash
+
+# Language means are taken over this many times the history window
+LANGUAGE_SAMPLE_FACTOR = 10
+
+def _recent_times(**filters):
+    # Runs recorded before execution times were measured have a time of 0
+    queryset = ExecutionHistory.objects.filter(execution_time__gt=0, **filters).order_by('-id')
+    return list(queryset.values_list('execution_time', flat=True)[:settings.SCHEDULER_HISTORY_WINDOW])
+
+def language_default(language):
+    """Recent mean runtime of a language."""
+    key = f'editor:scheduler:language:{language}'
+    expected = cache.get(key)
+    if expected is None:
+        times = list(
+            ExecutionHistory.objects.filter(language=language, execution_time__gt=0)
+            .order_by('-id')
+            .values_list('execution_time', flat=True)[:settings.SCHEDULER_HISTORY_WINDOW * LANGUAGE_SAMPLE_FACTOR]
+        )
+        expected = statistics.mean(times) if times else settings.SCHEDULER_DEFAULT_RUNTIME
+        cache.set(key, expected, settings.SCHEDULER_DEFAULTS_TTL)
+    return expected
+
+def predict_runtime(code, language, snippet_id=None):
+    """Expected runtime in seconds of a submission."""
+    times = _recent_times(code_hash=compute_code_hash(code), language=language)
+    if not times and snippet_id:
+        times = _recent_times(snippet_id=snippet_id)
+    if times:
+        return statistics.mean(times)
+    return language_default(language)
+
+class RuntimePredictor:
+    """
+    In-memory predictor with the same fallbacks as predict_runtime.
+
+    Used to replay history: predict each run from the runs observed before it.
+    """
+
+    def __init__(self, window=None, default=None):
+        self.window = window or settings.SCHEDULER_HISTORY_WINDOW
+        self.default = settings.SCHEDULER_DEFAULT_RUNTIME if default is None else default
+        self.by_code = defaultdict(lambda: deque(maxlen=self.window))
+        self.by_snippet = defaultdict(lambda: deque(maxlen=self.window))
+        self.by_language = defaultdict(lambda: deque(maxlen=self.window * LANGUAGE_SAMPLE_FACTOR))
+
+    def predict(self, code_hash, language, snippet_id=None):
+        times = self.by_code.get((code_hash, language))
+        if not times and snippet_id:
+            times = self.by_snippet.get(snippet_id)
+        if not times:
+            times = self.by_language.get(language)
+        return statistics.mean(times) if times else self.default
+
+    def observe(self, code_hash, language, snippet_id, execution_time):
+        if execution_time <= 0:
+            return
+        self.by_code[(code_hash, language)].append(execution_time)
+        if snippet_id:
+            self.by_snippet[snippet_id].append(execution_time)
+        self.by_language[language].append(execution_time)
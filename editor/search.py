@@ -0,0 +1,234 @@
+"""Full-text search over code snippets and execution history.
+
+SQLite uses FTS5 virtual tables and PostgreSQL uses tsvector side tables
+with GIN indexes. Both are keyed by the primary key of the source row and
+are kept in sync by the signals in ``editor.signals``. Other database
+backends fall back to ``icontains`` filtering.
+"""
+
+import re
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_INDEXES = {
+    'snippets': {
+        'table': 'editor_snippet_fts',
+        'model': 'CodeSnippet',
+        'fields': ('title', 'description', 'code'),
+        'weights': (10.0, 5.0, 1.0),
+    },
+    'executions': {
+        'table': 'editor_execution_fts',
+        'model': 'ExecutionHistory',
+        'fields': ('code', 'stdout', 'stderr'),
+        'weights': (5.0, 1.0, 1.0),
+    },
+}
+
+MAX_QUERY_TERMS = 16
+TERM_RE = re.compile(r'\w+')
+
+def tokenize_query(query):
+    """Split free text into search terms, dropping any query syntax."""
+    return TERM_RE.findall(query or '')[:MAX_QUERY_TERMS]
+
+class SQLiteSearchBackend:
+    """FTS5 virtual tables ranked with bm25."""
+
+    def create_indexes(self, cursor):
+        for index in SEARCH_INDEXES.values():
+            columns = ', '.join(index['fields'])
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {index['table']} USING fts5("
+                f"user_id UNINDEXED, {columns}, tokenize=\"unicode61 tokenchars '_'\")"
+            )
+
+    def drop_indexes(self, cursor):
+        for index in SEARCH_INDEXES.values():
+            cursor.execute(f"DROP TABLE IF EXISTS {index['table']}")
+
+    def update(self, cursor, index, instance):
+        values = [getattr(instance, field) or '' for field in index['fields']]
+        placeholders = ', '.join(['%s'] * len(values))
+        self.remove(cursor, index, instance.pk)
+        cursor.execute(
+            f"INSERT INTO {index['table']} (rowid, user_id, {', '.join(index['fields'])}) "
+            f"VALUES (%s, %s, {placeholders})",
+            [instance.pk, instance.user_id] + values
+        )
+
+    def remove(self, cursor, index, pk):
+        cursor.execute(f"DELETE FROM {index['table']} WHERE rowid = %s", [pk])
+
+    def match_sql(self, index, terms):
+        # bm25 is lower-is-better, so negate it; user_id is unindexed and weighted 0
+        weights = ', '.join(str(w) for w in (0.0,) + index['weights'])
+        query = ' '.join('"%s"*' % term for term in terms)
+        table = index['table']
+        return (
+            f"SELECT rowid AS id, -bm25({table}, {weights}) AS rank, user_id "
+            f"FROM {table} WHERE {table} MATCH %s",
+            [query],
+        )
+
+class PostgresSearchBackend:
+    """tsvector side tables with GIN indexes ranked with ts_rank."""
+
+    WEIGHT_LABELS = ('A', 'B', 'C', 'D')
+
+    def create_indexes(self, cursor):
+        for index in SEARCH_INDEXES.values():
+            table = index['table']
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f"id bigint PRIMARY KEY, user_id bigint NOT NULL, document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_document ON {table} USING GIN (document)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {table}_user ON {table} (user_id)")
+
+    def drop_indexes(self, cursor):
+        for index in SEARCH_INDEXES.values():
+            cursor.execute(f"DROP TABLE IF EXISTS {index['table']}")
+
+    def update(self, cursor, index, instance):
+        document = ' || '.join(
+            f"setweight(to_tsvector('simple', %s), '{label}')"
+            for label in self.WEIGHT_LABELS[:len(index['fields'])]
+        )
+        values = [getattr(instance, field) or '' for field in index['fields']]
+        cursor.execute(
+            f"INSERT INTO {index['table']} (id, user_id, document) VALUES (%s, %s, {document}) "
+            f"ON CONFLICT (id) DO UPDATE SET user_id = EXCLUDED.user_id, document = EXCLUDED.document",
+            [instance.pk, instance.user_id] + values
+        )
+
+    def remove(self, cursor, index, pk):
+        cursor.execute(f"DELETE FROM {index['table']} WHERE id = %s", [pk])
+
+    def match_sql(self, index, terms):
+        query = ' & '.join(f'{term}:*' for term in terms)
+        return (
+            f"SELECT id, ts_rank(document, q) AS rank, user_id "
+            f"FROM {index['table']}, to_tsquery('simple', %s) q WHERE document @@ q",
+            [query],
+        )
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+def get_backend(conn=None):
+    """Get the search backend for a connection, or None if unsupported."""
+    backend_class = BACKENDS.get((conn or connection).vendor)
+    return backend_class() if backend_class else None
+
+def create_indexes(conn=None):
+    """Create the search tables for the connection's backend."""
+    conn = conn or connection
+    backend = get_backend(conn)
+    if backend:
+        with conn.cursor() as cursor:
+            backend.create_indexes(cursor)
+
+def drop_indexes(conn=None):
+    """Drop the search tables for the connection's backend."""
+    conn = conn or connection
+    backend = get_backend(conn)
+    if backend:
+        with conn.cursor() as cursor:
+            backend.drop_indexes(cursor)
+
+def index_object(kind, instance):
+    """Add or refresh one snippet or execution in the search index."""
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            backend.update(cursor, SEARCH_INDEXES[kind], instance)
+
+def index_objects(kind, instances):
+    """Add or refresh many rows in the search index."""
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            for instance in instances:
+                backend.update(cursor, SEARCH_INDEXES[kind], instance)
+
+def remove_object(kind, pk):
+    """Remove one row from the search index."""
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            backend.remove(cursor, SEARCH_INDEXES[kind], pk)
+
+def rebuild_index(kind, queryset, chunk_size=500):
+    """Re-index every row of a queryset. Returns the number of rows indexed."""
+    count = 0
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            for instance in queryset.iterator(chunk_size=chunk_size):
+                backend.update(cursor, SEARCH_INDEXES[kind], instance)
+                count += 1
+    return count
+
+def matching_ids(kind, query):
+    """Subquery of primary keys matching the query, for ``pk__in`` filters.
+
+    Returns None when full-text search is unavailable.
+    """
+    backend = get_backend()
+    terms = tokenize_query(query)
+    if backend is None or not terms:
+        return None
+    sql, params = backend.match_sql(SEARCH_INDEXES[kind], terms)
+    return RawSQL(f"SELECT id FROM ({sql}) AS matches", params)
+
+def _fallback_search(kind, terms, user_id, offset, limit):
+    from . import models
+    index = SEARCH_INDEXES[kind]
+    queryset = getattr(models, index['model']).objects.all()
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    for term in terms:
+        condition = Q()
+        for field in index['fields']:
+            condition |= Q(**{f'{field}__icontains': term})
+        queryset = queryset.filter(condition)
+    ids = queryset.values_list('pk', flat=True)
+    return queryset.count(), [(pk, 0.0) for pk in ids[offset:offset + limit]]
+
+def search(kind, query, user_id=None, offset=0, limit=20):
+    """
+    Run a ranked full-text search.
+
+    Args:
+        kind: 'snippets' or 'executions'
+        query: Free-text query; every term must match, as a prefix
+        user_id: Restrict results to one user's rows
+        offset: Number of ranked results to skip
+        limit: Maximum number of results
+
+    Returns:
+        (total, [(pk, rank), ...]) with the best match first
+    """
+    terms = tokenize_query(query)
+    if not terms:
+        return 0, []
+
+    backend = get_backend()
+    if backend is None:
+        return _fallback_search(kind, terms, user_id, offset, limit)
+
+    sql, params = backend.match_sql(SEARCH_INDEXES[kind], terms)
+    sql = f"SELECT id, rank FROM ({sql}) AS matches"
+    if user_id is not None:
+        sql += " WHERE user_id = %s"
+        params.append(user_id)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM ({sql}) AS counted", params)
+        total = cursor.fetchone()[0]
+        cursor.execute(f"{sql} ORDER BY rank DESC, id DESC LIMIT %s OFFSET %s", params + [limit, offset])
+        return total, [(pk, rank) for pk, rank in cursor.fetchall()]
@@ -3,20 +3,28 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile, CodeSnippet, ExecutionHistory
+from code_editor.request_profiler import track
+from executor.projects import remove_workspace
+from .models import UserProfile, CodeSnippet, ExecutionHistory, Project
+from .utils import invalidate_user_fragments
+from . import search
+from .revisions import record_revision
 
 @receiver(post_save, sender=User)
+@track('signals')
 def create_user_profile(sender, instance, created, **kwargs):
     """Create user profile when user is created."""
     if created:
         UserProfile.objects.create(user=instance)
 
 @receiver(post_save, sender=User)
+@track('signals')
 def save_user_profile(sender, instance, **kwargs):
     """Save user profile when user is saved."""
     instance.profile.save()
 
 @receiver(post_save, sender=CodeSnippet)
+@track('signals')
 def update_snippet_count(sender, instance, created, **kwargs):
     """Update user's snippet count."""
     if created:
@@ -25,6 +33,7 @@ def update_snippet_count(sender, instance, created, **kwargs):
         profile.save()
 
 @receiver(post_delete, sender=CodeSnippet)
+@track('signals')
 def decrement_snippet_count(sender, instance, **kwargs):
     """Decrement user's snippet count."""
     profile = instance.user.profile
@@ -32,9 +41,62 @@ def decrement_snippet_count(sender, instance, **kwargs):
     profile.save()
 
 @receiver(post_save, sender=ExecutionHistory)
+@track('signals')
 def update_execution_count(sender, instance, created, **kwargs):
     """Update user's execution count."""
     if created:
         profile = instance.user.profile
         profile.total_executions += 1
         profile.save()
+
+@receiver(post_save, sender=CodeSnippet)
+@receiver(post_delete, sender=CodeSnippet)
+@receiver(post_save, sender=ExecutionHistory)
+@receiver(post_delete, sender=ExecutionHistory)
+@receiver(post_save, sender=UserProfile)
+@track('signals')
+def invalidate_page_fragments(sender, instance, **kwargs):
+    """Expire the user's cached profile and history fragments."""
+    invalidate_user_fragments(instance.user_id)
+
+@receiver(post_save, sender=User)
+@track('signals')
+def invalidate_account_fragments(sender, instance, **kwargs):
+    """Expire the profile card, which shows the user's name and email."""
+    invalidate_user_fragments(instance.pk)
+
+@receiver(post_save, sender=CodeSnippet)
+@track('signals')
+def index_snippet(sender, instance, **kwargs):
+    """Keep the snippet search index in sync."""
+    search.index_object('snippets', instance)
+
+@receiver(post_delete, sender=CodeSnippet)
+@track('signals')
+def unindex_snippet(sender, instance, **kwargs):
+    """Remove a deleted snippet from the search index."""
+    search.remove_object('snippets', instance.pk)
+
+@receiver(post_save, sender=ExecutionHistory)
+@track('signals')
+def index_execution(sender, instance, **kwargs):
+    """Keep the execution search index in sync."""
+    search.index_object('executions', instance)
+
+@receiver(post_delete, sender=ExecutionHistory)
+@track('signals')
+def unindex_execution(sender, instance, **kwargs):
+    """Remove a deleted execution from the search index."""
+    search.remove_object('executions', instance.pk)
+
+@receiver(post_save, sender=CodeSnippet)
+@track('signals')
+def save_snippet_revision(sender, instance, **kwargs):
+    """Record a revision whenever the snippet's code changes."""
+    record_revision(instance)
+
+@receiver(post_delete, sender=Project)
+@track('signals')
+def remove_project_workspace(sender, instance, **kwargs):
+    """Drop the deleted project's cached sources and build outputs."""
+    remove_workspace(instance.pk)
@@ -1,6 +1,34 @@
-from django.test import TestCase, Client
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import Mock, patch
+from django.db import connection
+from django.conf import settings
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
-from .models import CodeSnippet, ExecutionHistory, UserProfile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test.utils import CaptureQueriesContext
+from executor.remote import ExecutorTimeout
+from .admin import ExecutionHistoryAdmin
+from .models import CodeSnippet, ExecutionHistory, UserProfile, compute_code_hash
+from .pagination import LargeTablePaginator
+from .regressions import Toolchain, is_slower, replay_snippet
+from .history import HistoryRecorder, pending_records, write_records
+from .icons import ICONS, icons_css_path, used_icons
+from .revisions import get_revision_code
+from .scheduling import predict_runtime
+
+# The test runner turns DEBUG off and nothing has been collected, so pages
+# that render {% static %} use the source files instead of the manifest
+SOURCE_STATICFILES = {
+    **settings.STORAGES,
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
 
 class UserAuthenticationTests(TestCase):
     def setUp(self):
@@ -68,3 +96,343 @@ class ExecutionHistoryTests(TestCase):
         )
         self.assertEqual(execution.status, 'success')
         self.assertEqual(execution.language, 'python')
+
+# Cached sessions and users, so that cached pages need no queries at all
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['accounts.backends.CachedModelBackend'],
+    STORAGES=SOURCE_STATICFILES,
+)
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_cached_pages_skip_database(self):
+        self.client.get('/editor/profile/')
+        self.client.get('/editor/history/')
+        with self.assertNumQueries(0):
+            self.client.get('/editor/profile/')
+            self.client.get('/editor/history/')
+    
+    def test_execution_invalidates_history_fragment(self):
+        response = self.client.get('/editor/history/')
+        self.assertContains(response, 'No execution history yet')
+        ExecutionHistory.objects.create(
+            user=self.user,
+            code='print("cached")',
+            language='python',
+            status='success'
+        )
+        response = self.client.get('/editor/history/')
+        self.assertNotContains(response, 'No execution history yet')
+    
+    def test_snippet_invalidates_profile_fragment(self):
+        self.client.get('/editor/profile/')
+        CodeSnippet.objects.create(user=self.user, title='T', code='x = 1', language='python')
+        response = self.client.get('/editor/profile/')
+        self.assertContains(response, '<div class="stat-value">1</div>', html=False)
+    
+    def test_account_change_invalidates_profile_card(self):
+        self.client.get('/editor/profile/')
+        self.user.email = 'renamed@example.com'
+        self.user.save()
+        self.assertContains(self.client.get('/editor/profile/'), 'renamed@example.com')
+    
+    def test_unknown_language_is_not_cached_separately(self):
+        response = self.client.get('/editor/history/', {'language': 'x' * 200})
+        self.assertEqual(response.context['language'], '')
+
+@override_settings(STORAGES=SOURCE_STATICFILES)
+class AdminSearchTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass123')
+        self.client = Client()
+        self.client.login(username='admin', password='adminpass123')
+    
+    def test_admin_search_uses_full_text_index(self):
+        match = CodeSnippet.objects.create(user=self.admin, title='One', code='def quicksort(a): pass', language='python')
+        CodeSnippet.objects.create(user=self.admin, title='Two', code='print(1)', language='python')
+        response = self.client.get('/admin/editor/codesnippet/', {'q': 'quicksort'})
+        self.assertEqual(list(response.context['cl'].result_list), [match])
+
+@override_settings(STORAGES=SOURCE_STATICFILES)
+class ExecutionHistoryAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'adminpass123')
+        self.client = Client()
+        self.client.login(username='admin', password='adminpass123')
+        for i in range(5):
+            ExecutionHistory.objects.create(
+                user=self.admin, code=f'print({i})', language='python', status='success' if i % 2 else 'error'
+            )
+    
+    def test_counts_are_estimated_or_capped(self):
+        with self.settings(ADMIN_EXACT_COUNT_LIMIT=2):
+            response = self.client.get('/admin/editor/executionhistory/')
+            # The unfiltered count is estimated from the largest id
+            self.assertEqual(response.context['cl'].result_count, ExecutionHistory.objects.latest('id').id)
+            response = self.client.get('/admin/editor/executionhistory/', {'status__exact': 'error'})
+            self.assertEqual(response.context['cl'].result_count, 2)
+    
+    def test_pages_follow_id_cursors_without_text(self):
+        paginator = LargeTablePaginator(ExecutionHistory.objects.order_by('-id').defer('code'), 2)
+        ids = list(ExecutionHistory.objects.order_by('-id').values_list('id', flat=True))
+        first = paginator.page()
+        self.assertEqual([row.pk for row in first], ids[:2])
+        self.assertFalse(first.has_previous)
+        second = paginator.page(after=first.next_cursor)
+        self.assertEqual([row.pk for row in second], ids[2:4])
+        self.assertTrue(second.has_previous and second.has_next)
+        self.assertIn('code', second[0].get_deferred_fields())
+        last = paginator.page(after=second.next_cursor)
+        self.assertEqual([row.pk for row in last], ids[4:])
+        self.assertFalse(last.has_next)
+        self.assertEqual([row.pk for row in paginator.page(before=last.previous_cursor)], ids[2:4])
+        # Fewer than a page of newer rows left: back to the first page
+        self.assertEqual([row.pk for row in paginator.page(before=ids[1])], ids[:2])
+        with CaptureQueriesContext(connection) as queries:
+            paginator.page(after=ids[1])
+        self.assertNotIn('OFFSET', ' '.join(query['sql'] for query in queries))
+    
+    def test_changelist_links_newer_and_older(self):
+        ids = list(ExecutionHistory.objects.order_by('-id').values_list('id', flat=True))
+        url = '/admin/editor/executionhistory/'
+        with patch.object(ExecutionHistoryAdmin, 'list_per_page', 2):
+            response = self.client.get(url, {'status__exact': 'error'})
+            self.assertEqual([row.pk for row in response.context['cl'].result_list], [ids[0], ids[2]])
+            self.assertContains(response, f'?after={ids[2]}&amp;status__exact=error')
+            self.assertNotContains(response, 'Newer')
+            response = self.client.get(url, {'after': ids[1]})
+            self.assertEqual([row.pk for row in response.context['cl'].result_list], ids[2:4])
+            self.assertContains(response, f'?before={ids[2]}')
+            self.assertContains(response, f'?after={ids[3]}')
+            # The cursor is not treated as a filter, and filter links drop it
+            self.assertNotContains(response, 'after=%d&amp;status' % ids[1])
+            self.assertEqual(response.context['cl'].get_query_string({'status__exact': 'error'}), '?status__exact=error')
+    
+    def test_created_filter(self):
+        year = ExecutionHistory.objects.first().created_at.year
+        response = self.client.get('/admin/editor/executionhistory/', {'created': str(year)})
+        self.assertEqual(response.context['cl'].result_count, 5)
+        response = self.client.get('/admin/editor/executionhistory/', {'created': str(year - 1)})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+@override_settings(STORAGES=SOURCE_STATICFILES)
+class GalleryPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+    
+    def test_gallery_page_conditional_get(self):
+        CodeSnippet.objects.create(user=self.user, title='Shared', code='x', language='python', is_public=True)
+        response = self.client.get('/editor/gallery/')
+        self.assertContains(response, 'Shared')
+        response = self.client.get('/editor/gallery/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+@override_settings(SNIPPET_KEYFRAME_INTERVAL=4)
+class SnippetRevisionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.versions = ['a = 1\n' + ''.join(f'line_{i} = {i}\n' for i in range(50))]
+        self.snippet = CodeSnippet.objects.create(user=self.user, title='T', code=self.versions[0])
+        for i in range(9):
+            self.snippet.code = self.versions[-1] + f'c{i} = {i}\n'
+            if i % 3 == 0:
+                self.snippet.code = self.snippet.code.replace('a = 1', f'a = {i}')
+            self.snippet.save()
+            self.versions.append(self.snippet.code)
+    
+    def test_every_revision_reconstructs(self):
+        for number, code in enumerate(self.versions, start=1):
+            self.assertEqual(get_revision_code(self.snippet, number), code)
+    
+    def test_keyframes_bound_delta_chain(self):
+        keyframes = list(self.snippet.revisions.filter(is_keyframe=True).values_list('number', flat=True))
+        self.assertEqual(sorted(keyframes), [1, 5, 9])
+    
+    def test_unchanged_save_adds_no_revision(self):
+        self.snippet.title = 'Renamed'
+        self.snippet.save()
+        self.assertEqual(self.snippet.revisions.count(), len(self.versions))
+
+class ExportExecutionsCommandTests(TestCase):
+    def test_export_to_file(self):
+        user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        for i in range(5):
+            ExecutionHistory.objects.create(user=user, code=f'print({i})', language='python', status='success')
+        path = os.path.join(tempfile.mkdtemp(), 'executions.jsonl.gz')
+        call_command(
+            'export_executions', output=path, gzip=True, user='testuser',
+            columns='id,code', chunk_size=2, stdout=io.StringIO(),
+        )
+        with gzip.open(path, 'rt') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['code'] for row in rows], [f'print({i})' for i in range(5)])
+        self.assertEqual(set(rows[0]), {'id', 'code'})
+
+class FakeToolchain:
+    def __init__(self, **result):
+        self.result = {
+            'stdout': '1\n', 'stderr': '', 'returncode': 0, 'timeout': False, 'error': None, 'execution_time': 0.1,
+            **result,
+        }
+    
+    def run(self, code, language, stdin=None, timeout=None):
+        return self.result
+
+class ToolchainRegressionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.echo = CodeSnippet.objects.create(user=self.user, title='Echo', code='print(input())', language='python')
+        CodeSnippet.objects.create(user=self.user, title='Sum', code='print(1 + 1)', language='python')
+        ExecutionHistory.objects.create(
+            user=self.user, snippet=self.echo, code=self.echo.code, language='python', stdin='hello\n', status='success'
+        )
+        self.state = os.path.join(tempfile.mkdtemp(), 'state.jsonl')
+    
+    def test_replay_is_resumable(self):
+        output = io.StringIO()
+        call_command('toolchain_regression', candidate='local', state=self.state, runs=1, stdout=output)
+        self.assertIn('No regressions', output.getvalue())
+        with open(self.state) as f:
+            header = json.loads(f.readline())['header']
+            records = {record['title']: record for record in map(json.loads, f)}
+        self.assertEqual(header['candidate'], 'local')
+        self.assertEqual(records['Echo']['candidate']['stdout'], 'hello\n')
+        
+        self.echo.code = 'print(input().upper())'
+        self.echo.save()
+        output = io.StringIO()
+        call_command('toolchain_regression', candidate='local', state=self.state, runs=1, stdout=output)
+        self.assertIn('Replayed 1 snippets', output.getvalue())
+    
+    def test_resume_needs_the_same_configuration(self):
+        call_command('toolchain_regression', candidate='local', state=self.state, runs=1, stdout=io.StringIO())
+        for changed in ({'runs': 2}, {'candidate': 'tcp://candidate:9000'}, {'timeout': 1.0}):
+            options = {'candidate': 'local', 'runs': 1, **changed}
+            with self.assertRaisesMessage(CommandError, 'pass a new --state file'):
+                call_command('toolchain_regression', state=self.state, stdout=io.StringIO(), **options)
+    
+    def test_outcomes(self):
+        snippet = {'id': 1, 'title': 'T', 'language': 'python', 'code': 'print(1)', 'latest_stdin': None}
+        ok = FakeToolchain()
+        self.assertEqual(replay_snippet(snippet, ok, FakeToolchain(returncode=1))['outcome'], 'new_failure')
+        self.assertEqual(replay_snippet(snippet, ok, FakeToolchain(stdout='2\n'))['outcome'], 'output_changed')
+        self.assertEqual(replay_snippet(snippet, FakeToolchain(timeout=True), ok)['outcome'], 'fixed')
+        slow = replay_snippet(snippet, ok, FakeToolchain(execution_time=0.2))
+        self.assertTrue(is_slower(slow, threshold=0.25, min_delta=0.05))
+        self.assertFalse(is_slower(slow, threshold=0.25, min_delta=0.5))
+    
+    def test_a_timed_out_run_is_not_a_runtime(self):
+        snippet = {'id': 1, 'title': 'T', 'language': 'python', 'code': 'print(1)', 'latest_stdin': None}
+        flaky = FakeToolchain()
+        flaky.run = Mock(side_effect=[FakeToolchain().result, FakeToolchain(timeout=True, execution_time=5).result])
+        record = replay_snippet(snippet, FakeToolchain(), flaky, runs=3)
+        self.assertEqual(record['outcome'], 'new_failure')
+        self.assertTrue(record['candidate']['timeout'])
+        remote = Toolchain('tcp://candidate:9000')
+        with patch.object(remote.pool, 'execute', side_effect=ExecutorTimeout):
+            result = remote.run('print(1)', 'python', timeout=2)
+        self.assertTrue(result['timeout'])
+
+class HistoryWriteBehindTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.spool_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.spool_dir, ignore_errors=True)
+    
+    def recorder(self):
+        return HistoryRecorder(self.spool_dir, batch_size=2, background=False)
+    
+    def fields(self, i):
+        return {'code': f'print({i})', 'language': 'python', 'stdout': f'{i}\n', 'status': 'success'}
+    
+    def test_flush_inserts_spooled_rows(self):
+        recorder = self.recorder()
+        for i in range(3):
+            execution = recorder.record(self.user.pk, 2 if i == 0 else 1, self.fields(i))
+            self.assertIsNone(execution.pk)
+        self.assertFalse(ExecutionHistory.objects.exists())
+        self.assertEqual(len(pending_records(self.user.pk, self.spool_dir)), 3)
+        
+        self.assertEqual(recorder.flush(), 3)
+        rows = ExecutionHistory.objects.order_by('created_at')
+        self.assertEqual([row.code for row in rows], ['print(0)', 'print(1)', 'print(2)'])
+        self.assertEqual(rows[0].code_hash, compute_code_hash('print(0)'))
+        self.user.profile.refresh_from_db()
+        self.assertEqual(self.user.profile.total_executions, 4)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+    
+    def test_recovery_does_not_duplicate(self):
+        crashed = self.recorder()
+        crashed.record(self.user.pk, 1, self.fields(1))
+        segment = crashed._segment
+        # Inserted, but the process died before deleting the segment
+        write_records(crashed._pending)
+        segment.close()
+        
+        self.assertEqual(self.recorder().recover(), 0)
+        self.assertEqual(ExecutionHistory.objects.count(), 1)
+        self.assertEqual(os.listdir(self.spool_dir), [])
+    
+    def test_queue_full_writes_synchronously(self):
+        recorder = HistoryRecorder(self.spool_dir, max_pending=1, background=False)
+        self.assertIsNotNone(recorder.record(self.user.pk, 1, self.fields(1)))
+        self.assertIsNone(recorder.record(self.user.pk, 1, self.fields(2)))
+
+class RuntimePredictionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.snippet = CodeSnippet.objects.create(user=self.user, title='Loop', code='v1', language='python')
+        for code, seconds in [('slow()', 4.0), ('slow()', 6.0), ('v1', 0.5), ('fast()', 0.1)]:
+            ExecutionHistory.objects.create(
+                user=self.user, snippet=self.snippet if code == 'v1' else None,
+                code=code, language='python', status='success', execution_time=seconds,
+            )
+    
+    def test_fallbacks(self):
+        self.assertEqual(predict_runtime('slow()', 'python'), 5.0)
+        self.assertEqual(predict_runtime('v2', 'python', self.snippet.pk), 0.5)
+        self.assertAlmostEqual(predict_runtime('new()', 'python'), 2.65)
+        self.assertEqual(predict_runtime('new()', 'java'), 1.0)
+    
+    def test_simulate_scheduler_command(self):
+        out = io.StringIO()
+        call_command('simulate_scheduler', concurrency=1, speedup=1000, stdout=out)
+        self.assertIn('Replaying 4 executions', out.getvalue())
+        self.assertIn('Mean latency: FIFO', out.getvalue())
+
+@override_settings(STORAGES=SOURCE_STATICFILES)
+class StaticAssetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('testuser', 'test@example.com', 'testpass123')
+        self.client = Client()
+    
+    def test_used_icons_are_built(self):
+        self.assertEqual(used_icons() - set(ICONS), set())
+        css = icons_css_path().read_text(encoding='utf-8')
+        for name in used_icons():
+            self.assertIn(f'.fa-{name}{{', css)
+    
+    def test_pages_load_only_self_hosted_assets(self):
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get('/editor/studio/')
+        self.assertContains(response, '/static/vendor/icons.css')
+        self.assertContains(response, '/static/js/studio_editor.js')
+        for path in ['/editor/studio/', '/home/', '/editor/history/', '/editor/gallery/']:
+            self.assertNotContains(self.client.get(path), 'https://')
+    
+    def test_page_weight_command(self):
+        out = io.StringIO()
+        call_command('page_weight', '/accounts/login/', '/editor/studio/', stdout=out)
+        self.assertIn('/static/css/studio_editor.css', out.getvalue())
+        self.assertIn('0 requests to 0 other origins', out.getvalue())
+        self.assertFalse(User.objects.filter(username='page-weight-benchmark').exists())
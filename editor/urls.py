@@ -12,4 +12,5 @@ urlpatterns = [
     path('snippet/<int:pk>/delete/', views.delete_snippet, name='delete_snippet'),
     path('history/', views.execution_history, name='execution_history'),
     path('profile/', views.profile, name='profile'),
+    path('gallery/', views.gallery, name='gallery'),
 ]
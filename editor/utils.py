@@ -1,9 +1,28 @@
 """Utility functions for the editor app."""
 
+import time
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
 from .models import ExecutionHistory, CodeSnippet
 
+def _fragment_version_key(user_id):
+    return f'editor:fragments:{user_id}'
+
+def get_fragment_version(user_id):
+    """Get the version token that keys a user's cached page fragments."""
+    key = _fragment_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Never restart from a fixed value, or an evicted key could revive stale fragments
+        version = time.time_ns()
+        cache.set(key, version, None)
+    return version
+
+def invalidate_user_fragments(user_id):
+    """Expire all cached page fragments of a user."""
+    cache.set(_fragment_version_key(user_id), time.time_ns(), None)
+
 def get_user_statistics(user):
     """Get user statistics."""
     return {
@@ -87,6 +106,25 @@ def validate_code_snippet(code, max_length=50000):
     
     return True, "Valid"
 
+def apply_text_edits(text, edits):
+    """
+    Apply replacement edits to text.
+    
+    Each edit is a dict with start, end and text; offsets refer to the
+    original text and edits must be sorted and non-overlapping.
+    """
+    parts = []
+    position = 0
+    for edit in edits:
+        start, end = edit['start'], edit['end']
+        if start < position or end < start or end > len(text):
+            raise ValueError(f"Edit {start}:{end} is out of order or out of range")
+        parts.append(text[position:start])
+        parts.append(edit.get('text', ''))
+        position = end
+    parts.append(text[position:])
+    return ''.join(parts)
+
 def format_execution_time(seconds):
     """Format execution time for display."""
     if seconds < 0.001:
@@ -1,10 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 from django.http import JsonResponse
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
 from django.db.models import Q
 from .models import CodeSnippet, ExecutionHistory, UserProfile
 from .forms import CodeSnippetForm, UserProfileForm
+from .utils import get_fragment_version
+from .gallery import get_gallery_ranking, list_gallery, gallery_etag
 
 @login_required
 def editor(request):
@@ -63,38 +67,41 @@ def execution_history(request):
     """View execution history."""
     executions = ExecutionHistory.objects.filter(user=request.user)
     
-    # Filter by language if provided
-    language = request.GET.get('language')
+    # Filter by language if provided; it is part of the fragment cache key,
+    # so unknown values are ignored rather than cached
+    language = request.GET.get('language', '')
+    if language not in dict(CodeSnippet.LANGUAGE_CHOICES):
+        language = ''
     if language:
         executions = executions.filter(language=language)
     
     context = {
         'executions': executions,
-        'languages': [
-            ('python', 'Python'),
-            ('cpp', 'C++'),
-            ('c', 'C'),
-            ('java', 'Java'),
-        ]
+        'language': language,
+        'fragment_version': get_fragment_version(request.user.pk),
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+        'languages': CodeSnippet.LANGUAGE_CHOICES,
     }
     return render(request, 'editor/history.html', context)
 
 @login_required
 def profile(request):
     """User profile view."""
-    profile, created = UserProfile.objects.get_or_create(user=request.user)
-    
     if request.method == 'POST':
+        profile, created = UserProfile.objects.get_or_create(user=request.user)
         form = UserProfileForm(request.POST, request.FILES, instance=profile)
         if form.is_valid():
             form.save()
             return redirect('profile')
     else:
-        form = UserProfileForm(instance=profile)
+        # Loaded lazily so a cached page never touches the database
+        profile = SimpleLazyObject(lambda: UserProfile.objects.get_or_create(user=request.user)[0])
+        form = SimpleLazyObject(lambda: UserProfileForm(instance=profile))
     
+    # Counts are callables, evaluated by the template only on a cache miss
     stats = {
-        'total_snippets': CodeSnippet.objects.filter(user=request.user).count(),
-        'total_executions': ExecutionHistory.objects.filter(user=request.user).count(),
+        'total_snippets': CodeSnippet.objects.filter(user=request.user).count,
+        'total_executions': ExecutionHistory.objects.filter(user=request.user).count,
         'recent_executions': ExecutionHistory.objects.filter(user=request.user)[:5],
     }
     
@@ -102,5 +109,33 @@ def profile(request):
         'profile': profile,
         'form': form,
         'stats': stats,
+        'fragment_version': get_fragment_version(request.user.pk),
+        'fragment_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'editor/profile.html', context)
+
+def _gallery_params(request):
+    language = request.GET.get('language', '')
+    ordering = 'recent' if request.GET.get('ordering') == 'recent' else 'popular'
+    return language, ordering
+
+def _gallery_etag(request):
+    return gallery_etag(get_gallery_ranking(), *_gallery_params(request))
+
+def _gallery_last_modified(request):
+    return get_gallery_ranking()['last_modified']
+
+@login_required
+@condition(etag_func=_gallery_etag, last_modified_func=_gallery_last_modified)
+def gallery(request):
+    """Public snippet gallery."""
+    language, ordering = _gallery_params(request)
+    ranking = get_gallery_ranking()
+    
+    context = {
+        'snippets': list_gallery(ranking, language, ordering)[:100],
+        'language': language,
+        'ordering': ordering,
+        'languages': CodeSnippet.LANGUAGE_CHOICES,
+    }
+    return render(request, 'editor/gallery.html', context)
@@ -0,0 +1,38 @@
+"""Summary statistics for repeat-run benchmarks."""
+
+import statistics
+
+def find_outliers(times):
+    """Indices of runs outside Tukey's fences (1.5 IQR beyond the quartiles)."""
+    if len(times) < 4:
+        return []
+    q1, _, q3 = statistics.quantiles(times, n=4)
+    spread = 1.5 * (q3 - q1)
+    return [i for i, t in enumerate(times) if t < q1 - spread or t > q3 + spread]
+
+def summarize(times, peak_memory_kb):
+    """
+    Summarize measured run times.
+    
+    Args:
+        times: Wall-clock seconds of each measured (non warm-up) run
+        peak_memory_kb: Highest resident set size seen across runs
+        
+    Returns:
+        dict with runs, min, median, mean, stdev, peak_memory_kb, outliers, times
+    """
+    if not times:
+        return {
+            'runs': 0, 'min': None, 'median': None, 'mean': None, 'stdev': None,
+            'peak_memory_kb': peak_memory_kb, 'outliers': [], 'times': [],
+        }
+    return {
+        'runs': len(times),
+        'min': round(min(times), 6),
+        'median': round(statistics.median(times), 6),
+        'mean': round(statistics.mean(times), 6),
+        'stdev': round(statistics.stdev(times), 6) if len(times) > 1 else 0.0,
+        'peak_memory_kb': peak_memory_kb,
+        'outliers': find_outliers(times),
+        'times': [round(t, 6) for t in times],
+    }
@@ -0,0 +1,372 @@
+"""CPU cores and slots for sandboxed code, shared by every process on the host.
+
+``SANDBOX_CPUS`` lists the cores that run user code. They are split into
+core sets of ``SANDBOX_CPUS_PER_RUN`` cores, and each local execution holds
+one set for as long as it runs. Its processes are pinned to that set with
+``sched_setaffinity``. Web and executor processes move themselves off the
+reserved cores at startup, so user code and request handling do not compete
+for a core.
+
+Core sets are claimed with ``flock`` on one lock file per set, so every
+process on the host shares them. Without reserved cores, the same locks
+bound the host to ``SCHEDULER_CONCURRENCY`` unpinned runs at once. Runs
+that find every slot taken queue host-wide, shortest expected runtime first
+(see ``CoreAllocator``), for up to ``SANDBOX_CPU_WAIT_TIMEOUT`` seconds.
+Time held and time waited per core are added to a counter file next to the
+lock files, so the figures cover every process on the host.
+"""
+
+import errno
+import fcntl
+import itertools
+import os
+import select
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+from .scheduler import dispatch_key
+
+class NoFreeCpu(Exception):
+    """No reserved core set became free in time."""
+
+def can_pin():
+    return hasattr(os, 'sched_setaffinity')
+
+@contextmanager
+def pinned(cpus):
+    """
+    Run the block on the given cores, so processes started in it inherit them.
+
+    Affinity is per thread on Linux, so only the calling thread moves, and
+    it moves back afterwards. Cores that are not available leave the
+    affinity unchanged.
+    """
+    if not cpus or not can_pin():
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError:
+        yield
+        return
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
+def reserve_for_sandboxes():
+    """Keep the calling process's thread off the cores reserved for user code."""
+    reserved = set(settings.SANDBOX_CPUS)
+    if not reserved or not can_pin():
+        return
+    allowed = os.sched_getaffinity(0) - reserved
+    if allowed:
+        os.sched_setaffinity(0, allowed)
+
+def _cpu_dir():
+    return Path(settings.TEMP_DIR) / 'cpus'
+
+class CoreAllocator:
+    """
+    Hands out sandbox slots, one per running execution, across processes.
+
+    A slot is a set of reserved cores, or, when no cores are reserved, one
+    of ``slots`` unpinned places. Each slot has a lock file, held with
+    ``flock`` while a run uses it.
+
+    A run that cannot start at once waits in a queue shared by every process
+    on the host. The queue is one ticket file per waiter, named by its
+    dispatch key (see ``executor.scheduler.dispatch_key``), so the shortest
+    expected run goes first, batch runs wait behind interactive ones, and
+    waiting ages a run towards the front. Each waiter holds a lock on its own
+    ticket and blocks on the lock of the ticket just ahead of it. Only the
+    front waiter claims slots: it sleeps on a FIFO that every release writes
+    to, so it wakes when any slot frees up.
+    """
+
+    def __init__(self, cpus, per_run=1, lock_dir=None, clock=time.monotonic, slots=0,
+                 aging=1.0, batch_offset=30.0):
+        self.cpus = list(cpus)
+        self.per_run = max(1, per_run)
+        self.core_sets = [
+            frozenset(self.cpus[i:i + self.per_run])
+            for i in range(0, len(self.cpus) - self.per_run + 1, self.per_run)
+        ]
+        # (lock file name, cores to pin to) of every slot
+        if self.core_sets:
+            self.slots = [('cpus-' + '-'.join(map(str, sorted(cores))) + '.lock', cores) for cores in self.core_sets]
+        else:
+            self.slots = [(f'slot-{i}.lock', frozenset()) for i in range(slots)]
+        self.lock_dir = Path(lock_dir or _cpu_dir())
+        self.queue_dir = self.lock_dir / 'queue'
+        self.wakeup_path = self.lock_dir / 'release.fifo'
+        self.clock = clock
+        self.aging = aging
+        self.batch_offset = batch_offset
+        self._next = 0
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+
+    def _try_claim(self, name):
+        fd = os.open(self.lock_dir / name, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            os.close(fd)
+            if e.errno in (errno.EAGAIN, errno.EACCES):
+                return None
+            raise
+        return fd
+
+    def _claim_any(self):
+        """(slot, fd) of a free slot, or (None, None)."""
+        # Start after the last slot handed out, so load spreads over all cores
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % len(self.slots)
+        for i in range(len(self.slots)):
+            slot = self.slots[(start + i) % len(self.slots)]
+            fd = self._try_claim(slot[0])
+            if fd is not None:
+                return slot, fd
+        return None, None
+
+    @staticmethod
+    def _wait_for(path, timeout):
+        """
+        Block on a lock file for up to ``timeout`` seconds; returns its fd, or
+        None on timeout or when the file no longer exists.
+
+        flock has no timeout, so a helper thread makes the blocking call. If
+        the caller gives up first, the helper releases the lock as soon as it
+        gets it.
+        """
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            return None
+        done = threading.Event()
+        guard = threading.Lock()
+        outcome = {'abandoned': False, 'error': None}
+
+        def wait():
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except OSError as e:
+                outcome['error'] = e
+            with guard:
+                if outcome['abandoned'] or outcome['error']:
+                    os.close(fd)
+                done.set()
+
+        threading.Thread(target=wait, name='cpu-wait', daemon=True).start()
+        done.wait(timeout)
+        with guard:
+            if not done.is_set():
+                outcome['abandoned'] = True
+                return None
+        if outcome['error']:
+            raise outcome['error']
+        return fd
+
+    def _tickets(self):
+        try:
+            return sorted(name for name in os.listdir(self.queue_dir) if name.endswith('.ticket'))
+        except FileNotFoundError:
+            return []
+
+    def _enqueue(self, key):
+        """Publish a locked ticket for this run; returns (path, fd)."""
+        self.queue_dir.mkdir(exist_ok=True)
+        name = f'{key:020.6f}-{os.getpid()}-{threading.get_ident()}-{next(self._sequence)}.ticket'
+        # Lock before the ticket is visible, so an unlocked ticket always means its owner died
+        pending = self.queue_dir / f'.{name}.new'
+        fd = os.open(pending, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        path = self.queue_dir / name
+        os.rename(pending, path)
+        return path, fd
+
+    def _open_wakeups(self):
+        try:
+            os.mkfifo(self.wakeup_path, 0o600)
+        except FileExistsError:
+            pass
+        # Opened for writing too, so reads never see end-of-file between releases
+        return os.open(self.wakeup_path, os.O_RDWR | os.O_NONBLOCK)
+
+    def _notify_release(self):
+        try:
+            fd = os.open(self.wakeup_path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            # No FIFO yet, or nobody waiting on it
+            return
+        try:
+            os.write(fd, b'.')
+        except OSError:
+            # Full: a wake-up is already pending
+            pass
+        finally:
+            os.close(fd)
+
+    def _wait_in_queue(self, key, deadline):
+        """Queue by dispatch key until a slot is claimed; returns (slot, fd) or (None, None) at the deadline."""
+        ticket, ticket_fd = self._enqueue(key)
+        wakeups = None
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                ahead = [name for name in self._tickets() if name < ticket.name]
+                if not ahead:
+                    # Front of the queue. Listen before trying, so a release
+                    # between the attempt and the wait is not missed
+                    if wakeups is None:
+                        wakeups = self._open_wakeups()
+                    slot, fd = self._claim_any()
+                    if fd is not None:
+                        return slot, fd
+                    if remaining <= 0 or not select.select([wakeups], [], [], remaining)[0]:
+                        return None, None
+                    os.read(wakeups, 4096)
+                    continue
+                if wakeups is not None:
+                    os.close(wakeups)
+                    wakeups = None
+                if remaining <= 0:
+                    return None, None
+                # Wait for the ticket ahead to leave the queue, then look again
+                path = self.queue_dir / ahead[-1]
+                fd = self._wait_for(path, remaining)
+                if fd is not None:
+                    if path.exists():
+                        # Its owner died without removing it
+                        path.unlink(missing_ok=True)
+                    os.close(fd)
+        finally:
+            if wakeups is not None:
+                os.close(wakeups)
+            # Removed before it is unlocked, so nobody takes it for a dead owner's
+            ticket.unlink(missing_ok=True)
+            os.close(ticket_fd)
+
+    @contextmanager
+    def reserve(self, timeout=None, expected=None, priority='interactive'):
+        """
+        Block until a slot is free and hold it for the block.
+
+        Yields the set of cores to pin to, or None for an unpinned slot.
+        ``expected`` runtime and ``priority`` class order the run among
+        others waiting on the host.
+        """
+        if not self.slots:
+            yield None
+            return
+        self.lock_dir.mkdir(parents=True, exist_ok=True)
+        timeout = settings.SANDBOX_CPU_WAIT_TIMEOUT if timeout is None else timeout
+        requested = self.clock()
+        slot, fd = None, None
+        # Runs already waiting go first
+        if not self._tickets():
+            slot, fd = self._claim_any()
+        if fd is None:
+            if expected is None:
+                expected = settings.SCHEDULER_DEFAULT_RUNTIME
+            key = dispatch_key(expected, priority, time.time(), self.aging, self.batch_offset)
+            slot, fd = self._wait_in_queue(key, time.monotonic() + timeout)
+            if fd is None:
+                raise NoFreeCpu(f'No free CPU for execution after {timeout} seconds')
+        _, core_set = slot
+        started = self.clock()
+        try:
+            yield set(core_set) or None
+        finally:
+            held = self.clock() - started
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+            self._notify_release()
+            record_usage(core_set, held, started - requested, self.lock_dir)
+
+def _stats_path(directory, cpu):
+    return Path(directory) / f'stats-{cpu}'
+
+def record_usage(core_set, held, waited, directory=None):
+    """
+    Count a run's time on each core of its set, in milliseconds.
+
+    Each core has a file of "since runs busy wait" in the lock directory,
+    rewritten under flock, so every process adds to the same counters.
+    """
+    directory = directory or _cpu_dir()
+    for cpu in core_set:
+        fd = os.open(_stats_path(directory, cpu), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            fields = os.read(fd, 256).split()
+            since, runs, busy, wait = (
+                [float(fields[0])] + [int(field) for field in fields[1:4]]
+                if len(fields) == 4 else [time.time() - held - waited, 0, 0, 0]
+            )
+            counters = f'{since} {runs + 1} {busy + int(held * 1000)} {wait + int(waited * 1000)}\n'
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, counters.encode())
+        finally:
+            os.close(fd)
+
+def _read_usage(directory, cpu):
+    try:
+        with open(_stats_path(directory, cpu), 'rb') as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            fields = f.read().split()
+    except FileNotFoundError:
+        return None
+    if len(fields) != 4:
+        return None
+    return float(fields[0]), int(fields[1]), int(fields[2]), int(fields[3])
+
+def get_cpu_stats(directory=None):
+    """
+    Per reserved core: runs, seconds held by executions, seconds spent
+    waiting for it, and the share of time it was held since counting began.
+    """
+    directory = directory or _cpu_dir()
+    stats = []
+    for cpu in settings.SANDBOX_CPUS:
+        since, runs, busy, wait = _read_usage(directory, cpu) or (None, 0, 0, 0)
+        elapsed = time.time() - since if since else 0
+        stats.append({
+            'cpu': cpu,
+            'runs': runs,
+            'busy_seconds': busy / 1000,
+            'wait_seconds': wait / 1000,
+            'utilization': min(1.0, busy / 1000 / elapsed) if elapsed > 0 else 0.0,
+        })
+    return stats
+
+_allocator = None
+_allocator_config = None
+_allocator_lock = threading.Lock()
+
+def get_allocator():
+    """
+    Get the process-wide allocator: one slot per reserved core set, or
+    SCHEDULER_CONCURRENCY unpinned slots. None when neither is configured.
+    """
+    global _allocator, _allocator_config
+    cpus = list(settings.SANDBOX_CPUS) if can_pin() else []
+    slots = 0 if cpus else settings.SCHEDULER_CONCURRENCY
+    if not cpus and slots <= 0:
+        return None
+    config = (cpus, max(1, settings.SANDBOX_CPUS_PER_RUN), slots,
+              settings.SCHEDULER_AGING, settings.SCHEDULER_BATCH_OFFSET, settings.TEMP_DIR)
+    with _allocator_lock:
+        if _allocator is None or _allocator_config != config:
+            _allocator = CoreAllocator(
+                cpus, config[1], slots=slots,
+                aging=settings.SCHEDULER_AGING, batch_offset=settings.SCHEDULER_BATCH_OFFSET,
+            )
+            _allocator_config = config
+        return _allocator
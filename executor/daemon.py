@@ -0,0 +1,159 @@
+"""Standalone executor daemon that runs code in a local Sandbox.
+
+Start one per execution host with ``python manage.py run_executor``; the
+web tier reaches it through ``executor.remote``.
+"""
+
+import hmac
+import logging
+import os
+import socket
+import socketserver
+import threading
+from django.conf import settings
+from .cpus import get_cpu_stats
+from .languages import LANGUAGES
+from .protocol import parse_address, recv_message, send_message, ProtocolError
+
+logger = logging.getLogger(__name__)
+
+class ExecutorRequestHandler(socketserver.BaseRequestHandler):
+    """Serve requests on one connection until the client closes it."""
+    
+    def handle(self):
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (EOFError, ConnectionError):
+                return
+            except ProtocolError as e:
+                send_message(self.request, {'ok': False, 'error': str(e)})
+                return
+            try:
+                response = self.server.dispatch(message)
+            except Exception as e:
+                # Answer instead of dropping the connection, which the client
+                # would take as a lost node and retry elsewhere
+                logger.exception('Executor request failed')
+                response = {'ok': False, 'error': f'Executor error: {e}'}
+            send_message(self.request, response)
+
+def _limit(requested, maximum):
+    """A client-requested limit, capped at the daemon's own."""
+    try:
+        requested = float(requested)
+    except (TypeError, ValueError):
+        return maximum
+    return min(requested, maximum) if requested > 0 else maximum
+
+class ExecutorServerMixin:
+    """Request dispatch and capacity accounting shared by TCP and Unix servers."""
+    daemon_threads = True
+    allow_reuse_address = True
+    
+    def setup_executor(self, capacity, secret):
+        self.capacity = capacity
+        self.secret = secret
+        self.active = 0
+        self.completed = 0
+        self._slots = threading.BoundedSemaphore(capacity)
+        self._lock = threading.Lock()
+    
+    def dispatch(self, message):
+        if not isinstance(message, dict):
+            return {'ok': False, 'error': 'Request must be an object'}
+        op = message.get('op')
+        if op == 'health':
+            return {
+                'ok': True,
+                'capacity': self.capacity,
+                'active': self.active,
+                'completed': self.completed,
+                'languages': sorted(LANGUAGES),
+                'cpus': get_cpu_stats(),
+            }
+        if op in ('execute', 'benchmark', 'project'):
+            # Runs need the shared secret; a daemon without one runs nothing
+            supplied = str(message.get('secret') or '')
+            if not self.secret or not hmac.compare_digest(supplied.encode(), self.secret.encode()):
+                return {'ok': False, 'error': 'Not authorized'}
+            return self.execute(message)
+        return {'ok': False, 'error': f"Unknown op: {op}"}
+    
+    def execute(self, message):
+        # Refuse rather than queue, so the client can fail over to a free node
+        if not self._slots.acquire(blocking=False):
+            return {'ok': False, 'busy': True, 'error': 'Executor at capacity'}
+        with self._lock:
+            self.active += 1
+        try:
+            from .runner import CodeRunner
+            timeout = _limit(message.get('timeout'), settings.EXECUTION_TIMEOUT)
+            if message['op'] == 'benchmark':
+                runs = int(_limit(message.get('runs', 5), settings.BENCHMARK_MAX_RUNS))
+                warmup = max(0, min(int(message.get('warmup', 1)), settings.BENCHMARK_MAX_RUNS - runs))
+                result = CodeRunner.benchmark_local(
+                    message.get('code', ''),
+                    message.get('language', ''),
+                    message.get('stdin'),
+                    runs=runs,
+                    warmup=warmup,
+                    pin_cpu=bool(message.get('pin_cpu')),
+                    timeout=timeout,
+                )
+            elif message['op'] == 'project':
+                result = CodeRunner.run_project_local(
+                    message.get('key', ''),
+                    message.get('files') or {},
+                    message.get('entry_point', ''),
+                    message.get('language', ''),
+                    message.get('stdin'),
+                    timeout=timeout,
+                )
+            else:
+                result = CodeRunner.run_local(
+                    message.get('code', ''),
+                    message.get('language', ''),
+                    message.get('stdin'),
+                    timeout=timeout,
+                    max_memory_mb=int(_limit(message.get('max_memory_mb'), settings.MAX_MEMORY_MB)),
+                    profile=bool(message.get('profile')),
+                )
+            return {'ok': True, 'result': result}
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+            self._slots.release()
+
+class TCPExecutorServer(ExecutorServerMixin, socketserver.ThreadingTCPServer):
+    pass
+
+class UnixExecutorServer(ExecutorServerMixin, socketserver.ThreadingUnixStreamServer):
+    pass
+
+def create_server(address, capacity, secret=None):
+    """
+    Bind an executor server without starting it.
+    
+    Args:
+        address: 'tcp://host:port' (port 0 picks a free port) or 'unix:///path'
+        capacity: Maximum concurrent executions
+        secret: Shared secret clients must send with runs (default: EXECUTOR_SECRET)
+    """
+    family, target = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.remove(target)
+        server = UnixExecutorServer(target, ExecutorRequestHandler)
+    else:
+        server = TCPExecutorServer(target, ExecutorRequestHandler)
+    server.setup_executor(capacity, settings.EXECUTOR_SECRET if secret is None else secret)
+    return server
+
+def server_address(server):
+    """Client address string for a bound server."""
+    if isinstance(server, UnixExecutorServer):
+        return f'unix://{server.server_address}'
+    host, port = server.server_address[:2]
+    return f'tcp://{host}:{port}'
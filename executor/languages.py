@@ -13,6 +13,9 @@ LANGUAGES = {
         'command': 'python',
         'compile_command': None,
         'run_command': lambda file: ['python', os.path.basename(file)],
+        'memory_run_command': lambda path: ['python', path],
+        'profile_command': lambda file, output: ['python', '-m', 'cProfile', '-o', output, os.path.basename(file)],
+        'profile_format': 'cprofile',
     },
     'java': {
         'name': 'Java',
@@ -27,6 +30,12 @@ LANGUAGES = {
         'command': 'node',
         'compile_command': None,
         'run_command': lambda file: ['node', os.path.basename(file)],
+        # Without this node resolves /dev/fd/N to the unopenable memfd name
+        'memory_run_command': lambda path: ['node', '--preserve-symlinks-main', path],
+        'profile_command': lambda file, output: [
+            'node', '--cpu-prof', '--cpu-prof-dir=.', f'--cpu-prof-name={output}', os.path.basename(file),
+        ],
+        'profile_format': 'cpuprofile',
     },
 }
 
@@ -34,6 +43,16 @@ def get_language(lang_code):
     """Get language configuration by code."""
     return LANGUAGES.get(lang_code.lower())
 
+def supports_profiling(lang_code):
+    """Check if language can run under a profiler."""
+    lang = get_language(lang_code)
+    return bool(lang and lang.get('profile_command'))
+
+def supports_in_memory(lang_code):
+    """Check if language can run its source from an inherited file descriptor."""
+    lang = get_language(lang_code)
+    return bool(lang and lang.get('memory_run_command'))
+
 def is_compiled_language(lang_code):
     """Check if language requires compilation."""
     lang = get_language(lang_code)
@@ -0,0 +1,229 @@
+"""Reject code with syntax errors before starting a sandbox.
+
+Python is compiled in-process with ``compile``. JavaScript goes to one
+long-lived ``node`` checker that compiles each submission with
+``vm.compileFunction`` inside the CommonJS wrapper. Java gets a structural
+scan for unclosed delimiters, strings and comments.
+
+Each checker returns an error message in the same format the interpreter
+or compiler prints, or None. None means the code looks valid, or that the
+check could not tell, in which case the sandbox reports the error.
+Every rejection bumps a per-language counter of avoided sandbox launches.
+"""
+
+import functools
+import json
+import re
+import select
+import shutil
+import subprocess
+import sys
+import threading
+import traceback
+from django.conf import settings
+from django.core.cache import cache
+from .languages import LANGUAGES
+
+PYTHON_FILENAME = 'main.py'
+JAVASCRIPT_FILENAME = 'main.js'
+
+NODE_CHECKER = r"""
+const vm = require('vm');
+const readline = require('readline');
+const params = ['exports', 'require', 'module', '__filename', '__dirname'];
+readline.createInterface({input: process.stdin}).on('line', (line) => {
+  const request = JSON.parse(line);
+  let error = null;
+  try {
+    vm.compileFunction(request.code, params, {filename: request.filename});
+  } catch (e) {
+    if (e && e.name === 'SyntaxError') {
+      const lines = String(e.stack).split('\n');
+      error = lines.slice(0, lines.findIndex((l) => l.startsWith('SyntaxError')) + 1).join('\n');
+    }
+  }
+  process.stdout.write(JSON.stringify({error}) + '\n');
+});
+"""
+
+# Module syntax that newer node versions run as ESM instead of rejecting
+NODE_MODULE_ERRORS = ('Cannot use import statement outside a module', "Unexpected token 'export'")
+
+@functools.lru_cache(maxsize=None)
+def _sandbox_python_matches():
+    """Whether the sandbox's python parses like this process does."""
+    try:
+        output = subprocess.run(
+            [LANGUAGES['python']['command'], '-c', 'import sys; print(sys.version_info[:2])'],
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return output == str(tuple(sys.version_info[:2]))
+
+def check_python(code):
+    """Compile Python source in-process."""
+    if not _sandbox_python_matches():
+        return None
+    try:
+        compile(code, PYTHON_FILENAME, 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return ''.join(traceback.format_exception_only(type(e), e))
+    except (ValueError, RecursionError, MemoryError):
+        return None
+    return None
+
+class NodeSyntaxChecker:
+    """A node process kept alive to syntax-check JavaScript on request."""
+
+    def __init__(self):
+        self._process = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        self._process = subprocess.Popen(
+            [LANGUAGES['javascript']['command'], '-e', NODE_CHECKER],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+
+    def close(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+    def check(self, code, timeout):
+        with self._lock:
+            try:
+                if self._process is None or self._process.poll() is not None:
+                    self._start()
+                self._process.stdin.write(json.dumps({'code': code, 'filename': JAVASCRIPT_FILENAME}) + '\n')
+                self._process.stdin.flush()
+                ready, _, _ = select.select([self._process.stdout], [], [], timeout)
+                if not ready:
+                    raise TimeoutError
+                return json.loads(self._process.stdout.readline())['error']
+            except (OSError, ValueError, KeyError, TimeoutError):
+                # A wedged or crashed checker is replaced on the next request
+                self.close()
+                return None
+
+_node_checker = NodeSyntaxChecker()
+
+def check_javascript(code):
+    """Compile JavaScript in the long-lived node checker."""
+    if not shutil.which(LANGUAGES['javascript']['command']):
+        return None
+    # node skips a leading hashbang line in the main module
+    if code.startswith('#!'):
+        code = '//' + code[2:]
+    error = _node_checker.check(code, settings.SYNTAX_PRECHECK_TIMEOUT)
+    if error is None or any(message in error for message in NODE_MODULE_ERRORS):
+        return None
+    return error + '\n'
+
+JAVA_PAIRS = {')': '(', ']': '[', '}': '{'}
+
+def _javac_error(filename, lines, line, column, message):
+    source = lines[line - 1] if line <= len(lines) else ''
+    return f"{filename}:{line}: error: {message}\n{source}\n{' ' * column}^\n1 error\n"
+
+def check_java(code):
+    """Scan Java source for unclosed brackets, string literals and comments."""
+    match = re.search(r'public\s+class\s+(\w+)', code)
+    if not match and 'class' not in code:
+        # The sandbox wraps bare statements in a class; leave those to javac
+        return None
+    filename = f"{match.group(1) if match else 'Main'}.java"
+    lines = code.split('\n')
+
+    stack = []
+    line, column = 1, 0
+    i = 0
+    while i < len(code):
+        char = code[i]
+        pair = code[i:i + 2]
+        if pair == '//':
+            end = code.find('\n', i)
+            i = len(code) if end == -1 else end
+            continue
+        if pair == '/*':
+            end = code.find('*/', i + 2)
+            if end == -1:
+                return _javac_error(filename, lines, line, column, 'unclosed comment')
+            line += code.count('\n', i, end)
+            column = end + 2 - (code.rfind('\n', 0, end) + 1)
+            i = end + 2
+            continue
+        if code.startswith('"""', i):
+            end = code.find('"""', i + 3)
+            if end == -1:
+                return _javac_error(filename, lines, line, column, 'unclosed text block')
+            line += code.count('\n', i, end)
+            column = end + 3 - (code.rfind('\n', 0, end) + 1)
+            i = end + 3
+            continue
+        if char in '"\'':
+            j = i + 1
+            while j < len(code) and code[j] not in (char, '\n'):
+                j += 2 if code[j] == '\\' else 1
+            if j >= len(code) or code[j] == '\n':
+                message = 'unclosed string literal' if char == '"' else 'unclosed character literal'
+                return _javac_error(filename, lines, line, column, message)
+            column += j + 1 - i
+            i = j + 1
+            continue
+
+        if char in '([{':
+            stack.append(char)
+        elif char in JAVA_PAIRS:
+            if not stack or stack[-1] != JAVA_PAIRS[char]:
+                # javac's message depends on context here, so let it report this one
+                return None
+            stack.pop()
+
+        if char == '\n':
+            line += 1
+            column = 0
+        else:
+            column += 1
+        i += 1
+
+    if stack:
+        # javac points just past the last token of the file
+        last = max((n for n, text in enumerate(lines, 1) if text.strip()), default=1)
+        return _javac_error(filename, lines, last, len(lines[last - 1].rstrip()), 'reached end of file while parsing')
+    return None
+
+CHECKERS = {
+    'python': check_python,
+    'javascript': check_javascript,
+    'java': check_java,
+}
+
+def _avoided_key(language):
+    return f'executor:precheck:avoided:{language}'
+
+def check_syntax(code, language):
+    """
+    Syntax-check code before it is sent to a sandbox.
+
+    Returns the error message to report in place of running the code, or
+    None if the code should run.
+    """
+    checker = CHECKERS.get(language)
+    if not settings.SYNTAX_PRECHECK or checker is None:
+        return None
+    error = checker(code)
+    if error is not None:
+        key = _avoided_key(language)
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+    return error
+
+def get_precheck_stats():
+    """Sandbox launches avoided by the pre-check, per language."""
+    return {language: cache.get(_avoided_key(language), 0) for language in CHECKERS}
@@ -0,0 +1,182 @@
+"""Turn interpreter profiler output into compact function tables and flame-graph data.
+
+Python programs run under ``cProfile`` and JavaScript under ``node
+--cpu-prof``. Both are reduced to the same shape:
+
+    {
+        'total_time': seconds,
+        'functions': [{'function', 'location', 'calls', 'self_time', 'total_time'}, ...],
+        'collapsed': ['outer;inner;leaf 1234', ...],   # microseconds
+    }
+
+``collapsed`` uses the folded-stack format read by flamegraph tools.
+"""
+
+import json
+import os
+from collections import defaultdict
+
+MAX_FUNCTIONS = 50
+MAX_STACKS = 500
+MAX_DEPTH = 64
+MAX_PATHS = 20000
+
+# Frames added by the profiler itself rather than the user's program
+PYTHON_IGNORED = {
+    "<method 'disable' of '_lsprof.Profiler' objects>",
+}
+NODE_IGNORED = {'(root)', '(program)', '(idle)'}
+
+def _python_label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name, ''
+    return name, f'{os.path.basename(filename)}:{line}'
+
+def _collapse_label(function, location):
+    label = f'{function} ({location})' if location else function
+    return label.replace(';', ',')
+
+def _cap(functions, stacks):
+    functions.sort(key=lambda row: row['self_time'], reverse=True)
+    stacks = sorted(stacks.items(), key=lambda item: item[1], reverse=True)[:MAX_STACKS]
+    return functions[:MAX_FUNCTIONS], [f'{stack} {weight}' for stack, weight in stacks if weight > 0]
+
+def parse_cprofile(path):
+    """Summarize a cProfile output file."""
+    # Imported here so only profiled runs pay for it
+    import pstats
+    stats = {
+        func: entry for func, entry in pstats.Stats(path).stats.items()
+        if _python_label(func)[0] not in PYTHON_IGNORED
+    }
+
+    functions = []
+    callees = defaultdict(dict)
+    for func, (primitive_calls, calls, self_time, total_time, callers) in stats.items():
+        name, location = _python_label(func)
+        functions.append({
+            'function': name,
+            'location': location,
+            'calls': calls,
+            'self_time': round(self_time, 6),
+            'total_time': round(total_time, 6),
+        })
+        for caller, edge in callers.items():
+            if caller in stats:
+                callees[caller][func] = edge[3]
+
+    # cProfile only records caller/callee edges, so split each function's
+    # time across the paths that reach it in proportion to edge time
+    stacks = defaultdict(int)
+    visited = [0]
+
+    def walk(func, path, labels, share):
+        visited[0] += 1
+        self_time = stats[func][2] * share
+        if self_time:
+            stacks[';'.join(labels)] += int(self_time * 1_000_000)
+        if len(path) >= MAX_DEPTH or visited[0] >= MAX_PATHS:
+            return
+        for callee, edge_time in callees[func].items():
+            callee_total = stats[callee][3]
+            # Skip recursion and paths too small to show up in the graph
+            if callee in path or share * edge_time < 1e-6:
+                continue
+            walk(
+                callee,
+                path | {callee},
+                labels + [_collapse_label(*_python_label(callee))],
+                share * min(1.0, edge_time / callee_total),
+            )
+
+    roots = [func for func, entry in stats.items() if not any(caller in stats for caller in entry[4])]
+    for root in roots:
+        walk(root, {root}, [_collapse_label(*_python_label(root))], 1.0)
+
+    functions, collapsed = _cap(functions, stacks)
+    return {
+        'total_time': round(sum(entry[2] for entry in stats.values()), 6),
+        'functions': functions,
+        'collapsed': collapsed,
+    }
+
+def parse_cpuprofile(path):
+    """Summarize a V8 .cpuprofile written by node --cpu-prof."""
+    with open(path) as f:
+        profile = json.load(f)
+
+    nodes = {node['id']: node for node in profile.get('nodes', [])}
+    parents = {}
+    for node in nodes.values():
+        for child in node.get('children', []):
+            parents[child] = node['id']
+
+    # Self time per node from the sample stream (timeDeltas are microseconds)
+    self_us = defaultdict(int)
+    for node_id, delta in zip(profile.get('samples', []), profile.get('timeDeltas', [])):
+        self_us[node_id] += max(delta, 0)
+
+    def label(node):
+        frame = node['callFrame']
+        name = frame.get('functionName') or '(anonymous)'
+        url = frame.get('url', '')
+        location = f"{os.path.basename(url)}:{frame.get('lineNumber', 0) + 1}" if url else ''
+        return name, location
+
+    stacks = defaultdict(int)
+    rows = {}
+    for node_id, node in nodes.items():
+        name, location = label(node)
+        if name in NODE_IGNORED:
+            continue
+        path = []
+        current = node_id
+        while current is not None and len(path) < MAX_DEPTH:
+            current_name, current_location = label(nodes[current])
+            if current_name not in NODE_IGNORED:
+                path.append((current_name, current_location))
+            current = parents.get(current)
+        path.reverse()
+
+        if self_us[node_id]:
+            stacks[';'.join(_collapse_label(*frame) for frame in path)] += self_us[node_id]
+
+        row = rows.setdefault(_collapse_label(name, location), {
+            'function': name,
+            'location': location,
+            'calls': None,
+            'self_time': 0,
+            'total_time': 0,
+        })
+        row['self_time'] += self_us[node_id] / 1_000_000
+
+    # Total time counts each sample once per distinct function on its stack
+    for stack, weight in stacks.items():
+        for frame in set(stack.split(';')):
+            rows[frame]['total_time'] += weight / 1_000_000
+
+    functions = [
+        {**row, 'self_time': round(row['self_time'], 6), 'total_time': round(row['total_time'], 6)}
+        for row in rows.values()
+    ]
+    functions, collapsed = _cap(functions, stacks)
+    return {
+        'total_time': round(sum(self_us.values()) / 1_000_000, 6),
+        'functions': functions,
+        'collapsed': collapsed,
+    }
+
+PARSERS = {
+    'cprofile': parse_cprofile,
+    'cpuprofile': parse_cpuprofile,
+}
+
+def load_profile(kind, path):
+    """Parse a profiler output file, returning None if it is missing or unreadable."""
+    if not os.path.exists(path):
+        return None
+    try:
+        return PARSERS[kind](path)
+    except (OSError, ValueError, EOFError, KeyError, TypeError):
+        return None
@@ -0,0 +1,150 @@
+"""Cached build workspaces for multi-file projects.
+
+Each project gets a directory under ``TEMP_DIR/projects`` that survives
+between runs:
+
+    src/            the project's files
+    build/          javac output (Java only)
+    manifest.json   content hashes of the files in src/ and of the
+                    sources built into build/
+
+A run writes only the files whose hash changed and deletes files that are
+gone. For Java it recompiles only the sources whose hash differs from the
+last successful build, plus the sources that mention a type declared in
+one of them, so callers of a changed class are checked against it. Deleting
+a Java source clears build/ and rebuilds everything, so no stale classes
+are left behind.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+
+TYPE_DECLARATION_RE = re.compile(r'\b(?:class|interface|enum|record)\s+(\w+)')
+PACKAGE_RE = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.MULTILINE)
+KEY_RE = re.compile(r'^[\w-]+$')
+
+def content_hash(content):
+    """Hash of a project file's content."""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def workspace_root():
+    return Path(settings.TEMP_DIR) / 'projects'
+
+def remove_workspace(key):
+    """Delete a project's cached workspace, if any."""
+    if not KEY_RE.match(str(key)):
+        return
+    shutil.rmtree(workspace_root() / str(key), ignore_errors=True)
+
+class ProjectWorkspace:
+    """On-disk sources and build outputs of one project."""
+
+    def __init__(self, key):
+        if not KEY_RE.match(str(key)):
+            raise ValueError(f'Invalid project workspace key: {key!r}')
+        self.root = workspace_root() / str(key)
+        self.src = self.root / 'src'
+        self.build = self.root / 'build'
+        self.manifest_path = self.root / 'manifest.json'
+        self.manifest = {'files': {}, 'compiled': {}}
+
+    @contextmanager
+    def locked(self):
+        """Serialize runs of the same project, across threads and processes."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._load_manifest()
+                yield self
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            # Unknown state: start from scratch
+            shutil.rmtree(self.src, ignore_errors=True)
+            shutil.rmtree(self.build, ignore_errors=True)
+            self.manifest = {'files': {}, 'compiled': {}}
+
+    def save_manifest(self):
+        temp_path = self.manifest_path.with_suffix('.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+    def path(self, relative):
+        path = (self.src / relative).resolve()
+        if not path.is_relative_to(self.src.resolve()):
+            raise ValueError(f'File path escapes the project: {relative}')
+        return path
+
+    def sync(self, files):
+        """
+        Bring src/ in line with the given {path: content} files.
+
+        Returns:
+            (written paths, removed paths)
+        """
+        self.src.mkdir(parents=True, exist_ok=True)
+        previous = self.manifest['files']
+        hashes = {path: content_hash(content) for path, content in files.items()}
+
+        removed = sorted(set(previous) - set(files))
+        for relative in removed:
+            try:
+                self.path(relative).unlink()
+            except FileNotFoundError:
+                pass
+
+        written = sorted(path for path, digest in hashes.items() if previous.get(path) != digest)
+        for relative in written:
+            path = self.path(relative)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(files[relative], encoding='utf-8')
+
+        self.manifest['files'] = hashes
+        self.save_manifest()
+        return written, removed
+
+    def java_sources_to_compile(self, files, removed):
+        """
+        Java sources that need compiling, and whether build/ was cleared first.
+
+        Returns:
+            (paths, full_rebuild)
+        """
+        sources = {path: content for path, content in files.items() if path.endswith('.java')}
+        compiled = self.manifest['compiled']
+        if any(path.endswith('.java') for path in removed) or not self.build.is_dir():
+            shutil.rmtree(self.build, ignore_errors=True)
+            self.manifest['compiled'] = {}
+            return sorted(sources), True
+
+        changed = {path for path, content in sources.items() if compiled.get(path) != content_hash(content)}
+        names = {name for path in changed for name in TYPE_DECLARATION_RE.findall(sources[path])}
+        if names:
+            mention = re.compile(r'\b(?:%s)\b' % '|'.join(map(re.escape, sorted(names))))
+            changed |= {path for path, content in sources.items() if mention.search(content)}
+        return sorted(changed), False
+
+    def mark_compiled(self, files, paths):
+        for path in paths:
+            self.manifest['compiled'][path] = content_hash(files[path])
+        self.save_manifest()
+
+def java_main_class(entry_point, content):
+    """Fully qualified class name to run for a Java entry point file."""
+    name = os.path.splitext(os.path.basename(entry_point))[0]
+    package = PACKAGE_RE.search(content)
+    return f'{package.group(1)}.{name}' if package else name
@@ -0,0 +1,80 @@
+"""Wire protocol between the web tier and executor daemons.
+
+Each message is a 4-byte big-endian length followed by a UTF-8 JSON
+object. Requests carry an ``op`` of ``execute``, ``benchmark``, ``project``
+or ``health``, and all but ``health`` also carry the shared ``secret``;
+responses carry ``ok`` plus either the result or an ``error``.
+"""
+
+import json
+import socket
+import struct
+
+HEADER = struct.Struct('!I')
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+class ProtocolError(Exception):
+    """Malformed or oversized message."""
+
+def parse_address(address):
+    """
+    Parse an executor address.
+    
+    Args:
+        address: 'tcp://host:port' or 'unix:///path/to/socket'
+        
+    Returns:
+        (socket family, address) suitable for socket.connect/bind
+    """
+    if address.startswith('unix://'):
+        return socket.AF_UNIX, address[len('unix://'):]
+    if address.startswith('tcp://'):
+        host, _, port = address[len('tcp://'):].rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"Unsupported executor address: {address}")
+
+def connect(address, timeout):
+    """Open a client connection to an executor daemon."""
+    family, target = parse_address(address)
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(target)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def send_message(sock, message):
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    if len(payload) > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message of {len(payload)} bytes exceeds limit")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            raise EOFError("Connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+def recv_message(sock):
+    (size,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if size > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message of {size} bytes exceeds limit")
+    try:
+        return json.loads(_recv_exact(sock, size).decode('utf-8'))
+    except ValueError as e:
+        raise ProtocolError(str(e))
+
+def request(address, message, timeout):
+    """Send one request and wait for its response."""
+    sock = connect(address, timeout)
+    try:
+        send_message(sock, message)
+        return recv_message(sock)
+    finally:
+        sock.close()
@@ -0,0 +1,240 @@
+"""Remote execution backend that load-balances across executor daemons."""
+
+import threading
+import time
+from django.conf import settings
+from .protocol import connect, recv_message, request, send_message, ProtocolError
+
+class ExecutorNode:
+    """Client-side view of one executor daemon."""
+    
+    def __init__(self, address, capacity):
+        self.address = address
+        self.capacity = capacity
+        self.active = 0
+        self.healthy = True
+        self.checked_at = 0
+        self.checking = False
+        self.failures = 0
+    
+    @property
+    def load(self):
+        return self.active / self.capacity if self.capacity else 1
+    
+    def has_capacity(self):
+        return self.active < self.capacity
+    
+    def to_dict(self):
+        return {
+            'address': self.address,
+            'capacity': self.capacity,
+            'active': self.active,
+            'healthy': self.healthy,
+            'failures': self.failures,
+        }
+
+class NoExecutorAvailable(Exception):
+    """Every executor node is down or at capacity."""
+
+class ExecutorConnectionLost(NoExecutorAvailable):
+    """The node went away after receiving the request; the run is not retried."""
+
+class ExecutorTimeout(Exception):
+    """No response within the run's time limit; the run is not retried."""
+
+class RemoteExecutorPool:
+    """Least-loaded dispatch with health checks, per-node capacity and failover."""
+    
+    def __init__(self, addresses, capacity=None, retry_interval=None, connect_timeout=None, queue_timeout=None):
+        capacity = capacity or settings.EXECUTOR_NODE_CAPACITY
+        self.nodes = [ExecutorNode(address, capacity) for address in addresses]
+        self.retry_interval = retry_interval if retry_interval is not None else settings.EXECUTOR_RETRY_INTERVAL
+        self.connect_timeout = connect_timeout or settings.EXECUTOR_CONNECT_TIMEOUT
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.EXECUTOR_QUEUE_TIMEOUT
+        self._available = threading.Condition()
+    
+    def check_node(self, node):
+        """Ping a node, updating its health and advertised capacity."""
+        try:
+            response = request(node.address, {'op': 'health'}, self.connect_timeout)
+            healthy = bool(response.get('ok'))
+            capacity = response.get('capacity')
+        except (OSError, EOFError, ProtocolError):
+            healthy, capacity = False, None
+        with self._available:
+            node.healthy = healthy
+            node.checking = False
+            node.checked_at = time.monotonic()
+            if healthy and capacity:
+                node.capacity = capacity
+            self._available.notify_all()
+        return healthy
+    
+    def _mark_failed(self, node):
+        with self._available:
+            node.healthy = False
+            node.checked_at = time.monotonic()
+            node.failures += 1
+    
+    def health_check(self):
+        """Ping every node. Returns the node states."""
+        for node in self.nodes:
+            self.check_node(node)
+        return [node.to_dict() for node in self.nodes]
+    
+    def _recheck_due_nodes(self):
+        """Ping unhealthy nodes whose retry interval has passed, in the background."""
+        now = time.monotonic()
+        with self._available:
+            due = [
+                node for node in self.nodes
+                if not node.healthy and not node.checking and now - node.checked_at >= self.retry_interval
+            ]
+            for node in due:
+                node.checking = True
+        for node in due:
+            threading.Thread(target=self.check_node, args=(node,), daemon=True).start()
+    
+    def _acquire(self, exclude):
+        """Reserve a slot on the least-loaded healthy node, waiting if all are busy."""
+        self._recheck_due_nodes()
+        deadline = time.monotonic() + self.queue_timeout
+        with self._available:
+            while True:
+                candidates = [
+                    node for node in self.nodes
+                    if node.healthy and node.has_capacity() and node not in exclude
+                ]
+                if candidates:
+                    node = min(candidates, key=lambda n: n.load)
+                    node.active += 1
+                    return node
+                # A node that is being re-checked may come back before the deadline
+                if not any((node.healthy or node.checking) and node not in exclude for node in self.nodes):
+                    raise NoExecutorAvailable("No executor node available")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise NoExecutorAvailable("All executor nodes are at capacity")
+                self._available.wait(remaining)
+    
+    def _release(self, node):
+        with self._available:
+            node.active -= 1
+            self._available.notify()
+    
+    def execute(self, code, language, stdin=None, timeout=None, max_memory_mb=None, profile=False):
+        """Run code on a remote node, failing over to the next node on errors."""
+        timeout = timeout or settings.EXECUTION_TIMEOUT
+        message = {
+            'op': 'execute',
+            'code': code,
+            'language': language,
+            'stdin': stdin,
+            'timeout': timeout,
+            'max_memory_mb': max_memory_mb,
+            'profile': profile,
+        }
+        # Allow for compilation and transfer on top of the run timeout
+        return self.dispatch(message, self.connect_timeout + 2 * timeout)
+    
+    def benchmark(self, code, language, stdin=None, runs=5, warmup=1, pin_cpu=False, timeout=None):
+        """Run a repeat-run benchmark on a remote node."""
+        timeout = timeout or settings.EXECUTION_TIMEOUT
+        message = {
+            'op': 'benchmark',
+            'code': code,
+            'language': language,
+            'stdin': stdin,
+            'runs': runs,
+            'warmup': warmup,
+            'pin_cpu': pin_cpu,
+            'timeout': timeout,
+        }
+        return self.dispatch(message, self.connect_timeout + 2 * timeout + settings.BENCHMARK_TIME_LIMIT)
+    
+    def project(self, key, files, entry_point, language, stdin=None, timeout=None):
+        """Run a multi-file project on a remote node, which keeps its own build cache."""
+        timeout = timeout or settings.EXECUTION_TIMEOUT
+        message = {
+            'op': 'project',
+            'key': str(key),
+            'files': files,
+            'entry_point': entry_point,
+            'language': language,
+            'stdin': stdin,
+            'timeout': timeout,
+        }
+        return self.dispatch(message, self.connect_timeout + 2 * timeout)
+    
+    def _send(self, node, message):
+        """Connect and send the request. Returns the socket, or None if the node is unreachable."""
+        try:
+            sock = connect(node.address, self.connect_timeout)
+        except OSError:
+            return None
+        try:
+            send_message(sock, message)
+        except OSError:
+            sock.close()
+            return None
+        except ProtocolError as e:
+            sock.close()
+            raise NoExecutorAvailable(str(e))
+        return sock
+    
+    def _receive(self, node, sock, response_timeout):
+        """Wait for the response to a request the node already has."""
+        sock.settimeout(response_timeout)
+        try:
+            return recv_message(sock)
+        except TimeoutError:
+            raise ExecutorTimeout(f"No response from {node.address} within {response_timeout:g} seconds")
+        except (OSError, EOFError, ProtocolError) as e:
+            self._mark_failed(node)
+            raise ExecutorConnectionLost(f"Lost connection to {node.address} during the run: {e}")
+    
+    def dispatch(self, message, response_timeout):
+        """
+        Send a request to a node with a free slot and wait for its response.
+        
+        Only requests that never reached a node are retried elsewhere: a
+        refused connection, a failed send or a busy reply. Once a node has
+        the request, a missing response raises ExecutorTimeout or
+        ExecutorConnectionLost instead, so slow code never runs twice.
+        """
+        message = {**message, 'secret': settings.EXECUTOR_SECRET}
+        tried = set()
+        while True:
+            node = self._acquire(tried)
+            try:
+                sock = self._send(node, message)
+                if sock is None:
+                    self._mark_failed(node)
+                    tried.add(node)
+                    continue
+                try:
+                    response = self._receive(node, sock, response_timeout)
+                finally:
+                    sock.close()
+            finally:
+                self._release(node)
+            
+            if response.get('ok'):
+                return response['result']
+            if response.get('busy'):
+                # The daemon is shared with other web workers; try elsewhere
+                tried.add(node)
+                continue
+            raise NoExecutorAvailable(response.get('error', 'Executor error'))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Get the process-wide pool for settings.EXECUTOR_NODES."""
+    global _pool
+    with _pool_lock:
+        addresses = list(settings.EXECUTOR_NODES)
+        if _pool is None or [node.address for node in _pool.nodes] != addresses:
+            _pool = RemoteExecutorPool(addresses)
+        return _pool
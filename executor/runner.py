@@ -1,5 +1,10 @@
 """High-level code execution runner."""
 
+from contextlib import contextmanager, nullcontext
+from django.conf import settings
+from code_editor.request_profiler import track
+from .cpus import NoFreeCpu, get_allocator
+from .precheck import check_syntax
 from .sandbox import Sandbox
 from .languages import get_language
 
@@ -7,9 +12,41 @@ class CodeRunner:
     """Execute code with proper error handling."""
     
     @staticmethod
-    def run(code, language, stdin=None, timeout=None, max_memory_mb=None):
+    @track('sandbox')
+    def run(code, language, stdin=None, timeout=None, max_memory_mb=None, profile=False,
+            expected_runtime=None, priority='interactive'):
         """
-        Execute code and return results.
+        Execute code on the configured backend and return results.
+        
+        With EXECUTOR_BACKEND = 'remote' the code runs on one of the
+        EXECUTOR_NODES daemons, otherwise in a sandbox on this host.
+        expected_runtime and priority order local runs when every
+        sandbox slot on the host is taken. Code with a syntax error is rejected without
+        starting a sandbox.
+        """
+        syntax_error = check_syntax(code, language)
+        if syntax_error is not None:
+            return CodeRunner._syntax_error_dict(syntax_error)
+        if settings.EXECUTOR_BACKEND == 'remote':
+            return CodeRunner.run_remote(code, language, stdin, timeout, max_memory_mb, profile)
+        return CodeRunner.run_local(code, language, stdin, timeout, max_memory_mb, profile, expected_runtime, priority)
+    
+    @staticmethod
+    def run_remote(code, language, stdin=None, timeout=None, max_memory_mb=None, profile=False):
+        """Execute code on an executor daemon. Same arguments and result as run_local."""
+        from .remote import get_pool, ExecutorTimeout, NoExecutorAvailable
+        try:
+            return get_pool().execute(code, language, stdin, timeout, max_memory_mb, profile)
+        except ExecutorTimeout:
+            return CodeRunner._timeout_dict(timeout)
+        except NoExecutorAvailable as e:
+            return CodeRunner._error_dict(str(e))
+    
+    @staticmethod
+    def run_local(code, language, stdin=None, timeout=None, max_memory_mb=None, profile=False,
+                  expected_runtime=None, priority='interactive'):
+        """
+        Execute code in a sandbox on this host and return results.
         
         Args:
             code: Source code to execute
@@ -17,9 +54,12 @@ class CodeRunner:
             stdin: Optional standard input
             timeout: Execution timeout in seconds
             max_memory_mb: Maximum memory in MB
+            profile: Run under the language's profiler, if it has one
+            expected_runtime: Predicted seconds, for shortest-expected-job-first dispatch
+            priority: 'interactive' or 'batch'
             
         Returns:
-            dict with stdout, stderr, returncode, timeout, error
+            dict with stdout, stderr, returncode, timeout, error, profile
         """
         if not get_language(language):
             return {
@@ -30,9 +70,119 @@ class CodeRunner:
                 'error': f'Language {language} not supported'
             }
         
-        sandbox = Sandbox(timeout=timeout, max_memory_mb=max_memory_mb)
-        result = sandbox.execute(code, language, stdin)
+        try:
+            with CodeRunner._scheduled(expected_runtime, priority) as cpus:
+                sandbox = Sandbox(timeout=timeout, max_memory_mb=max_memory_mb, cpus=cpus)
+                result = sandbox.execute(code, language, stdin, profile=profile)
+        except NoFreeCpu as e:
+            return CodeRunner._error_dict(str(e))
+        
+        return CodeRunner._result_dict(result)
+    
+    @staticmethod
+    @track('sandbox')
+    def benchmark(code, language, stdin=None, runs=5, warmup=1, pin_cpu=False, timeout=None, expected_runtime=None):
+        """
+        Compile once and run the program repeatedly on the configured backend.
+        
+        Returns the run dict of the last run plus a 'benchmark' summary
+        with min, median, mean, stdev, peak memory and outlier runs.
+        """
+        syntax_error = check_syntax(code, language)
+        if syntax_error is not None:
+            return CodeRunner._syntax_error_dict(syntax_error)
+        if settings.EXECUTOR_BACKEND == 'remote':
+            from .remote import get_pool, ExecutorTimeout, NoExecutorAvailable
+            try:
+                return get_pool().benchmark(code, language, stdin, runs, warmup, pin_cpu, timeout)
+            except ExecutorTimeout:
+                return CodeRunner._timeout_dict(timeout)
+            except NoExecutorAvailable as e:
+                return CodeRunner._error_dict(str(e))
+        return CodeRunner.benchmark_local(code, language, stdin, runs, warmup, pin_cpu, timeout, expected_runtime)
+    
+    @staticmethod
+    def benchmark_local(code, language, stdin=None, runs=5, warmup=1, pin_cpu=False, timeout=None,
+                        expected_runtime=None):
+        """Run a benchmark in a sandbox on this host, scheduled as a batch job."""
+        if not get_language(language):
+            return CodeRunner._error_dict(f'Language {language} not supported')
+        
+        if expected_runtime is not None:
+            expected_runtime *= runs + warmup
+        try:
+            with CodeRunner._scheduled(expected_runtime, 'batch') as reserved:
+                # BENCHMARK_CPUS, when set, overrides the reserved cores for measured runs
+                cpus = set(settings.BENCHMARK_CPUS) if pin_cpu and settings.BENCHMARK_CPUS else reserved
+                sandbox = Sandbox(timeout=timeout, cpus=reserved)
+                result = sandbox.benchmark(
+                    code, language, stdin,
+                    runs=runs,
+                    warmup=warmup,
+                    cpus=cpus,
+                    time_limit=settings.BENCHMARK_TIME_LIMIT,
+                )
+        except NoFreeCpu as e:
+            return CodeRunner._error_dict(str(e))
+        return CodeRunner._result_dict(result)
+    
+    @staticmethod
+    @track('sandbox')
+    def run_project(key, files, entry_point, language, stdin=None, timeout=None,
+                    expected_runtime=None, priority='interactive'):
+        """
+        Run a multi-file project on the configured backend.
+        
+        Args:
+            key: Workspace identifier; runs with the same key reuse earlier builds
+            files: {relative path: content} of every file in the project
+            entry_point: Path of the file to run
+            
+        Returns the run dict plus 'build' with the changed, removed and
+        compiled paths and whether the build was done from scratch.
+        """
+        if settings.EXECUTOR_BACKEND == 'remote':
+            from .remote import get_pool, ExecutorTimeout, NoExecutorAvailable
+            try:
+                return get_pool().project(key, files, entry_point, language, stdin, timeout)
+            except ExecutorTimeout:
+                return {**CodeRunner._timeout_dict(timeout), 'build': None}
+            except NoExecutorAvailable as e:
+                return {**CodeRunner._error_dict(str(e)), 'build': None}
+        return CodeRunner.run_project_local(key, files, entry_point, language, stdin, timeout,
+                                            expected_runtime, priority)
+    
+    @staticmethod
+    def run_project_local(key, files, entry_point, language, stdin=None, timeout=None,
+                          expected_runtime=None, priority='interactive'):
+        """Run a multi-file project in its workspace on this host."""
+        if not get_language(language):
+            return {**CodeRunner._error_dict(f'Language {language} not supported'), 'build': None}
+        
+        try:
+            with CodeRunner._scheduled(expected_runtime, priority) as cpus:
+                sandbox = Sandbox(timeout=timeout, cpus=cpus)
+                result = sandbox.execute_project(key, files, entry_point, language, stdin)
+        except NoFreeCpu as e:
+            return {**CodeRunner._error_dict(str(e)), 'build': None}
+        return {**CodeRunner._result_dict(result), 'build': result.build}
+    
+    @staticmethod
+    @contextmanager
+    def _scheduled(expected_runtime, priority):
+        """
+        Hold a sandbox slot for a local run, queueing host-wide by expected
+        runtime and priority when none is free.
         
+        Yields the cores to pin the run to, or None for an unpinned slot or
+        when slots are off. Raises NoFreeCpu if no slot frees up in time.
+        """
+        allocator = get_allocator()
+        with allocator.reserve(expected=expected_runtime, priority=priority) if allocator else nullcontext() as cpus:
+            yield cpus
+    
+    @staticmethod
+    def _result_dict(result):
         return {
             'stdout': result.stdout,
             'stderr': result.stderr,
@@ -41,4 +191,40 @@ class CodeRunner:
             'memory_exceeded': result.memory_exceeded,
             'error': result.error,
             'execution_time': result.execution_time,
+            'profile': result.profile,
+            'benchmark': result.benchmark,
+        }
+    
+    @staticmethod
+    def _error_dict(error):
+        return {
+            'stdout': '',
+            'stderr': '',
+            'returncode': None,
+            'timeout': False,
+            'memory_exceeded': False,
+            'error': error,
+            'execution_time': 0,
+            'profile': None,
+            'benchmark': None,
+        }
+    
+    @staticmethod
+    def _timeout_dict(timeout):
+        # Same shape as a sandbox run killed at its time limit
+        timeout = timeout or settings.EXECUTION_TIMEOUT
+        return {
+            **CodeRunner._error_dict(None),
+            'stderr': f"Execution timeout after {timeout} seconds",
+            'timeout': True,
+            'execution_time': timeout,
+        }
+    
+    @staticmethod
+    def _syntax_error_dict(stderr):
+        # Same shape as a sandbox run that failed to parse or compile
+        return {
+            **CodeRunner._error_dict(None),
+            'stderr': stderr,
+            'returncode': 1,
         }
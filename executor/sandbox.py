@@ -1,13 +1,25 @@
 """Secure sandbox for code execution with resource limits."""
 
+import functools
+import resource
 import subprocess
 import tempfile
 import os
 import signal
-import psutil
+import threading
+import time
 from pathlib import Path
 from django.conf import settings
-from .languages import get_language, is_compiled_language
+from .languages import get_language, is_compiled_language, supports_in_memory, supports_profiling
+from .profiling import load_profile
+from .benchmark import summarize
+from .cpus import pinned
+from .projects import ProjectWorkspace, java_main_class
+
+# Largest file a measured run may write its stdout or stderr to. Only
+# MAX_OUTPUT_SIZE is read back; the limit keeps a program that prints in a
+# loop from filling the temp filesystem before it times out
+MEASURED_OUTPUT_LIMIT = 16 * 1024 * 1024
 
 class ExecutionResult:
     """Container for execution results."""
@@ -19,18 +31,29 @@ class ExecutionResult:
         self.memory_exceeded = False
         self.error = None
         self.execution_time = 0
+        self.profile = None
+        self.benchmark = None
+        self.build = None
 
 class Sandbox:
     """Secure execution sandbox with resource limits."""
     
-    def __init__(self, timeout=None, max_memory_mb=None):
+    def __init__(self, timeout=None, max_memory_mb=None, in_memory=None, cpus=None):
         self.timeout = timeout or settings.EXECUTION_TIMEOUT
         self.max_memory_mb = max_memory_mb or settings.MAX_MEMORY_MB
         self.max_output_size = settings.MAX_OUTPUT_SIZE
         self.temp_dir = settings.TEMP_DIR
+        self.in_memory = settings.EXECUTION_IN_MEMORY if in_memory is None else in_memory
+        # Cores every process of this sandbox is pinned to, or None
+        self.cpus = cpus
+        
+    def execute(self, code, language, stdin=None, profile=False):
+        """
+        Execute code in sandbox with resource limits.
         
-    def execute(self, code, language, stdin=None):
-        """Execute code in sandbox with resource limits."""
+        With profile=True, languages that support it run under their
+        profiler and result.profile holds the summarized profile.
+        """
         result = ExecutionResult()
         
         try:
@@ -39,20 +62,13 @@ class Sandbox:
                 result.error = f"Unsupported language: {language}"
                 return result
             
-            # For Java, extract class name from code
-            if language == 'java':
-                temp_file = self._create_java_file(code)
-            else:
-                # Create temporary file for other languages
-                with tempfile.NamedTemporaryFile(
-                    mode='w',
-                    suffix=lang_config['extension'],
-                    dir=self.temp_dir,
-                    delete=False
-                ) as f:
-                    f.write(code)
-                    temp_file = f.name
+            # Profilers write their output next to the source, so they need a real file
+            if self.in_memory and not profile and self._can_run_in_memory(language):
+                return self._execute_in_memory(code, lang_config, stdin)
             
+            temp_file = self._write_source(code, language, lang_config)
+            
+            profile_file = None
             try:
                 # Compile if needed
                 if is_compiled_language(language):
@@ -64,18 +80,185 @@ class Sandbox:
                         return result
                 
                 # Run the code
-                run_cmd = lang_config['run_command'](temp_file)
-                result = self._run_process(run_cmd, stdin)
+                if profile and supports_profiling(language):
+                    profile_file = os.path.splitext(temp_file)[0] + '.' + lang_config['profile_format']
+                    run_cmd = lang_config['profile_command'](temp_file, os.path.basename(profile_file))
+                    result = self._run_process(run_cmd, stdin)
+                    result.profile = load_profile(lang_config['profile_format'], profile_file)
+                else:
+                    run_cmd = lang_config['run_command'](temp_file)
+                    result = self._run_process(run_cmd, stdin)
                 
             finally:
                 # Cleanup
                 self._cleanup_temp_files(temp_file, language)
+                if profile_file and os.path.exists(profile_file):
+                    os.remove(profile_file)
+                
+        except Exception as e:
+            result.error = str(e)
+            
+        return result
+    
+    def benchmark(self, code, language, stdin=None, runs=5, warmup=1, cpus=None, time_limit=None):
+        """
+        Compile once, then run the program warmup + runs times.
+        
+        Args:
+            runs: Number of measured runs
+            warmup: Number of unmeasured runs before measuring
+            cpus: Optional set of CPU ids to pin every run to
+            time_limit: Seconds the whole benchmark may take; a run is only
+                started if it would finish in time even at the run timeout
+            
+        Returns:
+            ExecutionResult of the last run with result.benchmark set to the
+            summary statistics. A failing run stops the benchmark.
+        """
+        result = ExecutionResult()
+        # The limit covers compiling too
+        deadline = time.monotonic() + (time_limit or float('inf'))
+        
+        try:
+            lang_config = get_language(language)
+            if not lang_config:
+                result.error = f"Unsupported language: {language}"
+                return result
+            
+            temp_file = self._write_source(code, language, lang_config)
+            try:
+                if is_compiled_language(language):
+                    compile_cmd = lang_config['compile_command'](temp_file)
+                    compile_result = self._run_process(compile_cmd, None)
+                    if compile_result.returncode != 0:
+                        result.stderr = compile_result.stderr
+                        result.returncode = compile_result.returncode
+                        return result
+                
+                run_cmd = lang_config['run_command'](temp_file)
+                times = []
+                peak_memory_kb = 0
+                executed = 0
+                for i in range(warmup + runs):
+                    # Only start a run that would end within the limit even if it timed out
+                    if time.monotonic() + self.timeout > deadline:
+                        break
+                    result, elapsed, max_rss_kb = self._run_measured(run_cmd, stdin, cpus)
+                    executed += 1
+                    if result.error or result.timeout or result.returncode != 0:
+                        break
+                    peak_memory_kb = max(peak_memory_kb, max_rss_kb)
+                    if i >= warmup:
+                        times.append(elapsed)
+                
+                result.benchmark = summarize(times, peak_memory_kb)
+                result.benchmark['warmup'] = warmup
+                result.benchmark['requested_runs'] = runs
+                result.benchmark['executed_runs'] = executed
+                result.benchmark['pinned_cpus'] = sorted(cpus) if cpus else None
+                result.execution_time = result.benchmark['median'] or 0
+            finally:
+                self._cleanup_temp_files(temp_file, language)
                 
         except Exception as e:
             result.error = str(e)
             
         return result
     
+    def execute_project(self, key, files, entry_point, language, stdin=None):
+        """
+        Run a multi-file project from its cached workspace.
+        
+        Args:
+            key: Workspace identifier, normally the project id
+            files: {relative path: content} of every file in the project
+            entry_point: Path of the file to run
+            
+        Only files whose content changed are written. Java recompiles only
+        the changed sources and the sources that use them, against the
+        classes built on earlier runs. result.build lists what changed and
+        what was compiled.
+        """
+        result = ExecutionResult()
+        
+        try:
+            lang_config = get_language(language)
+            if not lang_config:
+                result.error = f"Unsupported language: {language}"
+                return result
+            if entry_point not in files:
+                result.error = f"Entry point not found: {entry_point}"
+                return result
+            
+            workspace = ProjectWorkspace(key)
+            with workspace.locked():
+                changed, removed = workspace.sync(files)
+                build = {'changed': changed, 'removed': removed, 'compiled': [], 'full_rebuild': False}
+                
+                if language == 'java':
+                    sources, build['full_rebuild'] = workspace.java_sources_to_compile(files, removed)
+                    if sources:
+                        workspace.build.mkdir(parents=True, exist_ok=True)
+                        build_dir = str(workspace.build)
+                        compile_cmd = ['javac', '-d', build_dir, '-cp', build_dir, '-sourcepath', '.', *sources]
+                        compile_result = self._run_process(compile_cmd, None, cwd=workspace.src)
+                        if compile_result.returncode != 0:
+                            # Leave the compiled hashes alone so the next run retries these sources
+                            compile_result.build = build
+                            return compile_result
+                        workspace.mark_compiled(files, sources)
+                        build['compiled'] = sources
+                    run_cmd = ['java', '-cp', str(workspace.build), java_main_class(entry_point, files[entry_point])]
+                else:
+                    run_cmd = [lang_config['command'], entry_point]
+                
+                result = self._run_process(run_cmd, stdin, cwd=workspace.src)
+                result.build = build
+                
+        except Exception as e:
+            result.error = str(e)
+            
+        return result
+    
+    @staticmethod
+    def _can_run_in_memory(language):
+        return hasattr(os, 'memfd_create') and supports_in_memory(language)
+    
+    def _execute_in_memory(self, code, lang_config, stdin):
+        """
+        Run interpreted code without touching the disk.
+        
+        The source goes into an anonymous memfd that the child inherits and
+        opens as /dev/fd/N. Opening that path reopens the memfd from the
+        start, so tracebacks can show source lines and __file__ can be read.
+        """
+        fd = os.memfd_create(f"main{lang_config['extension']}", os.MFD_CLOEXEC)
+        try:
+            data = code.encode('utf-8')
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+            run_cmd = lang_config['memory_run_command'](f'/dev/fd/{fd}')
+            return self._run_process(run_cmd, stdin, pass_fds=(fd,))
+        finally:
+            os.close(fd)
+    
+    def _write_source(self, code, language, lang_config):
+        """Write code to a source file in the temp directory."""
+        # For Java, extract class name from code
+        if language == 'java':
+            return self._create_java_file(code)
+        
+        # Create temporary file for other languages
+        with tempfile.NamedTemporaryFile(
+            mode='w',
+            suffix=lang_config['extension'],
+            dir=self.temp_dir,
+            delete=False
+        ) as f:
+            f.write(code)
+            return f.name
+    
     def _create_java_file(self, code):
         """Create Java file with proper class name matching."""
         import re
@@ -99,8 +282,8 @@ class Sandbox:
         
         return temp_file
     
-    def _run_process(self, command, stdin):
-        """Run process with resource limits."""
+    def _run_process(self, command, stdin, pass_fds=(), cwd=None):
+        """Run process with resource limits, in cwd or the temp directory."""
         result = ExecutionResult()
         process = None
         
@@ -108,14 +291,17 @@ class Sandbox:
             # Ensure temp_dir exists
             os.makedirs(self.temp_dir, exist_ok=True)
             
-            process = subprocess.Popen(
-                command,
-                stdin=subprocess.PIPE if stdin else None,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=str(self.temp_dir),
-            )
+            start = time.perf_counter()
+            with pinned(self.cpus):
+                process = subprocess.Popen(
+                    command,
+                    stdin=subprocess.PIPE if stdin else None,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    cwd=str(cwd or self.temp_dir),
+                    pass_fds=pass_fds,
+                )
             
             try:
                 stdout, stderr = process.communicate(
@@ -130,6 +316,8 @@ class Sandbox:
                 process.kill()
                 result.timeout = True
                 result.stderr = f"Execution timeout after {self.timeout} seconds"
+            
+            result.execution_time = round(time.perf_counter() - start, 6)
                 
         except Exception as e:
             result.error = str(e)
@@ -143,6 +331,86 @@ class Sandbox:
                     
         return result
     
+    def _run_measured(self, command, stdin, cpus=None):
+        """
+        Run a process and measure it precisely.
+        
+        Output goes to temporary files so the parent can block in wait4
+        instead of a communicate loop. Peak memory is VmHWM of the exec'd
+        program; ru_maxrss would include the forked copy of this process.
+        
+        Returns:
+            (ExecutionResult, elapsed seconds, peak RSS in KiB)
+        """
+        result = ExecutionResult()
+        elapsed = 0
+        max_rss_kb = 0
+        
+        with tempfile.TemporaryFile() as stdin_file, \
+                tempfile.TemporaryFile() as stdout_file, \
+                tempfile.TemporaryFile() as stderr_file:
+            stdin_file.write((stdin or '').encode())
+            stdin_file.seek(0)
+            
+            start = time.perf_counter()
+            with pinned(cpus or self.cpus):
+                process = subprocess.Popen(
+                    command,
+                    stdin=stdin_file,
+                    stdout=stdout_file,
+                    stderr=stderr_file,
+                    cwd=str(self.temp_dir),
+                    preexec_fn=functools.partial(
+                        resource.setrlimit, resource.RLIMIT_FSIZE, (MEASURED_OUTPUT_LIMIT, MEASURED_OUTPUT_LIMIT)
+                    ),
+                )
+            
+            timer = threading.Timer(self.timeout, process.kill)
+            finished = threading.Event()
+            peak = [0]
+            watcher = threading.Thread(target=self._watch_peak_memory, args=(process.pid, finished, peak))
+            timer.start()
+            watcher.start()
+            try:
+                _, status, _ = os.wait4(process.pid, 0)
+            finally:
+                elapsed = time.perf_counter() - start
+                finished.set()
+                timer.cancel()
+                watcher.join()
+            
+            # Tell Popen the child is already reaped
+            process.returncode = os.waitstatus_to_exitcode(status)
+            max_rss_kb = peak[0]
+            
+            if elapsed >= self.timeout and process.returncode == -signal.SIGKILL:
+                result.timeout = True
+                result.stderr = f"Execution timeout after {self.timeout} seconds"
+            else:
+                stdout_file.seek(0)
+                stderr_file.seek(0)
+                result.stdout = stdout_file.read(self.max_output_size).decode(errors='replace')
+                result.stderr = stderr_file.read(self.max_output_size).decode(errors='replace')
+                result.returncode = process.returncode
+            result.execution_time = elapsed
+        
+        return result, elapsed, max_rss_kb
+    
+    @staticmethod
+    def _watch_peak_memory(pid, finished, peak, interval=0.001):
+        """Poll a process's high-water RSS (KiB) from /proc until finished is set."""
+        status_path = f'/proc/{pid}/status'
+        while not finished.is_set():
+            try:
+                with open(status_path) as f:
+                    for line in f:
+                        if line.startswith('VmHWM:'):
+                            peak[0] = max(peak[0], int(line.split()[1]))
+                            break
+            except (OSError, ValueError):
+                return
+            finished.wait(interval)
+    
     def _cleanup_temp_files(self, temp_file, language):
         """Clean up temporary files."""
         try:
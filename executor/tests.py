@@ -0,0 +1,429 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from .benchmark import find_outliers, summarize
+from .cpus import CoreAllocator, NoFreeCpu, get_cpu_stats, record_usage
+from .daemon import create_server, server_address
+from .precheck import check_java, check_javascript, get_precheck_stats
+from .projects import ProjectWorkspace
+from .protocol import request
+from .remote import ExecutorTimeout, RemoteExecutorPool, NoExecutorAvailable
+from .runner import CodeRunner
+from .sandbox import Sandbox
+from .scheduler import simulate, summarize_simulation
+
+class ExecutorDaemonMixin:
+    def start_daemon(self, capacity=2, address='tcp://127.0.0.1:0'):
+        server = create_server(address, capacity)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+@override_settings(EXECUTOR_SECRET='test-secret')
+class ExecutorDaemonTests(ExecutorDaemonMixin, SimpleTestCase):
+    def test_health_and_execute(self):
+        address = server_address(self.start_daemon(capacity=3))
+        health = request(address, {'op': 'health'}, timeout=5)
+        self.assertEqual(health['capacity'], 3)
+        response = request(address, {
+            'op': 'execute', 'code': 'print(input())', 'language': 'python', 'stdin': 'hi\n', 'secret': 'test-secret',
+        }, timeout=15)
+        self.assertTrue(response['ok'])
+        self.assertEqual(response['result']['stdout'], 'hi\n')
+    
+    def test_unix_socket(self):
+        import tempfile, os
+        path = os.path.join(tempfile.mkdtemp(), 'executor.sock')
+        address = server_address(self.start_daemon(address=f'unix://{path}'))
+        self.assertTrue(request(address, {'op': 'health'}, timeout=5)['ok'])
+    
+    def test_busy_when_at_capacity(self):
+        server = self.start_daemon(capacity=1)
+        server._slots.acquire()
+        response = request(server_address(server), {
+            'op': 'execute', 'code': '', 'language': 'python', 'secret': 'test-secret',
+        }, timeout=5)
+        self.assertTrue(response['busy'])
+    
+    def test_runs_need_the_secret(self):
+        address = server_address(self.start_daemon())
+        for secret in (None, 'wrong'):
+            response = request(address, {'op': 'execute', 'code': 'print(1)', 'language': 'python', 'secret': secret}, timeout=5)
+            self.assertEqual(response, {'ok': False, 'error': 'Not authorized'})
+        self.assertTrue(request(address, {'op': 'health'}, timeout=5)['ok'])
+    
+    @override_settings(EXECUTION_TIMEOUT=3, MAX_MEMORY_MB=64)
+    def test_client_limits_are_capped(self):
+        address = server_address(self.start_daemon())
+        with mock.patch.object(CodeRunner, 'run_local', return_value={}) as run_local:
+            request(address, {
+                'op': 'execute', 'code': 'print(1)', 'language': 'python', 'secret': 'test-secret',
+                'timeout': 3600, 'max_memory_mb': 65536,
+            }, timeout=5)
+        self.assertEqual(run_local.call_args.kwargs['timeout'], 3)
+        self.assertEqual(run_local.call_args.kwargs['max_memory_mb'], 64)
+        with mock.patch.object(CodeRunner, 'benchmark_local', return_value={}) as benchmark_local:
+            request(address, {
+                'op': 'benchmark', 'code': 'print(1)', 'language': 'python', 'secret': 'test-secret',
+                'runs': 1000, 'warmup': 1000,
+            }, timeout=5)
+        self.assertEqual(benchmark_local.call_args.kwargs['runs'], settings.BENCHMARK_MAX_RUNS)
+        self.assertEqual(benchmark_local.call_args.kwargs['warmup'], 0)
+    
+    def test_bad_requests_are_answered(self):
+        address = server_address(self.start_daemon())
+        self.assertFalse(request(address, ['not', 'an', 'object'], timeout=5)['ok'])
+        with self.assertLogs('executor.daemon', 'ERROR'):
+            response = request(address, {'op': 'execute', 'language': None, 'secret': 'test-secret'}, timeout=5)
+        self.assertTrue(response['error'].startswith('Executor error'))
+        self.assertTrue(request(address, {'op': 'health'}, timeout=5)['ok'])
+
+@override_settings(EXECUTOR_SECRET='test-secret')
+class RemoteExecutorPoolTests(ExecutorDaemonMixin, SimpleTestCase):
+    def test_balances_across_nodes(self):
+        servers = [self.start_daemon(), self.start_daemon()]
+        pool = RemoteExecutorPool([server_address(s) for s in servers], capacity=1, queue_timeout=30)
+        threads = [
+            threading.Thread(target=pool.execute, args=('import time; time.sleep(0.3)', 'python'))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([s.completed for s in servers], [2, 2])
+    
+    def test_fails_over_from_dead_node(self):
+        dead = self.start_daemon()
+        dead_address = server_address(dead)
+        dead.shutdown()
+        dead.server_close()
+        live = self.start_daemon()
+        pool = RemoteExecutorPool([dead_address, server_address(live)], retry_interval=60)
+        result = pool.execute('print(6 * 7)', 'python')
+        self.assertEqual(result['stdout'], '42\n')
+        self.assertFalse(pool.nodes[0].healthy)
+        self.assertEqual(pool.health_check()[1]['healthy'], True)
+    
+    def test_slow_run_is_not_retried(self):
+        servers = [self.start_daemon(), self.start_daemon()]
+        pool = RemoteExecutorPool([server_address(s) for s in servers], retry_interval=60)
+        message = {'op': 'execute', 'code': 'import time; time.sleep(1)', 'language': 'python', 'timeout': 5}
+        with self.assertRaises(ExecutorTimeout):
+            pool.dispatch(message, response_timeout=0.3)
+        deadline = time.monotonic() + 10
+        while any(s.active for s in servers) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(sum(s.completed for s in servers), 1)
+        self.assertTrue(all(node.healthy for node in pool.nodes))
+    
+    def test_no_nodes_available(self):
+        pool = RemoteExecutorPool(['tcp://127.0.0.1:1'], retry_interval=60)
+        with self.assertRaises(NoExecutorAvailable):
+            pool.execute('print(1)', 'python')
+    
+    def test_code_runner_remote_backend(self):
+        address = server_address(self.start_daemon())
+        with override_settings(EXECUTOR_BACKEND='remote', EXECUTOR_NODES=[address]):
+            result = CodeRunner.run('print("remote")', 'python')
+        self.assertEqual(result['stdout'], 'remote\n')
+    
+    def test_remote_benchmark(self):
+        address = server_address(self.start_daemon())
+        with override_settings(EXECUTOR_BACKEND='remote', EXECUTOR_NODES=[address]):
+            result = CodeRunner.benchmark('print(1)', 'python', runs=2, warmup=0)
+        self.assertEqual(result['benchmark']['runs'], 2)
+
+class ProfilingTests(SimpleTestCase):
+    FIB_PYTHON = "def fib(n):\n    return n if n < 2 else fib(n - 1) + fib(n - 2)\nprint(fib(18))\n"
+    FIB_JS = "function fib(n) { return n < 2 ? n : fib(n - 1) + fib(n - 2); }\nconsole.log(fib(27));\n"
+    
+    def test_python_profile(self):
+        result = CodeRunner.run(self.FIB_PYTHON, 'python', profile=True)
+        self.assertEqual(result['stdout'], '2584\n')
+        functions = {row['function']: row for row in result['profile']['functions']}
+        self.assertGreater(functions['fib']['calls'], 1000)
+        self.assertTrue(any(';fib (' in line for line in result['profile']['collapsed']))
+    
+    def test_profile_is_opt_in(self):
+        self.assertIsNone(CodeRunner.run('print(1)', 'python')['profile'])
+    
+    @skipUnless(shutil.which('node'), 'node is not installed')
+    def test_javascript_profile(self):
+        result = CodeRunner.run(self.FIB_JS, 'javascript', profile=True)
+        self.assertEqual(result['stdout'], '196418\n')
+        self.assertIn('fib', [row['function'] for row in result['profile']['functions']])
+        self.assertLessEqual(len(result['profile']['collapsed']), 500)
+
+class BenchmarkTests(SimpleTestCase):
+    def test_summary_and_outliers(self):
+        summary = summarize([0.10, 0.11, 0.10, 0.12, 0.11, 0.90], 2048)
+        self.assertEqual(summary['runs'], 6)
+        self.assertEqual(summary['median'], 0.11)
+        self.assertEqual(summary['outliers'], [5])
+        self.assertEqual(find_outliers([0.1, 0.2]), [])
+    
+    def test_repeat_runs(self):
+        result = CodeRunner.benchmark('print(sum(range(1000)))', 'python', runs=3, warmup=1)
+        self.assertEqual(result['stdout'], '499500\n')
+        self.assertEqual(result['benchmark']['runs'], 3)
+        self.assertEqual(result['benchmark']['executed_runs'], 4)
+        self.assertEqual(len(result['benchmark']['times']), 3)
+        self.assertGreater(result['benchmark']['peak_memory_kb'], 0)
+        self.assertEqual(result['execution_time'], result['benchmark']['median'])
+    
+    def test_runs_that_could_overrun_the_limit_are_not_started(self):
+        result = Sandbox(timeout=2).benchmark('print(1)', 'python', runs=5, warmup=0, time_limit=1)
+        self.assertEqual(result.benchmark['executed_runs'], 0)
+        result = Sandbox(timeout=1).benchmark('print(1)', 'python', runs=2, warmup=0, time_limit=30)
+        self.assertEqual(result.benchmark['executed_runs'], 2)
+    
+    def test_measured_output_is_bounded(self):
+        with mock.patch('executor.sandbox.MEASURED_OUTPUT_LIMIT', 1000):
+            result, _, _ = Sandbox()._run_measured(['python3', '-c', "print('x' * 100000)"], None)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertLessEqual(len(result.stdout), 1000)
+
+class SchedulerTests(SimpleTestCase):
+    def test_sejf_beats_fifo_behind_long_job(self):
+        jobs = [{'arrival': 0.0, 'runtime': 1.0, 'expected': 1.0}, {'arrival': 0.1, 'runtime': 10.0, 'expected': 10.0}]
+        jobs += [{'arrival': 0.2 + i / 10, 'runtime': 0.1, 'expected': 0.1} for i in range(5)]
+        fifo = summarize_simulation(simulate(jobs, 1, 'fifo'))['all']
+        sejf = summarize_simulation(simulate(jobs, 1, 'sejf'))['all']
+        self.assertLess(sejf['mean_latency'], fifo['mean_latency'] / 2)
+    
+    def test_aging_prevents_starvation(self):
+        # Short jobs arrive faster than the only slot can run them for 30 seconds
+        jobs = [{'arrival': i / 10, 'runtime': 0.15, 'expected': 0.15} for i in range(200)]
+        jobs.append({'arrival': 0.05, 'runtime': 5.0, 'expected': 5.0, 'priority': 'batch'})
+        def long_latency(aging):
+            finished = simulate(jobs, 1, 'sejf', aging=aging, batch_offset=0)
+            return next(latency for job, _, latency in finished if job['runtime'] == 5.0)
+        self.assertLess(long_latency(1.0), 14)
+        self.assertGreater(long_latency(0.0), 29)
+
+@skipUnless(hasattr(os, 'memfd_create'), 'memfd_create is not available')
+class InMemoryExecutionTests(SimpleTestCase):
+    def test_python_runs_without_temp_file(self):
+        code = "print(open(__file__).read().splitlines()[0])\nprint(input())\nraise ValueError('boom')\n"
+        with mock.patch.object(Sandbox, '_write_source') as write_source:
+            result = Sandbox(in_memory=True).execute(code, 'python', 'hi\n')
+        write_source.assert_not_called()
+        self.assertEqual(result.stdout, "print(open(__file__).read().splitlines()[0])\nhi\n")
+        self.assertIn("raise ValueError('boom')", result.stderr)
+    
+    @skipUnless(shutil.which('node'), 'node is not installed')
+    def test_javascript_traceback_shows_source(self):
+        result = Sandbox(in_memory=True).execute('console.log(1);\nthrow new Error("boom");\n', 'javascript')
+        self.assertEqual(result.stdout, '1\n')
+        self.assertIn('throw new Error("boom");', result.stderr)
+    
+    def test_temp_file_mode_still_available(self):
+        result = Sandbox(in_memory=False).execute('print(2 + 2)', 'python')
+        self.assertEqual(result.stdout, '4\n')
+
+class SyntaxPrecheckTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+    
+    def test_python_syntax_error_skips_sandbox(self):
+        with mock.patch.object(Sandbox, 'execute') as execute:
+            result = CodeRunner.run('print(\n', 'python')
+        execute.assert_not_called()
+        self.assertEqual(result['returncode'], 1)
+        self.assertIn("SyntaxError: '(' was never closed", result['stderr'])
+        self.assertEqual(get_precheck_stats()['python'], 1)
+    
+    def test_valid_code_runs(self):
+        self.assertEqual(CodeRunner.run('print(1)', 'python')['stdout'], '1\n')
+        self.assertEqual(get_precheck_stats()['python'], 0)
+    
+    def test_java_structure(self):
+        self.assertIn('A.java:3: error: unclosed string literal', check_java(
+            'public class A {\n  void f() {\n    String s = "oops;\n  }\n}\n'
+        ))
+        self.assertIn('reached end of file while parsing', check_java('public class A {\n  void f() {\n  }\n'))
+        self.assertIsNone(check_java('public class A {\n  char c = \'}\'; // {\n  /* ( */\n}\n'))
+    
+    @skipUnless(shutil.which('node'), 'node is not installed')
+    def test_javascript_checker(self):
+        error = check_javascript('console.log(1);\nfoo(;\n')
+        self.assertEqual(error, "main.js:2\nfoo(;\n    ^\n\nSyntaxError: Unexpected token ';'\n")
+        # Valid in the CommonJS module wrapper
+        self.assertIsNone(check_javascript('return 5;'))
+
+@override_settings(EXECUTOR_SECRET='test-secret')
+class ProjectExecutionTests(ExecutorDaemonMixin, SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        settings_override = override_settings(TEMP_DIR=temp_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+    
+    def test_python_project_writes_only_changed_files(self):
+        files = {
+            'main.py': 'from pkg.greet import hello\nprint(hello(input()))\n',
+            'pkg/__init__.py': '',
+            'pkg/greet.py': 'def hello(name):\n    return "hi " + name\n',
+            'notes.txt': 'scratch',
+        }
+        result = Sandbox().execute_project('p1', files, 'main.py', 'python', 'ada\n')
+        self.assertEqual(result.stdout, 'hi ada\n')
+        self.assertEqual(len(result.build['changed']), 4)
+        
+        files['pkg/greet.py'] = 'def hello(name):\n    return "hello " + name\n'
+        del files['notes.txt']
+        result = Sandbox().execute_project('p1', files, 'main.py', 'python', 'ada\n')
+        self.assertEqual(result.stdout, 'hello ada\n')
+        self.assertEqual(result.build['changed'], ['pkg/greet.py'])
+        self.assertEqual(result.build['removed'], ['notes.txt'])
+        self.assertFalse((ProjectWorkspace('p1').src / 'notes.txt').exists())
+    
+    def test_java_compile_set_includes_dependents(self):
+        files = {
+            'Main.java': 'public class Main { public static void main(String[] a) { System.out.println(Util.twice(2)); } }',
+            'Util.java': 'public class Util { static int twice(int x) { return 2 * x; } }',
+            'Other.java': 'public class Other {}',
+        }
+        with ProjectWorkspace('j1').locked() as workspace:
+            workspace.sync(files)
+            self.assertEqual(workspace.java_sources_to_compile(files, [])[1], True)
+            workspace.build.mkdir()
+            workspace.mark_compiled(files, list(files))
+            self.assertEqual(workspace.java_sources_to_compile(files, []), ([], False))
+            
+            files['Util.java'] = files['Util.java'].replace('2 * x', 'x + x')
+            self.assertEqual(workspace.java_sources_to_compile(files, []), (['Main.java', 'Util.java'], False))
+            self.assertEqual(workspace.java_sources_to_compile(files, ['Gone.java'])[1], True)
+    
+    @skipUnless(shutil.which('javac'), 'javac is not installed')
+    def test_java_incremental_build(self):
+        files = {
+            'app/Main.java': 'package app;\npublic class Main { public static void main(String[] a) { System.out.println(Util.twice(2)); } }',
+            'app/Util.java': 'package app;\nclass Util { static int twice(int x) { return 2 * x; } }',
+            'app/Other.java': 'package app;\nclass Other {}',
+        }
+        result = Sandbox().execute_project('j2', files, 'app/Main.java', 'java')
+        self.assertEqual(result.stdout, '4\n')
+        self.assertEqual(len(result.build['compiled']), 3)
+        
+        files['app/Main.java'] = files['app/Main.java'].replace('twice(2)', 'twice(5)')
+        result = Sandbox().execute_project('j2', files, 'app/Main.java', 'java')
+        self.assertEqual(result.stdout, '10\n')
+        self.assertEqual(result.build['compiled'], ['app/Main.java'])
+    
+    def test_remote_project(self):
+        address = server_address(self.start_daemon())
+        files = {'main.py': 'import helper\nprint(helper.VALUE)\n', 'helper.py': 'VALUE = 7\n'}
+        with override_settings(EXECUTOR_BACKEND='remote', EXECUTOR_NODES=[address]):
+            result = CodeRunner.run_project(9, files, 'main.py', 'python')
+        self.assertEqual(result['stdout'], '7\n')
+        self.assertEqual(result['build']['changed'], ['helper.py', 'main.py'])
+
+@skipUnless(hasattr(os, 'sched_setaffinity'), 'CPU affinity is not supported')
+class CpuAllocationTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.cpu = min(os.sched_getaffinity(0))
+        self.lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.lock_dir, ignore_errors=True)
+    
+    def test_core_sets(self):
+        allocator = CoreAllocator([0, 1, 2, 3, 4], per_run=2, lock_dir=self.lock_dir)
+        self.assertEqual(allocator.core_sets, [{0, 1}, {2, 3}])
+    
+    def test_waits_for_a_free_core(self):
+        allocator = CoreAllocator([self.cpu], lock_dir=self.lock_dir)
+        other_process = CoreAllocator([self.cpu], lock_dir=self.lock_dir)
+        with allocator.reserve() as cpus:
+            self.assertEqual(cpus, {self.cpu})
+            with self.assertRaises(NoFreeCpu):
+                with other_process.reserve(timeout=0.05):
+                    pass
+        with other_process.reserve(timeout=0.05) as cpus:
+            self.assertEqual(cpus, {self.cpu})
+    
+    def test_waiter_gets_the_core_when_released(self):
+        allocator = CoreAllocator([self.cpu], lock_dir=self.lock_dir)
+        held, release = threading.Event(), threading.Event()
+        
+        def hold():
+            with CoreAllocator([self.cpu], lock_dir=self.lock_dir).reserve():
+                held.set()
+                release.wait()
+        
+        holder = threading.Thread(target=hold)
+        holder.start()
+        held.wait()
+        threading.Timer(0.1, release.set).start()
+        with allocator.reserve(timeout=5) as cpus:
+            self.assertEqual(cpus, {self.cpu})
+        holder.join()
+        with override_settings(SANDBOX_CPUS=[self.cpu]):
+            stats = get_cpu_stats(self.lock_dir)
+        self.assertEqual(stats[0]['runs'], 2)
+        self.assertGreater(stats[0]['wait_seconds'], 0.05)
+    
+    def test_waiting_runs_start_shortest_first(self):
+        # Separate allocators stand in for separate processes sharing the host
+        def allocator():
+            return CoreAllocator([], slots=1, lock_dir=self.lock_dir)
+        started = []
+        
+        def submit(name, expected, priority):
+            with allocator().reserve(timeout=5, expected=expected, priority=priority):
+                started.append(name)
+        
+        holder = allocator()
+        with holder.reserve(timeout=5) as cpus:
+            self.assertIsNone(cpus)
+            threads = [
+                threading.Thread(target=submit, args=('batch', 0.5, 'batch')),
+                threading.Thread(target=submit, args=('long', 20.0, 'interactive')),
+                threading.Thread(target=submit, args=('short', 0.1, 'interactive')),
+            ]
+            for count, thread in enumerate(threads, 1):
+                thread.start()
+                while len(holder._tickets()) < count:
+                    time.sleep(0.001)
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(started, ['short', 'long', 'batch'])
+        self.assertEqual(holder._tickets(), [])
+    
+    def test_dead_waiters_are_skipped(self):
+        allocator = CoreAllocator([], slots=1, lock_dir=self.lock_dir)
+        allocator.queue_dir.mkdir(parents=True)
+        # A ticket left behind by a process that died while waiting
+        (allocator.queue_dir / f'{0:020.6f}-1-1-0.ticket').touch()
+        with allocator.reserve(timeout=1):
+            pass
+        self.assertEqual(allocator._tickets(), [])
+    
+    def test_usage_is_shared_through_files(self):
+        with override_settings(SANDBOX_CPUS=[self.cpu]):
+            record_usage({self.cpu}, 0.5, 0.25, self.lock_dir)
+            record_usage({self.cpu}, 0.5, 0, self.lock_dir)
+            stats = get_cpu_stats(self.lock_dir)
+        self.assertEqual(stats[0]['runs'], 2)
+        self.assertEqual(stats[0]['busy_seconds'], 1.0)
+        self.assertEqual(stats[0]['wait_seconds'], 0.25)
+    
+    def test_runs_are_pinned_and_counted(self):
+        before = os.sched_getaffinity(0)
+        with override_settings(SANDBOX_CPUS=[self.cpu], TEMP_DIR=self.lock_dir):
+            result = CodeRunner.run('import os; print(sorted(os.sched_getaffinity(0)))', 'python')
+            stats = get_cpu_stats()
+        self.assertEqual(result['stdout'], f'[{self.cpu}]\n')
+        self.assertEqual(os.sched_getaffinity(0), before)
+        self.assertEqual(stats[0]['runs'], 1)
+        self.assertGreater(stats[0]['busy_seconds'], 0)
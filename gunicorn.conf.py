@@ -0,0 +1,70 @@
+"""Gunicorn settings, read automatically from the working directory.
+
+The application is loaded and warmed up once in the master, and the
+workers fork from it. They share its imported modules and compiled
+templates copy-on-write, and start serving without a cold first request.
+Set GUNICORN_PRELOAD=False to load the application in each worker instead,
+e.g. to pick up code changes with a graceful reload (HUP).
+"""
+
+import gc
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'code_editor.settings')
+
+def request_time_limit(settings):
+    """
+    Longest a request may legitimately take: a run, or a benchmark, after
+    waiting for a sandbox slot or an executor node. Compiling can take up to
+    another run timeout.
+    """
+    local = settings.SANDBOX_CPU_WAIT_TIMEOUT + max(2 * settings.EXECUTION_TIMEOUT, settings.BENCHMARK_TIME_LIMIT)
+    remote = (settings.EXECUTOR_QUEUE_TIMEOUT + settings.EXECUTOR_CONNECT_TIMEOUT
+              + 2 * settings.EXECUTION_TIMEOUT + settings.BENCHMARK_TIME_LIMIT)
+    return remote if settings.EXECUTOR_BACKEND == 'remote' else local
+
+def _default_timeout():
+    from django.conf import settings
+    # Room for the database and response on top of the sandbox
+    return int(request_time_limit(settings)) + 10
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+# Sync workers that take longer are killed, so leave room for the slowest run
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '0')) or _default_timeout()
+
+def when_ready(server):
+    from django.conf import settings
+    if server.cfg.timeout < request_time_limit(settings):
+        # Runs that legitimately take this long would be killed mid-request
+        raise RuntimeError(
+            f'Worker timeout {server.cfg.timeout}s is shorter than the {request_time_limit(settings):.0f}s '
+            'a run may take; raise GUNICORN_TIMEOUT or lower the execution limits'
+        )
+    if not server.cfg.preload_app:
+        return
+    from code_editor import warmup
+    if settings.WARMUP_ON_START:
+        server.log.info('Master %s', warmup.describe(warmup.warm_up_process()))
+    warmup.close_connections()
+    # Objects that exist now are never scanned by the collector again, so
+    # collections in the workers do not write to, and copy, the shared pages
+    gc.freeze()
+
+def post_worker_init(worker):
+    from django.conf import settings
+    from accounts.backends import process_local_caching
+    from code_editor import warmup
+    local = process_local_caching()
+    if local and worker.cfg.workers > 1:
+        # A failed worker boot stops the master
+        raise RuntimeError(
+            f"{' and '.join(local)} need a cache shared by all {worker.cfg.workers} workers: "
+            'set CACHE_BACKEND to file or redis, or run a single worker'
+        )
+    if not settings.WARMUP_ON_START:
+        return
+    timings = {} if worker.cfg.preload_app else warmup.warm_up_process()
+    timings.update(warmup.warm_up_worker())
+    worker.log.info('Worker %s %s', worker.pid, warmup.describe(timings))
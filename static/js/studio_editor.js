@@ -0,0 +1,455 @@
+class CodeStudioEditor {
+    constructor() {
+        this.currentLanguage = 'python';
+        this.isExecuting = false;
+        this.executionHistory = [];
+        this.snippets = [];
+        this.init();
+    }
+
+    init() {
+        this.setupElements();
+        this.setupEventListeners();
+    }
+
+    setupElements() {
+        this.editor = document.querySelector('.code-editor');
+        this.runBtn = document.querySelector('.run-btn');
+        this.outputContent = document.querySelector('.output-content');
+        this.languageSelector = document.querySelector('.language-selector');
+        this.outputInfo = document.getElementById('outputInfo');
+        this.profileToggle = document.getElementById('profileToggle');
+        this.navItems = document.querySelectorAll('.nav-item');
+    }
+
+    setupEventListeners() {
+        // Run button
+        this.runBtn.addEventListener('click', () => this.executeCode());
+
+        // Language selector
+        this.languageSelector.addEventListener('change', (e) => this.changeLanguage(e.target.value));
+
+        // Navigation
+        this.navItems.forEach(item => {
+            item.addEventListener('click', (e) => this.handleNavigation(e.target));
+        });
+
+        // Keyboard shortcuts
+        document.addEventListener('keydown', (e) => this.handleKeyboardShortcuts(e));
+
+        // File type selector
+        const fileTypeSelector = document.getElementById('fileTypeSelector');
+        if (fileTypeSelector) {
+            fileTypeSelector.addEventListener('change', (e) => changeFileType(e.target.value));
+        }
+    }
+
+    async executeCode() {
+        const code = this.editor.value;
+        if (!code.trim()) {
+            this.showOutput('Please write some code first', 'warning');
+            return;
+        }
+
+        this.isExecuting = true;
+        this.runBtn.disabled = true;
+        this.runBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Running...';
+
+        try {
+            const startTime = performance.now();
+
+            const response = await fetch('/api/execution/execute/', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'X-CSRFToken': this.getCookie('csrftoken'),
+                },
+                body: JSON.stringify({
+                    code: code,
+                    language: this.currentLanguage,
+                    stdin: '',
+                    profile: this.profileToggle.checked,
+                })
+            });
+
+            const data = await response.json();
+            const endTime = performance.now();
+            const executionTime = ((endTime - startTime) / 1000).toFixed(3);
+
+            console.log('API Response:', data);
+            console.log('Stdout:', data.stdout);
+            console.log('Stderr:', data.stderr);
+
+            this.displayExecutionResults(data, executionTime);
+            this.addToHistory(data, executionTime);
+
+        } catch (error) {
+            this.showOutput(`Error: ${error.message}`, 'error');
+        } finally {
+            this.isExecuting = false;
+            this.runBtn.disabled = false;
+            this.runBtn.innerHTML = '<i class="fas fa-play"></i> Run Code';
+        }
+    }
+
+    displayExecutionResults(data, executionTime) {
+        let output = '';
+
+        // Execution info
+        output += `<div class="output-line info">⏱ Executed at ${new Date().toLocaleTimeString()}</div>`;
+
+        // Debug: log the data
+        console.log('Execution data:', data);
+
+        // Show stdout
+        if (data.stdout && data.stdout.trim()) {
+            const lines = data.stdout.split('\n');
+            lines.forEach(line => {
+                if (line.trim()) {
+                    output += `<div class="output-line">➜ ${line}</div>`;
+                }
+            });
+        } else if (!data.stdout || data.stdout.trim() === '') {
+            // If no stdout, show a message
+            if (data.status === 'success') {
+                output += `<div class="output-line info">✓ Program executed successfully (no output)</div>`;
+            }
+        }
+
+        // Show stderr
+        if (data.stderr && data.stderr.trim()) {
+            const lines = data.stderr.split('\n');
+            lines.forEach(line => {
+                if (line.trim()) {
+                    output += `<div class="output-line error">✗ ${line}</div>`;
+                }
+            });
+        }
+
+        // Show status
+        if (data.status === 'success') {
+            output += `<div class="output-line success">✓ [SUCCESS] Execution completed in ${executionTime}s</div>`;
+        } else if (data.status === 'error') {
+            output += `<div class="output-line error">✗ [ERROR] Execution failed</div>`;
+        } else if (data.status === 'timeout') {
+            output += `<div class="output-line warning">⏱ [TIMEOUT] Execution exceeded time limit</div>`;
+        }
+
+        // Profile
+        if (data.profile) {
+            output += this.renderProfile(data.profile);
+        } else if ('profile' in data) {
+            output += `<div class="output-line warning">Profiling is not available for this language</div>`;
+        }
+
+        // Remove empty class and set content
+        this.outputContent.classList.remove('empty');
+        this.outputContent.innerHTML = output;
+    }
+
+    // Safe in text and in quoted attribute values alike
+    escapeHtml(text) {
+        const entities = { '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;' };
+        return (text == null ? '' : String(text)).replace(/[&<>"']/g, char => entities[char]);
+    }
+
+    renderProfile(profile) {
+        const ms = (seconds) => (seconds * 1000).toFixed(2);
+        let html = '<div class="profile-section">';
+        html += `<div class="profile-heading">Profile (${ms(profile.total_time)} ms)</div>`;
+
+        // Hot functions
+        html += '<table class="profile-table"><thead><tr>' +
+            '<th>Function</th><th>Location</th><th>Calls</th><th>Self ms</th><th>Total ms</th>' +
+            '</tr></thead><tbody>';
+        profile.functions.slice(0, 15).forEach(row => {
+            html += `<tr><td>${this.escapeHtml(row.function)}</td>` +
+                `<td>${this.escapeHtml(row.location)}</td>` +
+                `<td class="num">${row.calls == null ? '' : row.calls}</td>` +
+                `<td class="num">${ms(row.self_time)}</td>` +
+                `<td class="num">${ms(row.total_time)}</td></tr>`;
+        });
+        html += '</tbody></table>';
+
+        // Flame graph from collapsed stacks ("a;b;c 123")
+        // Frame names are program-controlled, so children have no prototype
+        const root = { value: 0, children: Object.create(null) };
+        profile.collapsed.forEach(line => {
+            const split = line.lastIndexOf(' ');
+            const weight = parseInt(line.substring(split + 1), 10) || 0;
+            let node = root;
+            root.value += weight;
+            line.substring(0, split).split(';').forEach(frame => {
+                node.children[frame] = node.children[frame] || { value: 0, children: Object.create(null) };
+                node = node.children[frame];
+                node.value += weight;
+            });
+        });
+
+        const renderChildren = (node) => {
+            const entries = Object.entries(node.children)
+                .filter(([, child]) => child.value / root.value > 0.005)
+                .sort((a, b) => b[1].value - a[1].value);
+            if (!entries.length) return '';
+            return '<div class="flame-level">' + entries.map(([frame, child]) => {
+                const width = (child.value / node.value * 100).toFixed(3);
+                const title = `${frame} (${(child.value / 1000).toFixed(2)} ms)`;
+                return `<div class="flame-node" style="width: ${width}%">` +
+                    `<div class="flame-frame" title="${this.escapeHtml(title)}">${this.escapeHtml(frame)}</div>` +
+                    renderChildren(child) + '</div>';
+            }).join('') + '</div>';
+        };
+
+        if (root.value) {
+            html += '<div class="profile-heading">Flame graph</div>';
+            html += `<div class="flame-graph">${renderChildren(root)}</div>`;
+        }
+        return html + '</div>';
+    }
+
+    showOutput(message, type = 'info') {
+        const className = type === 'error' ? 'error' : type === 'warning' ? 'warning' : 'info';
+        this.outputContent.innerHTML = `<div class="output-line ${className}">${message}</div>`;
+    }
+
+    addToHistory(data, executionTime) {
+        const item = {
+            language: this.currentLanguage,
+            status: data.status,
+            time: new Date().toLocaleTimeString(),
+            executionTime: executionTime,
+            code: this.editor.value
+        };
+
+        this.executionHistory.unshift(item);
+    }
+
+
+    changeLanguage(lang) {
+        this.currentLanguage = lang;
+
+        // Update select value
+        const selector = document.getElementById('languageSelector');
+        if (selector) {
+            selector.value = lang;
+        }
+
+        // Update output info
+        const langInfo = {
+            'python': 'Running on Python 3.9.7',
+            'java': 'Running on Java 11',
+            'javascript': 'Running on Node.js 16'
+        };
+
+        if (this.outputInfo) {
+            this.outputInfo.textContent = langInfo[lang] || 'Running on ' + lang;
+        }
+    }
+
+    handleNavigation(target) {
+        const navText = target.textContent.trim();
+
+        if (navText === 'History') {
+            window.location.href = '/editor/history/';
+        } else if (navText === 'Profile') {
+            window.location.href = '/editor/profile/';
+        } else if (navText === 'Editor') {
+            // Already on editor
+        }
+
+        this.navItems.forEach(item => item.classList.remove('active'));
+        target.classList.add('active');
+    }
+
+
+
+    handleKeyboardShortcuts(e) {
+        // Ctrl/Cmd + Enter: Execute
+        if ((e.ctrlKey || e.metaKey) && e.key === 'Enter') {
+            e.preventDefault();
+            this.executeCode();
+        }
+    }
+
+    getCookie(name) {
+        let cookieValue = null;
+        if (document.cookie && document.cookie !== '') {
+            const cookies = document.cookie.split(';');
+            for (let i = 0; i < cookies.length; i++) {
+                const cookie = cookies[i].trim();
+                if (cookie.substring(0, name.length + 1) === (name + '=')) {
+                    cookieValue = decodeURIComponent(cookie.substring(name.length + 1));
+                    break;
+                }
+            }
+        }
+        return cookieValue;
+    }
+}
+
+// File Management
+let openFiles = {
+    0: { name: 'Untitled.py', language: 'python', content: '' }
+};
+let nextFileId = 1;
+let currentFileId = 0;
+
+function createNewFile() {
+    const fileId = nextFileId++;
+    const fileName = `Untitled${nextFileId}.py`;
+    openFiles[fileId] = { name: fileName, language: 'python', content: '' };
+
+    // Save current file content
+    openFiles[currentFileId].content = editor.editor.value;
+
+    // Create new tab
+    const tabsContainer = document.getElementById('editorTabs');
+    const newTab = document.createElement('button');
+    newTab.className = 'editor-tab active';
+    newTab.dataset.fileId = fileId;
+    newTab.innerHTML = `
+        <i class="fas fa-file-code"></i>
+        <span class="tab-name">${fileName}</span>
+        <button class="tab-close" onclick="closeTab(${fileId})" title="Close">×</button>
+    `;
+    newTab.addEventListener('click', () => switchFile(fileId));
+
+    // Remove active from other tabs
+    document.querySelectorAll('.editor-tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+
+    tabsContainer.insertBefore(newTab, tabsContainer.lastElementChild);
+    switchFile(fileId);
+}
+
+function switchFile(fileId) {
+    // Save current file
+    openFiles[currentFileId].content = editor.editor.value;
+
+    // Update tabs
+    document.querySelectorAll('.editor-tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+    document.querySelector(`[data-file-id="${fileId}"]`).classList.add('active');
+
+    // Load new file
+    currentFileId = fileId;
+    const file = openFiles[fileId];
+    editor.editor.value = file.content;
+    editor.changeLanguage(file.language);
+
+    // Update filename display
+    document.getElementById('currentFileName').textContent = file.name;
+}
+
+function closeTab(fileId) {
+    event.stopPropagation();
+
+    if (Object.keys(openFiles).length === 1) {
+        alert('Cannot close the last file');
+        return;
+    }
+
+    // Remove tab
+    document.querySelector(`[data-file-id="${fileId}"]`).remove();
+    delete openFiles[fileId];
+
+    // Switch to another file
+    const remainingFileId = Object.keys(openFiles)[0];
+    switchFile(parseInt(remainingFileId));
+}
+
+function downloadFile() {
+    const file = openFiles[currentFileId];
+    const content = editor.editor.value;
+    const blob = new Blob([content], { type: 'text/plain' });
+    const url = window.URL.createObjectURL(blob);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = file.name;
+    document.body.appendChild(a);
+    a.click();
+    window.URL.revokeObjectURL(url);
+    document.body.removeChild(a);
+}
+
+function startRenameFile() {
+    const currentFile = openFiles[currentFileId];
+    const fileNameSpan = document.getElementById('currentFileName');
+    const currentName = currentFile.name;
+
+    // Create input field
+    const input = document.createElement('input');
+    input.type = 'text';
+    input.className = 'file-name-input';
+    input.value = currentName;
+
+    // Replace span with input
+    fileNameSpan.replaceWith(input);
+    input.focus();
+    input.select();
+
+    function saveNewName() {
+        const newName = input.value.trim();
+        if (newName && newName !== currentName) {
+            currentFile.name = newName;
+
+            // Update tab name
+            const tab = document.querySelector(`[data-file-id="${currentFileId}"] .tab-name`);
+            if (tab) tab.textContent = newName;
+        }
+
+        // Create new span
+        const newSpan = document.createElement('span');
+        newSpan.id = 'currentFileName';
+        newSpan.textContent = currentFile.name;
+        input.replaceWith(newSpan);
+    }
+
+    input.addEventListener('blur', saveNewName);
+    input.addEventListener('keydown', (e) => {
+        if (e.key === 'Enter') saveNewName();
+        if (e.key === 'Escape') {
+            const newSpan = document.createElement('span');
+            newSpan.id = 'currentFileName';
+            newSpan.textContent = currentName;
+            input.replaceWith(newSpan);
+        }
+    });
+}
+
+function changeFileType(newLanguage) {
+    const currentFile = openFiles[currentFileId];
+    const extensionMap = {
+        'python': '.py',
+        'java': '.java',
+        'javascript': '.js'
+    };
+
+    // Update language
+    currentFile.language = newLanguage;
+    editor.changeLanguage(newLanguage);
+
+    // Update file extension if needed
+    const currentExt = currentFile.name.substring(currentFile.name.lastIndexOf('.'));
+    const newExt = extensionMap[newLanguage];
+
+    if (currentExt !== newExt) {
+        const baseName = currentFile.name.substring(0, currentFile.name.lastIndexOf('.'));
+        currentFile.name = baseName + newExt;
+
+        // Update display
+        document.getElementById('currentFileName').textContent = currentFile.name;
+
+        // Update tab name
+        const tab = document.querySelector(`[data-file-id="${currentFileId}"] .tab-name`);
+        if (tab) tab.textContent = currentFile.name;
+    }
+}
+
+// Initialize editor
+let editor;
+document.addEventListener('DOMContentLoaded', () => {
+    editor = new CodeStudioEditor();
+});